@@ -1,10 +1,12 @@
-from flask import Flask, jsonify, request, make_response
+from flask import Flask, Response, jsonify, request, make_response, g
 from flask_cors import CORS
 from flask_caching import Cache
 import sys
 import os
 import logging
 from datetime import datetime
+from functools import wraps
+from itertools import chain
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -14,7 +16,30 @@ logger = logging.getLogger(__name__)
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from utils.models import Job, Company, User, JobApplication, Session
+    from utils.models import Job, Company, JobApplication
+    from utils.data_manager import (
+        find_jobs, find_last_modified, job_sort_key, stream_jobs, UnitOfWork, get_db_session, commit_session,
+        release_session, rollback_session, invalidate_cache, insert_jobs, set_application_statuses,
+        count_applications, find_ranked_applications, RANKED_APPLICATION_SORT_KEYS, find_credentials, table_version
+    )
+    from utils.auth import Forbidden, InvalidToken, LoginBusy, Principal, authorize, issue_token, token_ttl
+    from utils.auth import authorize_operator, verify_password
+    from utils.job_import import InvalidFeed, ImportReport, validate_body
+    from utils.notifications import start_worker_pool
+    from utils.pool_stats import pool_report, start_reporter
+    from utils.render_service import RenderQueueFull, RenderTimeout, get_render_service
+    from utils.photo import InvalidPhoto
+    from utils.pagination import InvalidCursor, keyset_page, keyset_slice
+    from utils.shared_cache import tag_version
+    from api.serializers import (
+        JOBS_QUERY_PARAMS, PAGE_QUERY_PARAMS, RANKED_APPLICATIONS_QUERY_PARAMS, normalized_query, entity_tag,
+        validator_headers, is_not_modified, page_params, page_payload, wants_ndjson, StreamEncoder,
+        serialize_job, serialize_company, serialize_company_job, serialize_application,
+        serialize_import_report, import_status, status_update_params, serialize_status_update,
+        resume_render_params, ranked_applications_params, serialize_ranked_application, token_params,
+        serialize_token, application_params, read_tags
+    )
+    from api.compression import MIN_COMPRESS_SIZE, negotiate, compress, compress_stream
     logger.info("Successfully imported database models")
 except Exception as e:
     logger.error(f"Failed to import database models: {str(e)}")
@@ -23,17 +48,148 @@ except Exception as e:
 app = Flask(__name__)
 CORS(app)
 
-# Configure Flask-Caching
+# Configure Flask-Caching on the cache shared by all workers (SHARED_CACHE_BACKEND)
 cache = Cache(app, config={
-    'CACHE_TYPE': 'simple',
+    'CACHE_TYPE': 'utils.shared_cache.flask_cache_backend',
     'CACHE_DEFAULT_TIMEOUT': 300
 })
 
 # API versioning prefix
 API_V1 = '/api/v1'
 
-def get_db_session():
-    return Session()
+def _response_cache_key(params, tags):
+    """make_cache_key for a view that reads params and depends on the data behind tags.
+
+    The key carries the current version of each tag, so a write anywhere
+    that invalidates a tag makes every process miss the old responses.
+    """
+    def make_cache_key(*args, **kwargs):
+        versions = '.'.join(tag_version(tag) for tag in tags)
+        return f"api:{request.path}?{normalized_query(request.args, params)}#{versions}"
+    return make_cache_key
+
+def _is_success(rv):
+    """Errors are returned as (body, status) tuples and are never cached"""
+    return not isinstance(rv, tuple)
+
+def conditional(model, params=(), row_arg=None):
+    """Serve ETag/Last-Modified from model's updated_at and answer conditional GETs.
+
+    The validators come from one index lookup, so a poll that matches gets a
+    304 without touching the response cache or serializing any rows. Place
+    this above @cache.cached. row_arg names the URL argument holding a row
+    id; without it the whole table's latest change is used, and the ETag
+    also carries the table's version, so only If-None-Match can match.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # Read before the rows, so a write committed meanwhile changes the next ETag
+            version = None if row_arg else table_version(model)
+            session = get_db_session()
+            try:
+                last_modified = find_last_modified(session, model, kwargs[row_arg] if row_arg else None)
+            except Exception as e:
+                rollback_session(session)
+                # Validators are an optimization; serve the view without them
+                logger.warning(f"Error reading last modified time: {str(e)}")
+                last_modified = None
+            finally:
+                release_session(session)
+            if last_modified is None:
+                return view(**kwargs)
+
+            etag = entity_tag(request.path, normalized_query(request.args, params), last_modified, version)
+            if is_not_modified(request.headers, etag, None if version else last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+            response.headers.update(validator_headers(etag, last_modified))
+            return response
+        return wrapper
+    return decorator
+
+def requires(role, id_arg=None):
+    """Answer 401 without a valid bearer token for role, and 403 when it is for
+    another role or, with id_arg, another id than that URL argument.
+
+    The token is checked by signature alone, without a database lookup; the
+    caller is left in g.principal. Place this above @cache.cached so cached
+    responses are only served to authorized callers.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            try:
+                g.principal = authorize(request.headers.get('Authorization'), role, kwargs[id_arg] if id_arg else None)
+            except InvalidToken as e:
+                return jsonify({'error': str(e)}), 401, {'WWW-Authenticate': 'Bearer'}
+            except Forbidden as e:
+                return jsonify({'error': str(e)}), 403
+            return view(**kwargs)
+        return wrapper
+    return decorator
+
+@app.before_request
+def start_notification_workers():
+    """Deliver queued emails from background threads (NOTIFICATION_WORKERS=0 to disable).
+
+    Started on a process's first request rather than at import, so every
+    worker of gunicorn or another WSGI server runs its own pool, forked or not.
+    """
+    start_worker_pool()
+
+@app.before_request
+def open_unit_of_work():
+    """Serve each request from one pooled connection and transaction.
+
+    Reads come from a replica snapshot unless the data the route reads was
+    just written, e.g. GET /applications/<user_id> right after POST /applications.
+    """
+    if request.method in ('GET', 'HEAD'):
+        tags = read_tags(request.path, (request.view_args or {}).get('company_id'))
+        g.unit_of_work = UnitOfWork(read_only=True, tags=tags).begin()
+    else:
+        g.unit_of_work = UnitOfWork().begin()
+
+@app.after_request
+def commit_unit_of_work(response):
+    uow = g.get('unit_of_work')
+    if uow is not None:
+        if response.status_code < 400:
+            uow.commit()
+        else:
+            uow.rollback()
+    return response
+
+@app.teardown_request
+def close_unit_of_work(error):
+    uow = g.pop('unit_of_work', None)
+    if uow is not None:
+        uow.close()
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON bodies for clients that accept gzip or brotli"""
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    if (encoding is None or response.status_code != 200 or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or response.mimetype != 'application/json'):
+        return response
+    data = response.get_data()
+    if len(data) >= MIN_COMPRESS_SIZE:
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def _page_params():
+    return page_params(request.args)
+
+def _page_response(rows, limit, sort_key, serialize):
+    return jsonify(page_payload(rows, limit, sort_key, serialize))
 
 @app.errorhandler(404)
 def not_found(error):
@@ -48,129 +204,330 @@ def internal_error(error):
 def health_check():
     return jsonify({"status": "healthy", "message": "Flask API is running"}), 200
 
+# Connection pool statistics of this process
+@app.route(f'{API_V1}/pools', methods=['GET'])
+def get_pools():
+    try:
+        authorize_operator(request.headers.get('Authorization'))
+    except InvalidToken as e:
+        return jsonify({'error': str(e)}), 401, {'WWW-Authenticate': 'Bearer'}
+    return jsonify({'pools': pool_report()})
+
+# Auth endpoints
+@app.route(f'{API_V1}/auth:token', methods=['POST'])
+def create_token():
+    """Exchange a user's or company's email and password for a bearer token"""
+    session = get_db_session()
+    try:
+        email, password, role = token_params(request.get_json(silent=True))
+        credentials = find_credentials(session, role, email)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        rollback_session(session)
+        logger.error(f"Error reading credentials: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
+    try:
+        # Hashed on the password pool, after the connection is released
+        if not verify_password(credentials.password if credentials else None, password):
+            return jsonify({'error': 'Invalid email or password'}), 401
+    except LoginBusy as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '1'}
+    principal = Principal(credentials.id, role, email)
+    return jsonify(serialize_token(issue_token(principal), principal, token_ttl()))
+
 # Job endpoints
 @app.route(f'{API_V1}/jobs', methods=['GET'])
-@cache.cached(timeout=60)  # Cache for 1 minute
+@conditional(Job, JOBS_QUERY_PARAMS)
+@cache.cached(  # Cache for 1 minute, per filter set
+    timeout=60,
+    make_cache_key=_response_cache_key(JOBS_QUERY_PARAMS, ['jobs']),
+    response_filter=_is_success
+)
 def get_jobs():
     session = get_db_session()
     try:
         # Get query parameters
+        search_query = request.args.get('q')
         location = request.args.get('location')
-        job_type = request.args.get('job_type')
+        job_types = request.args.getlist('job_type')
         accommodations = request.args.getlist('accommodations')
+        limit, after = _page_params()
 
-        # Build query
-        query = session.query(Job)
-        if location:
-            query = query.filter(Job.location == location)
-        if job_type:
-            query = query.filter(Job.job_type == job_type)
-        if accommodations:
-            for acc in accommodations:
-                query = query.filter(Job.accommodations.contains([acc]))
-
-        jobs = query.all()
-        return jsonify([{
-            'id': job.id,
-            'title': job.title,
-            'company_id': job.company_id,
-            'location': job.location,
-            'job_type': job.job_type,
-            'accommodations': job.accommodations,
-            'description': job.description,
-            'posted_date': job.posted_date.isoformat() if job.posted_date else None
-        } for job in jobs])
+        jobs = find_jobs(
+            session,
+            query=search_query,
+            job_types=job_types,
+            location=location,
+            accommodations=accommodations,
+            limit=limit + 1,
+            after=after
+        )
+        return _page_response(jobs, limit, job_sort_key, serialize_job)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        rollback_session(session)
         logger.error(f"Error fetching jobs: {str(e)}")
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
+        release_session(session)
 
 # Company endpoints
 @app.route(f'{API_V1}/companies', methods=['GET'])
-@cache.cached(timeout=300)  # Cache for 5 minutes
+@conditional(Company, PAGE_QUERY_PARAMS)
+@cache.cached(  # Cache for 5 minutes, per page
+    timeout=300,
+    make_cache_key=_response_cache_key(PAGE_QUERY_PARAMS, ['companies']),
+    response_filter=_is_success
+)
 def get_companies():
     session = get_db_session()
     try:
-        companies = session.query(Company).all()
-        return jsonify([{
-            'id': company.id,
-            'name': company.name,
-            'website': company.website,
-            'verified': company.verified,
-            'verification_status': company.verification_status,
-            'description': company.description,
-            'accessibility_features': company.accessibility_features
-        } for company in companies])
+        limit, after = _page_params()
+        companies = keyset_page(session.query(Company), [Company.id], after, limit).all()
+        return _page_response(companies, limit, lambda company: [company.id], serialize_company)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        rollback_session(session)
         logger.error(f"Error fetching companies: {str(e)}")
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
+        release_session(session)
+
+@app.route(f'{API_V1}/jobs:stream', methods=['GET'])
+def stream_all_jobs():
+    """Every job matching the filters, streamed as a JSON array or NDJSON.
+
+    Rows come from a server-side cursor and are encoded and compressed as
+    they arrive, so memory stays flat however large the catalog grows.
+    """
+    try:
+        jobs = stream_jobs(
+            query=request.args.get('q'),
+            job_types=request.args.getlist('job_type'),
+            location=request.args.get('location'),
+            accommodations=request.args.getlist('accommodations')
+        )
+        # Run the query now so database errors still get an error response
+        first = next(jobs, None)
+        jobs = chain([first], jobs) if first is not None else iter(())
+    except Exception as e:
+        logger.error(f"Error streaming jobs: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+    encoder = StreamEncoder(serialize_job, ndjson=wants_ndjson(request.args, request.headers.get('Accept')))
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    response = Response(compress_stream(encoder.chunks(jobs), encoding), mimetype=encoder.mimetype)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@app.route(f'{API_V1}/jobs/<int:job_id>', methods=['GET'])
+@conditional(Job, row_arg='job_id')
+def get_job(job_id):
+    session = get_db_session()
+    try:
+        job = session.get(Job, job_id)
+        if job is None:
+            return jsonify({'error': 'Resource not found'}), 404
+        return jsonify(serialize_job(job))
+    except Exception as e:
+        rollback_session(session)
+        logger.error(f"Error fetching job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
+
+@app.route(f'{API_V1}/companies/<int:company_id>', methods=['GET'])
+@conditional(Company, row_arg='company_id')
+def get_company(company_id):
+    session = get_db_session()
+    try:
+        company = session.get(Company, company_id)
+        if company is None:
+            return jsonify({'error': 'Resource not found'}), 404
+        return jsonify(serialize_company(company))
+    except Exception as e:
+        rollback_session(session)
+        logger.error(f"Error fetching company: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
 
 @app.route(f'{API_V1}/companies/<int:company_id>/jobs', methods=['GET'])
 def get_company_jobs(company_id):
     session = get_db_session()
     try:
-        jobs = session.query(Job).filter_by(company_id=company_id).all()
-        return jsonify([{
-            'id': job.id,
-            'title': job.title,
-            'location': job.location,
-            'job_type': job.job_type,
-            'accommodations': job.accommodations,
-            'description': job.description,
-            'posted_date': job.posted_date.isoformat() if job.posted_date else None
-        } for job in jobs])
+        limit, after = _page_params()
+        query = session.query(Job).filter_by(company_id=company_id)
+        jobs = keyset_page(query, [Job.posted_date, Job.id], after, limit).all()
+        return _page_response(jobs, limit, lambda job: [job.posted_date, job.id], serialize_company_job)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        rollback_session(session)
         logger.error(f"Error fetching company jobs: {str(e)}")
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
+        release_session(session)
+
+@app.route(f'{API_V1}/companies/<int:company_id>/jobs:bulk', methods=['POST'])
+@requires('company', 'company_id')
+def bulk_import_jobs(company_id):
+    """Validate a batch of jobs and insert the valid rows in one transaction"""
+    session = get_db_session()
+    try:
+        if session.get(Company, company_id) is None:
+            return jsonify({'error': 'Resource not found'}), 404
+        jobs, errors = validate_body(request.get_data(), request.mimetype)
+        report = ImportReport(len(insert_jobs(session, company_id, jobs)) if jobs else 0, errors)
+        commit_session(session)
+        if report.inserted:
+            invalidate_cache('jobs')
+        return jsonify(serialize_import_report(report)), import_status(report)
+    except InvalidFeed as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error importing jobs: {str(e)}")
+        rollback_session(session)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
 
 # Application endpoints
 @app.route(f'{API_V1}/applications', methods=['POST'])
+@requires('user')
 def submit_application():
+    """Apply to a job as the user the bearer token was issued to"""
     session = get_db_session()
     try:
-        data = request.get_json()
+        job_id, user_id = application_params(request.get_json(silent=True))
+        if user_id is not None and user_id != g.principal.id:
+            return jsonify({'error': f"Token is not for user {user_id}"}), 403
+        if session.get(Job, job_id) is None:
+            return jsonify({'error': f"Job {job_id} does not exist"}), 404
         new_application = JobApplication(
-            user_id=data['user_id'],
-            job_id=data['job_id'],
+            user_id=g.principal.id,
+            job_id=job_id,
             status='applied',
             applied_date=datetime.utcnow()
         )
         session.add(new_application)
-        session.commit()
+        count_applications(session, {(job_id, 'applied'): 1})
+        commit_session(session)
+        invalidate_cache('applications')
         return jsonify({'message': 'Application submitted successfully'}), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error submitting application: {str(e)}")
-        session.rollback()
+        rollback_session(session)
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
+
+@app.route(f'{API_V1}/companies/<int:company_id>/applications:updateStatus', methods=['POST'])
+@requires('company', 'company_id')
+def update_application_status(company_id):
+    """Move many of a company's applications to one status with a single UPDATE"""
+    session = get_db_session()
+    try:
+        application_ids, status, email_data = status_update_params(request.get_json(silent=True))
+        notices = set_application_statuses(session, company_id, application_ids, status, email_data)
+        commit_session(session)
+        if notices:
+            invalidate_cache('applications')
+        return jsonify(serialize_status_update(application_ids, notices))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error updating application statuses: {str(e)}")
+        rollback_session(session)
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
+        release_session(session)
+
+@app.route(f'{API_V1}/companies/<int:company_id>/applications', methods=['GET'])
+@requires('company', 'company_id')
+@cache.cached(  # Cache for 30 seconds, per company and page
+    timeout=30,
+    make_cache_key=_response_cache_key(RANKED_APPLICATIONS_QUERY_PARAMS, ['applications']),
+    response_filter=_is_success
+)
+def get_ranked_applications(company_id):
+    """A company's applications ranked against each job's requirements (sort=score) or newest first"""
+    session = get_db_session()
+    try:
+        job_id, sort, skills = ranked_applications_params(request.args)
+        limit, after = _page_params()
+        applications = find_ranked_applications(session, company_id, job_id, sort, skills)
+        sort_key = RANKED_APPLICATION_SORT_KEYS[sort]
+        return _page_response(
+            keyset_slice(applications, sort_key, after, limit), limit, sort_key, serialize_ranked_application
+        )
+    except ValueError as e:
+        # Also covers InvalidCursor
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        rollback_session(session)
+        logger.error(f"Error ranking applications: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        release_session(session)
 
 @app.route(f'{API_V1}/applications/<int:user_id>', methods=['GET'])
+@requires('user', 'user_id')
 def get_user_applications(user_id):
     session = get_db_session()
     try:
-        applications = session.query(JobApplication).filter_by(user_id=user_id).all()
-        return jsonify([{
-            'id': app.id,
-            'job_id': app.job_id,
-            'status': app.status,
-            'applied_date': app.applied_date.isoformat() if app.applied_date else None
-        } for app in applications])
+        limit, after = _page_params()
+        query = session.query(JobApplication).filter_by(user_id=user_id)
+        sort_key = [JobApplication.applied_date, JobApplication.id]
+        applications = keyset_page(query, sort_key, after, limit).all()
+        return _page_response(applications, limit, lambda app: [app.applied_date, app.id], serialize_application)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
+        rollback_session(session)
         logger.error(f"Error fetching user applications: {str(e)}")
         return jsonify({'error': str(e)}), 500
     finally:
-        session.close()
+        release_session(session)
+
+# Resume endpoints
+@app.route(f'{API_V1}/resumes:render', methods=['POST'])
+def render_resume_pdf():
+    """Render a resume to PDF on the render process pool"""
+    service = get_render_service()
+    try:
+        resume_data, template = resume_render_params(request.get_json(silent=True))
+        job_id = service.submit(resume_data, template)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RenderQueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+    try:
+        pdf = service.get_result(job_id)
+    except RenderTimeout as e:
+        service.cancel(job_id)
+        return jsonify({'error': str(e)}), 504
+    except InvalidPhoto as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error rendering resume: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+    return Response(pdf, mimetype='application/pdf')
 
 if __name__ == '__main__':
     try:
         port = int(os.environ.get('FLASK_PORT', 5001))
         logger.info(f"Starting Flask API on port {port}")
+        # Logs connection pool statistics every DB_POOL_STATS_INTERVAL seconds
+        start_reporter()
         app.run(host='0.0.0.0', port=port)
     except Exception as e:
         logger.error(f"Failed to start Flask API: {str(e)}")
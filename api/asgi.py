@@ -0,0 +1,513 @@
+"""ASGI edition of the /api/v1 REST API.
+
+Serves the same routes and JSON as api/app.py, but on Starlette and
+SQLAlchemy's asyncio engine: a request waiting on the database yields the
+event loop instead of holding a worker thread. Run it with
+
+    uvicorn api.asgi:app --port 5002
+"""
+import asyncio
+import sys
+import os
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime
+from functools import wraps
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Add the root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    from sqlalchemy import select
+    from utils.models import Job, Company, JobApplication
+    from utils.async_db import AsyncSession, read_only_session
+    from utils.data_manager import (
+        STREAM_BATCH_SIZE, find_jobs, find_last_modified, job_search_statement, job_sort_key, invalidate_cache,
+        insert_jobs, set_application_statuses, count_applications, find_ranked_applications,
+        RANKED_APPLICATION_SORT_KEYS, find_credentials, table_version
+    )
+    from utils.auth import (
+        HASH_TIMEOUT, Forbidden, InvalidToken, LoginBusy, Principal, authorize, authorize_operator,
+        get_password_hasher, issue_token, token_ttl
+    )
+    from utils.job_import import InvalidFeed, ImportReport, validate_body
+    from utils.notifications import start_worker_pool
+    from utils.pool_stats import pool_report, start_reporter
+    from utils.render_service import RENDER_TIMEOUT, RenderQueueFull, get_render_service
+    from utils.photo import InvalidPhoto
+    from utils.read_models import JobSummary
+    from utils.pagination import InvalidCursor, keyset_page, keyset_slice
+    from api.serializers import (
+        JOBS_QUERY_PARAMS, PAGE_QUERY_PARAMS, normalized_query, entity_tag, validator_headers,
+        is_not_modified, page_params, page_payload, wants_ndjson, StreamEncoder, serialize_job,
+        serialize_company, serialize_company_job, serialize_application, serialize_import_report, import_status,
+        status_update_params, serialize_status_update, resume_render_params, ranked_applications_params,
+        serialize_ranked_application, token_params, serialize_token, application_params, read_tags
+    )
+    from api.compression import COMPRESSORS, MIN_COMPRESS_SIZE, negotiate
+    logger.info("Successfully imported database models")
+except Exception as e:
+    logger.error(f"Failed to import database models: {str(e)}")
+    raise
+
+# API versioning prefix
+API_V1 = '/api/v1'
+
+
+def _error(message, status_code):
+    return JSONResponse({'error': message}, status_code=status_code)
+
+
+def _read_session(request):
+    """Read-only session for request, on the primary while the data its route reads was just written"""
+    return read_only_session(read_tags(request.url.path, request.path_params.get('company_id')))
+
+
+async def not_found(request, exc):
+    return _error('Resource not found', 404)
+
+
+async def internal_error(request, exc):
+    return _error('Internal server error', 500)
+
+
+def conditional(model, params=(), row_param=None):
+    """Serve ETag/Last-Modified from model's updated_at and answer conditional GETs.
+
+    Same validators as the Flask app: one index lookup, and a 304 without
+    running the endpoint when the client's copy is current.
+    """
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(request):
+            row_id = request.path_params[row_param] if row_param else None
+            # Read before the rows, so a write committed meanwhile changes the next ETag
+            version = None if row_param else table_version(model)
+            try:
+                async with _read_session(request) as session:
+                    last_modified = await session.run_sync(find_last_modified, model, row_id)
+            except Exception as e:
+                # Validators are an optimization; serve the endpoint without them
+                logger.warning(f"Error reading last modified time: {str(e)}")
+                last_modified = None
+            if last_modified is None:
+                return await endpoint(request)
+
+            etag = entity_tag(
+                request.url.path, normalized_query(request.query_params, params), last_modified, version
+            )
+            headers = validator_headers(etag, last_modified)
+            if is_not_modified(request.headers, etag, None if version else last_modified):
+                return Response(status_code=304, headers=headers)
+            response = await endpoint(request)
+            if response.status_code == 200:
+                response.headers.update(headers)
+            return response
+        return wrapper
+    return decorator
+
+
+def requires(role, id_param=None):
+    """Answer 401 without a valid bearer token for role, and 403 when it is for
+    another role or, with id_param, another id than that path parameter.
+
+    Checked by signature alone; the caller is left in request.state.principal.
+    """
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(request):
+            subject_id = request.path_params[id_param] if id_param else None
+            try:
+                request.state.principal = authorize(request.headers.get('Authorization'), role, subject_id)
+            except InvalidToken as e:
+                return JSONResponse({'error': str(e)}, status_code=401, headers={'WWW-Authenticate': 'Bearer'})
+            except Forbidden as e:
+                return _error(str(e), 403)
+            return await endpoint(request)
+        return wrapper
+    return decorator
+
+
+# Health check endpoint
+async def health_check(request):
+    return JSONResponse({"status": "healthy", "message": "ASGI API is running"})
+
+
+async def get_pools(request):
+    """Connection pool statistics of this process"""
+    try:
+        authorize_operator(request.headers.get('Authorization'))
+    except InvalidToken as e:
+        return JSONResponse({'error': str(e)}, status_code=401, headers={'WWW-Authenticate': 'Bearer'})
+    return JSONResponse({'pools': pool_report()})
+
+
+# Auth endpoints
+async def create_token(request):
+    """Exchange a user's or company's email and password for a bearer token"""
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        email, password, role = token_params(data)
+        # From the primary, so an account is usable as soon as it is created
+        async with AsyncSession() as session:
+            credentials = await session.run_sync(find_credentials, role, email)
+    except ValueError as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error reading credentials: {str(e)}")
+        return _error(str(e), 500)
+    try:
+        # The hash runs on the password pool while the event loop serves other requests
+        future = get_password_hasher().verify(credentials.password if credentials else None, password)
+        verified = await asyncio.wait_for(asyncio.wrap_future(future), HASH_TIMEOUT)
+    except (LoginBusy, asyncio.TimeoutError) as e:
+        return JSONResponse({'error': str(e) or 'Password check timed out'}, status_code=503,
+                            headers={'Retry-After': '1'})
+    if not verified:
+        return _error('Invalid email or password', 401)
+    principal = Principal(credentials.id, role, email)
+    return JSONResponse(serialize_token(issue_token(principal), principal, token_ttl()))
+
+
+# Job endpoints
+@conditional(Job, JOBS_QUERY_PARAMS)
+async def get_jobs(request):
+    try:
+        args = request.query_params
+        limit, after = page_params(args)
+        async with _read_session(request) as session:
+            # The search query builder is shared with the sync app via run_sync
+            jobs = await session.run_sync(
+                find_jobs,
+                query=args.get('q'),
+                job_types=args.getlist('job_type'),
+                location=args.get('location'),
+                accommodations=args.getlist('accommodations'),
+                limit=limit + 1,
+                after=after
+            )
+        return JSONResponse(page_payload(jobs, limit, job_sort_key, serialize_job))
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error fetching jobs: {str(e)}")
+        return _error(str(e), 500)
+
+
+async def stream_all_jobs(request):
+    """Every job matching the filters, streamed as a JSON array or NDJSON"""
+    args = request.query_params
+    session = _read_session(request)
+    try:
+        statement = job_search_statement(
+            session.sync_session,
+            query=args.get('q'),
+            job_types=args.getlist('job_type'),
+            location=args.get('location'),
+            accommodations=args.getlist('accommodations')
+        )
+        result = await session.stream(statement.execution_options(yield_per=STREAM_BATCH_SIZE))
+    except Exception as e:
+        await session.close()
+        logger.error(f"Error streaming jobs: {str(e)}")
+        return _error(str(e), 500)
+
+    encoder = StreamEncoder(serialize_job, ndjson=wants_ndjson(args, request.headers.get('Accept')))
+    encoding = negotiate(request.headers.get('Accept-Encoding'))
+    compressor = COMPRESSORS[encoding]() if encoding is not None else None
+
+    def encode(text):
+        data = text.encode('utf-8')
+        return compressor.process(data) if compressor is not None else data
+
+    async def body():
+        try:
+            yield encode(encoder.start())
+            async for partition in result.partitions():
+                yield encode(encoder.encode(JobSummary(*row) for row in partition))
+            yield encode(encoder.end()) + (compressor.finish() if compressor is not None else b'')
+        finally:
+            await session.close()
+
+    headers = {'Vary': 'Accept-Encoding'}
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return StreamingResponse(body(), media_type=encoder.mimetype, headers=headers)
+
+
+@conditional(Job, row_param='job_id')
+async def get_job(request):
+    try:
+        async with _read_session(request) as session:
+            job = await session.get(Job, request.path_params['job_id'])
+        if job is None:
+            return _error('Resource not found', 404)
+        return JSONResponse(serialize_job(job))
+    except Exception as e:
+        logger.error(f"Error fetching job: {str(e)}")
+        return _error(str(e), 500)
+
+
+# Company endpoints
+@conditional(Company, PAGE_QUERY_PARAMS)
+async def get_companies(request):
+    try:
+        limit, after = page_params(request.query_params)
+        async with _read_session(request) as session:
+            statement = keyset_page(select(Company), [Company.id], after, limit)
+            companies = (await session.scalars(statement)).all()
+        return JSONResponse(page_payload(companies, limit, lambda company: [company.id], serialize_company))
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error fetching companies: {str(e)}")
+        return _error(str(e), 500)
+
+
+@conditional(Company, row_param='company_id')
+async def get_company(request):
+    try:
+        async with _read_session(request) as session:
+            company = await session.get(Company, request.path_params['company_id'])
+        if company is None:
+            return _error('Resource not found', 404)
+        return JSONResponse(serialize_company(company))
+    except Exception as e:
+        logger.error(f"Error fetching company: {str(e)}")
+        return _error(str(e), 500)
+
+
+async def get_company_jobs(request):
+    company_id = request.path_params['company_id']
+    try:
+        limit, after = page_params(request.query_params)
+        async with _read_session(request) as session:
+            statement = select(Job).filter_by(company_id=company_id)
+            statement = keyset_page(statement, [Job.posted_date, Job.id], after, limit)
+            jobs = (await session.scalars(statement)).all()
+        return JSONResponse(page_payload(jobs, limit, lambda job: [job.posted_date, job.id], serialize_company_job))
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error fetching company jobs: {str(e)}")
+        return _error(str(e), 500)
+
+
+@requires('company', 'company_id')
+async def bulk_import_jobs(request):
+    """Validate a batch of jobs and insert the valid rows in one transaction"""
+    company_id = request.path_params['company_id']
+    async with AsyncSession() as session:
+        try:
+            if await session.get(Company, company_id) is None:
+                return _error('Resource not found', 404)
+            content_type = request.headers.get('Content-Type', '').split(';')[0].strip()
+            jobs, errors = validate_body(await request.body(), content_type)
+            job_ids = await session.run_sync(insert_jobs, company_id, jobs) if jobs else []
+            await session.commit()
+            report = ImportReport(len(job_ids), errors)
+            if report.inserted:
+                invalidate_cache('jobs')
+            return JSONResponse(serialize_import_report(report), status_code=import_status(report))
+        except InvalidFeed as e:
+            return _error(str(e), 400)
+        except Exception as e:
+            logger.error(f"Error importing jobs: {str(e)}")
+            await session.rollback()
+            return _error(str(e), 500)
+
+
+# Application endpoints
+@requires('user')
+async def submit_application(request):
+    """Apply to a job as the user the bearer token was issued to"""
+    principal = request.state.principal
+    async with AsyncSession() as session:
+        try:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+            job_id, user_id = application_params(data)
+            if user_id is not None and user_id != principal.id:
+                return _error(f"Token is not for user {user_id}", 403)
+            if await session.get(Job, job_id) is None:
+                return _error(f"Job {job_id} does not exist", 404)
+            new_application = JobApplication(
+                user_id=principal.id,
+                job_id=job_id,
+                status='applied',
+                applied_date=datetime.utcnow()
+            )
+            session.add(new_application)
+            await session.run_sync(count_applications, {(job_id, 'applied'): 1})
+            await session.commit()
+            invalidate_cache('applications')
+            return JSONResponse({'message': 'Application submitted successfully'}, status_code=201)
+        except ValueError as e:
+            return _error(str(e), 400)
+        except Exception as e:
+            logger.error(f"Error submitting application: {str(e)}")
+            await session.rollback()
+            return _error(str(e), 500)
+
+
+@requires('company', 'company_id')
+async def update_application_status(request):
+    """Move many of a company's applications to one status with a single UPDATE"""
+    company_id = request.path_params['company_id']
+    async with AsyncSession() as session:
+        try:
+            try:
+                data = await request.json()
+            except ValueError:
+                data = None
+            application_ids, status, email_data = status_update_params(data)
+            notices = await session.run_sync(
+                set_application_statuses, company_id, application_ids, status, email_data
+            )
+            await session.commit()
+            if notices:
+                invalidate_cache('applications')
+            return JSONResponse(serialize_status_update(application_ids, notices))
+        except ValueError as e:
+            return _error(str(e), 400)
+        except Exception as e:
+            logger.error(f"Error updating application statuses: {str(e)}")
+            await session.rollback()
+            return _error(str(e), 500)
+
+
+@requires('company', 'company_id')
+async def get_ranked_applications(request):
+    """A company's applications ranked against each job's requirements (sort=score) or newest first"""
+    company_id = request.path_params['company_id']
+    try:
+        job_id, sort, skills = ranked_applications_params(request.query_params)
+        limit, after = page_params(request.query_params)
+        async with _read_session(request) as session:
+            applications = await session.run_sync(find_ranked_applications, company_id, job_id, sort, skills)
+        sort_key = RANKED_APPLICATION_SORT_KEYS[sort]
+        return JSONResponse(page_payload(
+            keyset_slice(applications, sort_key, after, limit), limit, sort_key, serialize_ranked_application
+        ))
+    except ValueError as e:
+        # Also covers InvalidCursor
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error ranking applications: {str(e)}")
+        return _error(str(e), 500)
+
+
+@requires('user', 'user_id')
+async def get_user_applications(request):
+    user_id = request.path_params['user_id']
+    try:
+        limit, after = page_params(request.query_params)
+        async with _read_session(request) as session:
+            statement = select(JobApplication).filter_by(user_id=user_id)
+            sort_key = [JobApplication.applied_date, JobApplication.id]
+            applications = (await session.scalars(keyset_page(statement, sort_key, after, limit))).all()
+        return JSONResponse(page_payload(
+            applications, limit, lambda app: [app.applied_date, app.id], serialize_application
+        ))
+    except InvalidCursor as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error fetching user applications: {str(e)}")
+        return _error(str(e), 500)
+
+
+# Resume endpoints
+async def render_resume_pdf(request):
+    """Render a resume to PDF on the render process pool without blocking the event loop"""
+    service = get_render_service()
+    try:
+        try:
+            data = await request.json()
+        except ValueError:
+            data = None
+        resume_data, template = resume_render_params(data)
+        job_id = service.submit(resume_data, template)
+    except ValueError as e:
+        return _error(str(e), 400)
+    except RenderQueueFull as e:
+        return JSONResponse({'error': str(e)}, status_code=503, headers={'Retry-After': '5'})
+    try:
+        pdf = await asyncio.wait_for(asyncio.wrap_future(service.future(job_id)), RENDER_TIMEOUT)
+    except asyncio.TimeoutError:
+        return _error(f"Render {job_id} did not finish within {RENDER_TIMEOUT} seconds", 504)
+    except InvalidPhoto as e:
+        return _error(str(e), 400)
+    except Exception as e:
+        logger.error(f"Error rendering resume: {str(e)}")
+        return _error(str(e), 500)
+    finally:
+        service.forget(job_id)
+    return Response(pdf, media_type='application/pdf')
+
+
+routes = [
+    Route('/', health_check, methods=['GET']),
+    Route(f'{API_V1}/pools', get_pools, methods=['GET']),
+    Route(f'{API_V1}/auth:token', create_token, methods=['POST']),
+    Route(f'{API_V1}/jobs', get_jobs, methods=['GET']),
+    Route(f'{API_V1}/jobs:stream', stream_all_jobs, methods=['GET']),
+    Route(f'{API_V1}/jobs/{{job_id:int}}', get_job, methods=['GET']),
+    Route(f'{API_V1}/companies', get_companies, methods=['GET']),
+    Route(f'{API_V1}/companies/{{company_id:int}}', get_company, methods=['GET']),
+    Route(f'{API_V1}/companies/{{company_id:int}}/jobs', get_company_jobs, methods=['GET']),
+    Route(f'{API_V1}/companies/{{company_id:int}}/jobs:bulk', bulk_import_jobs, methods=['POST']),
+    Route(
+        f'{API_V1}/companies/{{company_id:int}}/applications:updateStatus', update_application_status, methods=['POST']
+    ),
+    Route(f'{API_V1}/companies/{{company_id:int}}/applications', get_ranked_applications, methods=['GET']),
+    Route(f'{API_V1}/applications', submit_application, methods=['POST']),
+    Route(f'{API_V1}/applications/{{user_id:int}}', get_user_applications, methods=['GET']),
+    Route(f'{API_V1}/resumes:render', render_resume_pdf, methods=['POST']),
+]
+
+@asynccontextmanager
+async def lifespan(app):
+    # Delivers queued emails from background threads (NOTIFICATION_WORKERS=0 to disable)
+    start_worker_pool()
+    # Logs connection pool statistics every DB_POOL_STATS_INTERVAL seconds
+    start_reporter()
+    yield
+
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*']),
+        # Streams set their own Content-Encoding (gzip or brotli) and are passed through
+        Middleware(GZipMiddleware, minimum_size=MIN_COMPRESS_SIZE)
+    ],
+    exception_handlers={404: not_found, 500: internal_error}
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    try:
+        port = int(os.environ.get('ASGI_PORT', 5002))
+        logger.info(f"Starting ASGI API on port {port}")
+        uvicorn.run(app, host='0.0.0.0', port=port)
+    except Exception as e:
+        logger.error(f"Failed to start ASGI API: {str(e)}")
+        raise
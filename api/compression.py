@@ -0,0 +1,95 @@
+"""Response compression negotiated through Accept-Encoding.
+
+gzip is always available; brotli is offered when the optional brotli
+package is installed. Streams are compressed incrementally and flushed
+every STREAM_FLUSH_SIZE bytes of input, so the first rows go out as soon
+as the first block is ready and the server never holds the whole body.
+"""
+import zlib
+
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 1024
+
+# Input bytes buffered before a streamed chunk is compressed and sent
+STREAM_FLUSH_SIZE = 16 * 1024
+
+
+def supported_encodings():
+    """Content codings this server can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate(accept_encoding):
+    """Pick the best supported coding for an Accept-Encoding header, or None"""
+    if not accept_encoding:
+        return None
+    return parse_accept_header(accept_encoding, Accept).best_match(supported_encodings())
+
+
+class _GzipCompressor:
+    def __init__(self):
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def process(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=5)
+
+    def process(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+COMPRESSORS = {
+    'gzip': _GzipCompressor,
+    'br': _BrotliCompressor,
+}
+
+
+def compress(data, encoding):
+    """Compress a whole body"""
+    compressor = COMPRESSORS[encoding]()
+    return compressor.process(data) + compressor.finish()
+
+
+def buffered(chunks, size=STREAM_FLUSH_SIZE):
+    """Join small text chunks into byte blocks of roughly size bytes"""
+    buffer = []
+    buffered_size = 0
+    for chunk in chunks:
+        data = chunk.encode('utf-8')
+        buffer.append(data)
+        buffered_size += len(data)
+        if buffered_size >= size:
+            yield b''.join(buffer)
+            buffer = []
+            buffered_size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def compress_stream(chunks, encoding=None):
+    """Encode text chunks as byte blocks, compressed with encoding when given"""
+    if encoding is None:
+        yield from buffered(chunks)
+        return
+    compressor = COMPRESSORS[encoding]()
+    for block in buffered(chunks):
+        yield compressor.process(block)
+    yield compressor.finish()
@@ -0,0 +1,375 @@
+"""HTTP contract of the /api/v1 routes: query parsing, validators and JSON.
+
+Shared by the Flask app (api/app.py) and its ASGI edition (api/asgi.py) so
+both serve the same payloads.
+"""
+import base64
+import binascii
+import hashlib
+import json
+from datetime import timezone
+from urllib.parse import urlencode
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, parse_accept_header, parse_date, parse_etags
+
+from utils.auth import ROLES
+from utils.pagination import encode_cursor, decode_cursor
+
+# Page size limits for list endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Query parameters read by the list endpoints
+JOBS_QUERY_PARAMS = ('q', 'location', 'job_type', 'accommodations', 'limit', 'cursor')
+PAGE_QUERY_PARAMS = ('limit', 'cursor')
+RANKED_APPLICATIONS_QUERY_PARAMS = ('job_id', 'sort', 'skill', 'limit', 'cursor')
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Query parameters that may repeat and whose order does not matter
+MULTI_VALUE_PARAMS = {'job_type', 'accommodations', 'skill'}
+
+# Path segments naming a collection, and the cache tag of its data
+RESOURCE_TAGS = {'jobs': 'jobs', 'companies': 'companies', 'applications': 'applications'}
+
+
+def read_tags(path, company_id=None):
+    """Cache tags of the data a GET of path reads, e.g. ['companies', 'jobs', 'company:3'].
+
+    Read-only requests stay on the primary while any of them was written
+    within the replica lag window, so a client reads its own writes.
+    """
+    tags = []
+    for segment in path.split('/'):
+        tag = RESOURCE_TAGS.get(segment.split(':')[0])
+        if tag is not None and tag not in tags:
+            tags.append(tag)
+    if company_id is not None:
+        tags.append(f'company:{company_id}')
+    return tags
+
+
+def normalized_query(args, params):
+    """Canonical query string over the parameters a view reads.
+
+    Other parameters are dropped, empty values are ignored, repeatable
+    parameters are sorted and single-value ones keep the first value, the
+    one the view uses.
+    """
+    items = []
+    for name in sorted(params):
+        values = [value for value in args.getlist(name) if value]
+        if name in MULTI_VALUE_PARAMS:
+            items.extend((name, value) for value in sorted(set(values)))
+        elif values:
+            items.append((name, values[0]))
+    return urlencode(items)
+
+
+def entity_tag(path, query, last_modified, version=None):
+    """Opaque validator for a response built from data last changed at last_modified.
+
+    version, e.g. the version of a whole table, changes the tag too.
+    """
+    payload = f"{path}?{query}@{last_modified.isoformat()}#{version or ''}"
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def validator_headers(etag, last_modified):
+    """ETag and Last-Modified headers; ETags are weak because bodies may be re-encoded"""
+    return {
+        'ETag': f'W/"{etag}"',
+        'Last-Modified': http_date(last_modified.replace(tzinfo=timezone.utc))
+    }
+
+
+def is_not_modified(headers, etag, last_modified):
+    """Evaluate If-None-Match, or If-Modified-Since when no ETags are sent.
+
+    Pass last_modified=None where it may miss changes, e.g. for a whole
+    collection; only If-None-Match is then honoured.
+    """
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        return parse_etags(if_none_match).contains_weak(etag)
+    if last_modified is None:
+        return False
+    if_modified_since = parse_date(headers.get('If-Modified-Since'))
+    if if_modified_since is None:
+        return False
+    # HTTP dates have whole-second precision
+    return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= if_modified_since
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def page_params(args):
+    """Parse the limit and cursor query parameters of a list endpoint"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = args.get('cursor')
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def page_payload(rows, limit, sort_key, serialize):
+    """Serialize one page of rows fetched with limit + 1 and its next cursor"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor(sort_key(rows[-1])) if has_more else None
+    return {
+        'data': [serialize(row) for row in rows],
+        'next_cursor': next_cursor
+    }
+
+
+def wants_ndjson(args, accept):
+    """Whether a stream should be NDJSON (format=ndjson or Accept) rather than a JSON array"""
+    if args.get('format'):
+        return args.get('format') == 'ndjson'
+    if not accept:
+        return False
+    return parse_accept_header(accept, MIMEAccept).best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+
+class StreamEncoder:
+    """Incremental encoder for a stream of rows as one JSON array or as NDJSON.
+
+    encode() takes any batch of rows, so the same encoder serves row-by-row
+    generators and the partitions of an async result.
+    """
+
+    def __init__(self, serialize, ndjson=False):
+        self.serialize = serialize
+        self.ndjson = ndjson
+        self.mimetype = NDJSON_MIMETYPE if ndjson else 'application/json'
+        self._first = True
+
+    def start(self):
+        return '' if self.ndjson else '['
+
+    def encode(self, rows):
+        documents = [json.dumps(self.serialize(row), separators=(',', ':')) for row in rows]
+        if not documents:
+            return ''
+        if self.ndjson:
+            return '\n'.join(documents) + '\n'
+        text = ('' if self._first else ',') + ','.join(documents)
+        self._first = False
+        return text
+
+    def end(self):
+        return '' if self.ndjson else ']'
+
+    def chunks(self, rows):
+        """Yield the whole document for an iterable of rows"""
+        yield self.start()
+        for row in rows:
+            yield self.encode([row])
+        yield self.end()
+
+
+def token_params(data):
+    """Read a token request body: {"email": "...", "password": "...", "role": "user" | "company"}"""
+    if not isinstance(data, dict):
+        raise ValueError("Body must be a JSON object")
+    email, password = data.get('email'), data.get('password')
+    if not isinstance(email, str) or not email or not isinstance(password, str) or not password:
+        raise ValueError("email and password are required")
+    role = data.get('role', 'user')
+    if role not in ROLES:
+        raise ValueError(f"role must be one of: {', '.join(ROLES)}")
+    return email, password, role
+
+
+def serialize_token(token, principal, expires_in):
+    return {
+        'access_token': token,
+        'token_type': 'Bearer',
+        'expires_in': expires_in,
+        'role': principal.role,
+        'id': principal.id
+    }
+
+
+def _integer_id(value, name):
+    """An id sent as a JSON number or a numeric string"""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+
+def application_params(data):
+    """Read an application body: {"job_id": 1}, optionally with the applicant's "user_id".
+
+    Returns (job_id, user_id); user_id is None when it is not sent.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Body must be a JSON object")
+    if data.get('job_id') is None:
+        raise ValueError("job_id is required")
+    user_id = data.get('user_id')
+    return _integer_id(data['job_id'], 'job_id'), None if user_id is None else _integer_id(user_id, 'user_id')
+
+
+def status_update_params(data):
+    """Read a bulk status update body: {"application_ids": [...], "status": "..."}.
+
+    Optional "subject" and "message" replace the default email to applicants.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Body must be a JSON object")
+    application_ids = data.get('application_ids')
+    if not isinstance(application_ids, list) or not all(
+        isinstance(application_id, int) and not isinstance(application_id, bool) for application_id in application_ids
+    ):
+        raise ValueError("application_ids must be a list of integers")
+    email_data = {key: data[key] for key in ('subject', 'message') if isinstance(data.get(key), str)}
+    return application_ids, data.get('status'), email_data
+
+
+def serialize_status_update(application_ids, notices):
+    updated = sorted(notice.application_id for notice in notices)
+    return {
+        'updated': updated,
+        'not_updated': sorted(set(application_ids) - set(updated))
+    }
+
+
+def ranked_applications_params(args):
+    """Read the optional job_id, the sort (score or applied_date) and the skills (repeated skill) every
+    listed applicant must have of a ranked applications listing"""
+    job_id = args.get('job_id')
+    if job_id:
+        try:
+            job_id = int(job_id)
+        except ValueError:
+            raise ValueError("job_id must be an integer")
+    skills = tuple(sorted({skill.strip() for skill in args.getlist('skill') if skill.strip()}))
+    return job_id or None, args.get('sort') or 'score', skills
+
+
+def serialize_ranked_application(application):
+    return {
+        'id': application['application_id'],
+        'job_id': application['job_id'],
+        'job_title': application['job_title'],
+        'user_name': application['user_name'],
+        'user_email': application['user_email'],
+        'status': application['status'],
+        'applied_date': _isoformat(application['applied_date']),
+        'score': round(application['score'], 4),
+        'scores': {
+            'skills': round(application['skills_score'], 4),
+            'experience': round(application['experience_score'], 4),
+            'education': round(application['education_score'], 4)
+        }
+    }
+
+
+def _text(value):
+    return value if isinstance(value, str) else ''
+
+
+def _records(value, fields):
+    if not isinstance(value, list):
+        return []
+    return [{field: _text(item.get(field)) for field in fields} for item in value if isinstance(item, dict)]
+
+
+def resume_render_params(data):
+    """Read a render request: {"template": "...", "resume": {...}} in the resume builder's shape.
+
+    Missing fields render empty; the picture, if any, is base64-encoded.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('resume'), dict):
+        raise ValueError('Body must be {"template": "...", "resume": {...}}')
+    resume = data['resume']
+    personal = resume.get('personal_info') if isinstance(resume.get('personal_info'), dict) else {}
+    picture = personal.get('picture')
+    if picture:
+        try:
+            picture = base64.b64decode(picture, validate=True)
+        except (TypeError, binascii.Error):
+            raise ValueError("personal_info.picture must be base64-encoded")
+    skills = resume.get('skills')
+    resume_data = {
+        'personal_info': {
+            **{field: _text(personal.get(field)) for field in
+               ('first_name', 'last_name', 'email', 'phone', 'location', 'linkedin')},
+            'picture': picture or None
+        },
+        'summary': _text(resume.get('summary')),
+        'experiences': _records(
+            resume.get('experiences'), ('company', 'position', 'start_date', 'end_date', 'description')
+        ),
+        'education': _records(resume.get('education'), ('institution', 'degree', 'graduation_date')),
+        'skills': [skill for skill in skills if isinstance(skill, str)] if isinstance(skills, list) else []
+    }
+    return resume_data, data.get('template', 'Professional')
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'title': job.title,
+        'company_id': job.company_id,
+        'location': job.location,
+        'job_type': job.job_type,
+        'accommodations': job.accommodations,
+        'description': job.description,
+        'posted_date': _isoformat(job.posted_date)
+    }
+
+
+def serialize_company(company):
+    return {
+        'id': company.id,
+        'name': company.name,
+        'website': company.website,
+        'verified': company.verified,
+        'verification_status': company.verification_status,
+        'description': company.description,
+        'accessibility_features': company.accessibility_features
+    }
+
+
+def serialize_company_job(job):
+    return {
+        'id': job.id,
+        'title': job.title,
+        'location': job.location,
+        'job_type': job.job_type,
+        'accommodations': job.accommodations,
+        'description': job.description,
+        'posted_date': _isoformat(job.posted_date)
+    }
+
+
+def serialize_application(application):
+    return {
+        'id': application.id,
+        'job_id': application.job_id,
+        'status': application.status,
+        'applied_date': _isoformat(application.applied_date)
+    }
+
+
+def serialize_import_report(report):
+    return {
+        'inserted': report.inserted,
+        'errors': [error._asdict() for error in report.errors]
+    }
+
+
+def import_status(report):
+    """201 when any row was stored, 422 when the body held no valid row"""
+    return 201 if report.inserted else 422
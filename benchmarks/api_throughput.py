@@ -0,0 +1,165 @@
+"""Requests per second of the Flask API against its ASGI edition.
+
+Starts each server in a subprocess against DATABASE_URL (PostgreSQL, since
+the schema uses PostgreSQL types), drives it with concurrent HTTP clients for
+a fixed time and prints throughput and latency percentiles.
+
+    python benchmarks/api_throughput.py --seed --concurrency 50 --duration 10
+
+--seed inserts sample companies, jobs, users and applications first; only
+use it on a disposable database. Requests are spread over many users,
+companies and search terms so that neither app is measured on cache hits.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+SEARCH_TERMS = ['analyst', 'engineer', 'support', 'remote', 'designer', 'writer', 'manager', 'data']
+
+SERVERS = {
+    'flask': lambda port: ([sys.executable, os.path.join('api', 'app.py')], {'FLASK_PORT': str(port)}),
+    'asgi': lambda port: ([
+        sys.executable, '-m', 'uvicorn', 'api.asgi:app', '--port', str(port), '--log-level', 'warning'
+    ], {}),
+}
+
+
+def seed(companies, jobs_per_company, users, applications_per_user):
+    """Insert sample rows through the sync engine"""
+    from sqlalchemy import insert
+    from utils.models import Company, Job, User, JobApplication, engine, init_db
+
+    init_db()
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        company_ids = conn.execute(insert(Company).returning(Company.id), [{
+            'name': f'Benchmark {i}', 'website': '', 'contact_name': '', 'contact_email': f'{i}@bench.test',
+            'contact_position': '', 'contact_phone': '', 'password': '', 'verification_status': 'pending'
+        } for i in range(companies)]).scalars().all()
+        job_ids = conn.execute(insert(Job).returning(Job.id), [{
+            'title': f'{rng.choice(SEARCH_TERMS).title()} {i}', 'company_id': company_id,
+            'location': rng.choice(['Remote', 'Berlin', 'Austin', 'Toronto']),
+            'job_type': rng.choice(['Full-time', 'Part-time', 'Contract']),
+            'accommodations': rng.sample(['Flexible Hours', 'Screen Reader', 'Remote Work'], 2),
+            'description': f'Accessible workplace, role {i} at company {company_id}', 'requirements': ''
+        } for company_id in company_ids for i in range(jobs_per_company)]).scalars().all()
+        user_ids = conn.execute(insert(User).returning(User.id), [{
+            'username': f'bench{i}', 'email': f'{i}@bench-users.test', 'password': '', 'resume_data': {}
+        } for i in range(users)]).scalars().all()
+        conn.execute(insert(JobApplication), [{
+            'user_id': user_id, 'job_id': rng.choice(job_ids), 'status': 'applied'
+        } for user_id in user_ids for _ in range(applications_per_user)])
+    return company_ids, user_ids
+
+
+def _load_ids():
+    from sqlalchemy import select
+    from utils.models import Company, User, engine
+
+    with engine.connect() as conn:
+        company_ids = conn.execute(select(Company.id)).scalars().all()
+        user_ids = conn.execute(select(User.id)).scalars().all()
+    return company_ids, user_ids
+
+
+def request_paths(company_ids, user_ids):
+    """Return a function that picks a random API path using the given rng"""
+    def pick(rng):
+        kind = rng.randrange(3)
+        if kind == 0 or not (company_ids and user_ids):
+            return f'/api/v1/jobs?q={rng.choice(SEARCH_TERMS)}&limit={rng.randint(10, 50)}'
+        if kind == 1:
+            return f'/api/v1/companies/{rng.choice(company_ids)}/jobs?limit=20'
+        return f'/api/v1/applications/{rng.choice(user_ids)}?limit=20'
+    return pick
+
+
+def start_server(name, port):
+    command, env = SERVERS[name](port)
+    process = subprocess.Popen(
+        command, cwd=ROOT, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f'http://127.0.0.1:{port}/').status_code == 200:
+                return process
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"{name} server did not start on port {port}")
+
+
+async def drive(base_url, pick_path, concurrency, duration):
+    """Run concurrent clients until duration elapses; return latencies and error count"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def worker(rng):
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(pick_path(rng))
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker(random.Random(i)) for i in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10, help="seconds per server")
+    parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['flask', 'asgi'])
+    parser.add_argument('--port', type=int, default=5101)
+    parser.add_argument('--seed', action='store_true', help="insert sample data first")
+    args = parser.parse_args()
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    company_ids, user_ids = seed(50, 40, 500, 5) if args.seed else _load_ids()
+    pick_path = request_paths(company_ids, user_ids)
+
+    print(f"{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+    for offset, name in enumerate(args.servers):
+        port = args.port + offset
+        process = start_server(name, port)
+        try:
+            # Short warm-up so both servers start with open pool connections
+            asyncio.run(drive(f'http://127.0.0.1:{port}', pick_path, args.concurrency, 1))
+            latencies, errors = asyncio.run(
+                drive(f'http://127.0.0.1:{port}', pick_path, args.concurrency, args.duration)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+        if not latencies:
+            print(f"{name:<8}{'-':>10}{'-':>10}{'-':>10}{errors:>8}")
+            continue
+        p50 = statistics.median(latencies) * 1000
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else p50
+        print(f"{name:<8}{len(latencies) / args.duration:>10.1f}{p50:>10.1f}{p95:>10.1f}{errors:>8}")
+
+
+if __name__ == '__main__':
+    main()
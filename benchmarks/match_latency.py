@@ -0,0 +1,91 @@
+"""Job match index build time and top-K query latency on a synthetic catalog.
+
+Indexes --jobs generated jobs in memory (no database), then times
+--queries profile matches and prints the median and 95th percentile.
+
+    python benchmarks/match_latency.py --jobs 100000 --queries 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+ROLES = ['Data Analyst', 'Software Engineer', 'Customer Support Specialist', 'Nurse', 'Accountant',
+         'Project Manager', 'Graphic Designer', 'Teacher', 'Sales Associate', 'Technical Writer']
+SKILLS = ['SQL', 'Python', 'Excel', 'Tableau', 'Java', 'React', 'Accessibility audits', 'Customer service',
+          'Bookkeeping', 'Scheduling', 'Figma', 'Writing', 'Patient care', 'Negotiation', 'Agile']
+CITIES = ['Austin, TX', 'Dallas, TX', 'Boston, MA', 'Denver, CO', 'Seattle, WA', 'Chicago, IL', 'Remote']
+ACCOMMODATIONS = ['Visual Impairment', 'Hearing Impairment', 'Mobility Support', 'Cognitive Support',
+                  'Remote Work', 'Flexible Hours', 'Assistive Technology', 'Sign Language']
+JOB_TYPES = ['Full-time', 'Part-time', 'Contract', 'Internship', 'Remote']
+NEEDS = ['Screen Reader Support', 'High Contrast', 'Large Text', 'Voice Navigation', 'Keyboard Navigation']
+
+IndexedJob = namedtuple(
+    'IndexedJob', ['id', 'title', 'description', 'requirements', 'location', 'job_type', 'accommodations', 'updated_at']
+)
+
+
+def sample_job(rng, job_id):
+    role = rng.choice(ROLES)
+    return IndexedJob(
+        job_id,
+        f"{rng.choice(['Junior', 'Senior', 'Lead', ''])} {role}".strip(),
+        f"Join our team as a {role}. " + ' '.join(rng.sample(SKILLS, 4)) + f" team number {job_id % 5000}",
+        'Experience with ' + ', '.join(rng.sample(SKILLS, 3)),
+        rng.choice(CITIES),
+        rng.choice(JOB_TYPES),
+        rng.sample(ACCOMMODATIONS, rng.randint(0, 4)),
+        datetime(2026, 1, 1),
+    )
+
+
+def sample_profile(rng):
+    return {
+        'desired_role': rng.choice(ROLES),
+        'skills': rng.sample(SKILLS, 5),
+        'accessibility_needs': rng.sample(NEEDS, rng.randint(0, 2)),
+        'location': rng.choice(CITIES),
+        'preferred_job_types': rng.sample(JOB_TYPES, 2),
+    }
+
+
+def main():
+    from utils.matching import JobIndex, profile_query
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100_000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    jobs = [sample_job(rng, job_id) for job_id in range(1, args.jobs + 1)]
+    index = JobIndex()
+    start = time.perf_counter()
+    index.add_jobs(jobs)
+    print(f"indexed {args.jobs} jobs in {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    index.add_jobs([sample_job(rng, args.jobs + 1)])
+    print(f"added one job in {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    timings = []
+    for _ in range(args.queries):
+        query = profile_query(sample_profile(rng))
+        start = time.perf_counter()
+        index.top(query, args.limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"top {args.limit}: median {statistics.median(timings):.2f} ms, "
+          f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
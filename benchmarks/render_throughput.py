@@ -0,0 +1,86 @@
+"""Resume renders per second inline and on the render process pool.
+
+Renders distinct resumes (so the render cache never answers) first in the
+calling thread, then through RenderService with 1, 2, 4, ... workers up to
+the number of cores, and prints throughput for each.
+
+    python benchmarks/render_throughput.py --renders 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+def sample_resume(number):
+    return {
+        'personal_info': {
+            'first_name': 'Sample', 'last_name': f'Applicant {number}', 'email': f'{number}@bench.test',
+            'phone': '555-0100', 'location': 'Remote', 'linkedin': '', 'picture': None
+        },
+        'summary': f'Benchmark resume {number}. ' + 'Experienced, accessible-first analyst. ' * 5,
+        'experiences': [{
+            'company': f'Company {i}', 'position': 'Analyst', 'start_date': date(2015 + i, 1, 1),
+            'end_date': date(2016 + i, 1, 1), 'description': 'Built reports and dashboards. ' * 4
+        } for i in range(3)],
+        'education': [{'institution': 'State University', 'degree': 'BSc', 'graduation_date': date(2014, 6, 1)}],
+        'skills': ['SQL', 'Python', 'Accessibility audits', 'Screen readers']
+    }
+
+
+def worker_counts(cores):
+    counts = [1]
+    while counts[-1] * 2 <= cores:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != cores:
+        counts.append(cores)
+    return counts
+
+
+def run_inline(resumes):
+    from utils.pdf_generator import TEMPLATES, generate_resume_pdf
+
+    start = time.perf_counter()
+    for resume in resumes:
+        generate_resume_pdf(resume, TEMPLATES['Professional'])
+    return time.perf_counter() - start
+
+
+def run_pool(resumes, workers):
+    from utils.render_service import RenderService
+
+    service = RenderService(workers=workers, queue_size=len(resumes))
+    try:
+        # Start the worker processes before timing
+        for job_id in [service.submit(resume, 'Professional', use_cache=False) for resume in resumes[:workers]]:
+            service.get_result(job_id, timeout=120)
+        start = time.perf_counter()
+        job_ids = [service.submit(resume, 'Professional', use_cache=False) for resume in resumes]
+        for job_id in job_ids:
+            service.get_result(job_id, timeout=120)
+        return time.perf_counter() - start
+    finally:
+        service.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--renders', type=int, default=200)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    resumes = [sample_resume(i) for i in range(args.renders)]
+    print(f"{'mode':<12}{'renders/s':>12}{'speedup':>10}")
+    inline = args.renders / run_inline(resumes)
+    print(f"{'inline':<12}{inline:>12.1f}{1:>10.2f}")
+    for workers in worker_counts(args.max_workers):
+        rate = args.renders / run_pool(resumes, workers)
+        print(f"{f'{workers} workers':<12}{rate:>12.1f}{rate / inline:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,18 +1,20 @@
 import streamlit as st
+from utils.auth import current_principal
 from utils.data_manager import get_user_profile_by_email, save_job_application
 import json
 
 st.set_page_config(page_title="Apply for Job", page_icon="📝")
 
 # Check if user is logged in and a job is selected
-if 'user_email' not in st.session_state or 'selected_job' not in st.session_state:
+principal = current_principal(st.session_state, 'user')
+if principal is None or 'selected_job' not in st.session_state:
     st.warning("Please select a job to apply for")
     if st.button("Browse Jobs"):
         st.switch_page("pages/Job_Search.py")
     st.stop()
 
 # Get user profile and selected job
-user_email = st.session_state.user_email
+user_email = principal.email
 user_profile = get_user_profile_by_email(user_email)
 selected_job = st.session_state.selected_job
 
@@ -24,9 +26,10 @@ st.title("Apply for Job 📝")
 
 # Display job details
 st.header("Selected Position")
-st.write(f"**Position:** {selected_job['title'] if isinstance(selected_job, dict) else selected_job.title}")
-st.write(f"**Location:** {selected_job['location'] if isinstance(selected_job, dict) else selected_job.location}")
-st.write(f"**Type:** {selected_job['job_type'] if isinstance(selected_job, dict) else selected_job.job_type}")
+st.write(f"**Position:** {selected_job['title']}")
+st.write(f"**Company:** {selected_job['company_name']}")
+st.write(f"**Location:** {selected_job['location']}")
+st.write(f"**Type:** {selected_job['job_type']}")
 
 # File uploader for resume
 uploaded_resume = st.file_uploader("Upload Your Resume", type=["pdf", "docx"])
@@ -64,7 +67,7 @@ if st.button("Submit Application"):
             application_data['resume'] = uploaded_resume.getvalue()
         
         # Save application
-        job_id = selected_job['id'] if isinstance(selected_job, dict) else selected_job.id
+        job_id = selected_job['id']
         save_job_application(application_data, job_id)
         
         st.success("""
@@ -1,5 +1,6 @@
 import streamlit as st
-from utils.data_manager import get_company_by_email
+from utils.auth import LoginBusy
+from utils.data_manager import authenticate_company
 
 st.set_page_config(page_title="Company Login", page_icon="🔒")
 
@@ -9,19 +10,15 @@ email = st.text_input("Email")
 password = st.text_input("Password", type="password")
 
 if st.button("Login"):
-    st.write(f"Email: {email}")
-    st.write(f"Password: {password}")
-    
-    company = get_company_by_email(email)
-    st.write(f"Fetched Company: {company}")
-    
-    if company:
-        st.write(f"Stored Password: {company.password}")
-        if company.password == password:
-            st.session_state.company_id = company.id
-            st.success("Login successful!")
-            st.switch_page("pages/Company_Profile.py")
-        else:
-            st.error("Invalid email or password")
+    try:
+        authenticated = authenticate_company(email, password)
+    except LoginBusy:
+        st.error("Too many sign-ins right now. Please try again in a moment.")
+        st.stop()
+
+    if authenticated:
+        st.session_state.company_token, st.session_state.company_id = authenticated
+        st.success("Login successful!")
+        st.switch_page("pages/Company_Profile.py")
     else:
-        st.error("Invalid email or password")
\ No newline at end of file
+        st.error("Invalid email or password")
@@ -1,220 +1,337 @@
 
 import streamlit as st
-from utils.data_manager import get_company_profile, update_company_profile, get_company_jobs
-from utils.data_manager import get_applications_for_company, post_new_job, send_email_to_applicant
+from utils.auth import current_principal
+from utils.data_manager import get_company_profile, update_company_profile, get_company_jobs, get_application_counts
+from utils.data_manager import rank_applications, post_new_job, send_email_to_applicant, read_resume
+from utils.data_manager import update_application_statuses, unit_of_work, APPLICATION_STATUSES
+from utils.notifications import start_worker_pool
+from utils.pool_stats import start_reporter
+from utils.job_import import JOB_TYPES, ACCOMMODATIONS, InvalidFeed, decode_feed, feed_format, validate_feed, import_jobs
+from collections import Counter
+from functools import partial
 import json
 from datetime import datetime
 
+APPLICATIONS_PER_PAGE = 20
+
+# Dashboard sort options and the rank_applications orders behind them
+APPLICATION_SORTS = {"Best match": "score", "Newest": "applied_date"}
+
 st.set_page_config(page_title="Company Profile", page_icon="🏢")
 
+# Delivers queued emails in the background (once per server process)
+start_worker_pool()
+# Logs connection pool statistics every DB_POOL_STATS_INTERVAL seconds (once per server process)
+start_reporter()
+
 st.title("Company Profile 🏢")
 
 # Check if company is logged in
-if 'company_id' not in st.session_state:
+principal = current_principal(st.session_state, 'company')
+if principal is None:
     st.warning("Please Login to access the profile")
     if st.button("Go to Login"):
         st.switch_page("pages/Company_Login.py")
     st.stop()
 
-company_id = st.session_state.company_id
-company_data = get_company_profile(company_id)
+company_id = principal.id
+# One session and transaction for the whole rerun: the reads plus any
+# post, import or status update it makes, committed together at the end
+with unit_of_work():
+    company_data = get_company_profile(company_id)
 
-if company_data:
-    # Navigation bar
-    st.sidebar.title("Company Dashboard")
-    page = st.sidebar.radio(
-        "Navigate to",
-        ["Company Information", "Posted Jobs", "Job Applications", "Post New Job"]
-    )
+    if company_data:
+        # Navigation bar
+        st.sidebar.title("Company Dashboard")
+        page = st.sidebar.radio(
+            "Navigate to",
+            ["Company Information", "Posted Jobs", "Job Applications", "Post New Job"]
+        )
     
-    if page == "Company Information":
-        # Company Information
-        st.header("Company Information")
+        if page == "Company Information":
+            # Company Information
+            st.header("Company Information")
         
-        with st.form("company_profile_form"):
-            company_name = st.text_input("Company Name", value=company_data.name, disabled=True)
-            website = st.text_input("Website", value=company_data.website)
+            with st.form("company_profile_form"):
+                company_name = st.text_input("Company Name", value=company_data.name, disabled=True)
+                website = st.text_input("Website", value=company_data.website)
             
-            # Company Description
-            description = st.text_area(
-                "Company Description",
-                value=company_data.description if hasattr(company_data, 'description') else '',
-                help="Describe your company's mission and commitment to inclusive hiring"
-            )
+                # Company Description
+                description = st.text_area(
+                    "Company Description",
+                    value=company_data.description if hasattr(company_data, 'description') else '',
+                    help="Describe your company's mission and commitment to inclusive hiring"
+                )
             
-            # Accessibility Features
-            st.subheader("Workplace Accessibility")
-            accessibility_features = st.multiselect(
-                "Select available accessibility features",
-                [
-                    "Wheelchair Accessible",
-                    "Screen Reader Compatible Systems",
-                    "Flexible Work Hours",
-                    "Remote Work Options",
-                    "Assistive Technology",
-                    "Sign Language Support",
-                    "Quiet Workspaces",
-                    "Ergonomic Equipment"
-                ],
-                default=company_data.accessibility_features if hasattr(company_data, 'accessibility_features') else []
-            )
+                # Accessibility Features
+                st.subheader("Workplace Accessibility")
+                accessibility_features = st.multiselect(
+                    "Select available accessibility features",
+                    [
+                        "Wheelchair Accessible",
+                        "Screen Reader Compatible Systems",
+                        "Flexible Work Hours",
+                        "Remote Work Options",
+                        "Assistive Technology",
+                        "Sign Language Support",
+                        "Quiet Workspaces",
+                        "Ergonomic Equipment"
+                    ],
+                    default=company_data.accessibility_features if hasattr(company_data, 'accessibility_features') else []
+                )
             
-            # Company Culture
-            st.subheader("Inclusive Workplace Culture")
-            culture_points = st.text_area(
-                "Describe your inclusive workplace culture",
-                value=company_data.culture if hasattr(company_data, 'culture') else '',
-                help="Highlight your company's commitment to diversity and inclusion"
-            )
+                # Company Culture
+                st.subheader("Inclusive Workplace Culture")
+                culture_points = st.text_area(
+                    "Describe your inclusive workplace culture",
+                    value=company_data.culture if hasattr(company_data, 'culture') else '',
+                    help="Highlight your company's commitment to diversity and inclusion"
+                )
             
-            if st.form_submit_button("Update Profile"):
-                updated_data = {
-                    'website': website,
-                    'description': description,
-                    'accessibility_features': accessibility_features,
-                    'culture': culture_points
-                }
-                update_company_profile(company_id, updated_data)
-                st.success("Company profile updated successfully!")
+                if st.form_submit_button("Update Profile"):
+                    updated_data = {
+                        'website': website,
+                        'description': description,
+                        'accessibility_features': accessibility_features,
+                        'culture': culture_points
+                    }
+                    update_company_profile(company_id, updated_data)
+                    st.success("Company profile updated successfully!")
     
-    elif page == "Posted Jobs":
-        # Posted Jobs
-        st.header("Posted Jobs")
-        jobs = get_company_jobs(company_id)
+        elif page == "Posted Jobs":
+            # Posted Jobs
+            st.header("Posted Jobs")
+            jobs = get_company_jobs(company_id)
+            application_counts = get_application_counts(company_id)
         
-        if jobs:
-            for job in jobs:
-                with st.expander(f"{job.title} - {job.job_type}"):
-                    st.write(f"Location: {job.location}")
-                    st.write(f"Posted: {job.posted_date.strftime('%B %d, %Y')}")
-                    st.write("Accommodations:", ", ".join(job.accommodations) if job.accommodations else "None")
-                    st.write("Description:", job.description)
+            if jobs:
+                for job in jobs:
+                    job_counts = application_counts.get(job.id, {})
+                    with st.expander(f"{job.title} - {job.job_type} ({sum(job_counts.values())} applications)"):
+                        if job_counts:
+                            st.write("Applications:", ", ".join(
+                                f"{count} {status}" for status, count in sorted(job_counts.items())
+                            ))
+                        st.write(f"Location: {job.location}")
+                        st.write(f"Posted: {job.posted_date.strftime('%B %d, %Y')}")
+                        st.write("Accommodations:", ", ".join(job.accommodations) if job.accommodations else "None")
+                        st.write("Description:", job.description)
                     
                     
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        if st.button("Edit Job", key=f"edit_{job.id}"):
-                            st.session_state.job_to_edit = job
-                            st.rerun()
-                    with col2:
-                        if st.button("View Applications", key=f"apps_{job.id}"):
-                            st.session_state.selected_job_id = job.id
-                            st.rerun()
-        else:
-            st.info("No jobs posted yet.")
+                        col1, col2 = st.columns(2)
+                        with col1:
+                            if st.button("Edit Job", key=f"edit_{job.id}"):
+                                st.session_state.job_to_edit = job
+                                st.rerun()
+                        with col2:
+                            if st.button("View Applications", key=f"apps_{job.id}"):
+                                st.session_state.selected_job_id = job.id
+                                st.rerun()
+            else:
+                st.info("No jobs posted yet.")
     
-    elif page == "Job Applications":
-        # Job Applications
-        st.header("Job Applications")
-        applications = get_applications_for_company(company_id)
+        elif page == "Job Applications":
+            # Job Applications
+            st.header("Job Applications")
+            # Headline numbers come from the counters table, without loading applications
+            application_counts = get_application_counts(company_id)
+            status_totals = Counter()
+            for job_counts in application_counts.values():
+                status_totals.update(job_counts)
+            metric_columns = st.columns(len(APPLICATION_STATUSES) + 2)
+            metric_columns[0].metric("Total", sum(status_totals.values()))
+            for column, status in zip(metric_columns[1:], ["applied"] + APPLICATION_STATUSES):
+                column.metric(status.capitalize(), status_totals.get(status, 0))
+
+            # Details are loaded for the chosen job only, unless all jobs are asked for
+            job_titles = {job.id: job.title for job in get_company_jobs(company_id)}
+            job_options = [job_id for job_id in job_titles if job_id in application_counts] + [None]
+            selected_job_id = st.session_state.get('selected_job_id')
+            selected_job_id = st.selectbox(
+                "Job",
+                job_options,
+                index=job_options.index(selected_job_id) if selected_job_id in job_options else 0,
+                format_func=lambda job_id: "All jobs" if job_id is None else
+                f"{job_titles[job_id]} ({sum(application_counts[job_id].values())} applications)"
+            )
+            sort_label = st.radio("Sort by", list(APPLICATION_SORTS), horizontal=True)
+            required_skills = st.text_input(
+                "Required skills", help="Comma-separated; only applicants listing every one of them are shown"
+            )
+            skills = tuple(sorted({skill.strip() for skill in required_skills.split(',') if skill.strip()}))
+            # Scored against each job's requirements; scores are cached per application
+            applications = rank_applications(
+                company_id, job_id=selected_job_id, sort=APPLICATION_SORTS[sort_label], skills=skills
+            )
         
-        if applications:
-            for app in applications:
-                with st.expander(f"{app['user_name']} - {app['job_title']} - {app['applied_date'].strftime('%B %d, %Y')}"):
-                    # Display applicant information
-                    st.subheader("Applicant Information")
-                    st.write(f"Name: {app['user_name']}")
-                    st.write(f"Email: {app['user_email']}")
-                    st.write(f"Status: {app['status'].capitalize()}")
+            if applications:
+                # Bulk actions
+                st.subheader("Bulk Actions")
+                labels = {
+                    app['application_id']: f"{app['user_name']} - {app['job_title']} ({app['status']})"
+                    for app in applications
+                }
+                with st.form("bulk_status_form"):
+                    select_all = st.checkbox(f"Select all {len(applications)} applications shown")
+                    selected_ids = st.multiselect(
+                        "Applications",
+                        options=list(labels),
+                        format_func=labels.get
+                    )
+                    bulk_status = st.selectbox("New status", options=APPLICATION_STATUSES)
+                    bulk_message = st.text_area("Message to applicants (optional)")
+                    if st.form_submit_button("Update Selected"):
+                        application_ids = list(labels) if select_all else selected_ids
+                        if not application_ids:
+                            st.error("Select at least one application")
+                        else:
+                            try:
+                                notices = update_application_statuses(
+                                    company_id, application_ids, bulk_status, {'message': bulk_message}
+                                )
+                                st.success(f"Updated {len(notices)} applications to {bulk_status}; applicants will be emailed.")
+                            except Exception as e:
+                                st.error(f"Error updating applications: {str(e)}")
+
+                # One page of applicants at a time
+                st.subheader("Applicants")
+                page_count = -(-len(applications) // APPLICATIONS_PER_PAGE)
+                application_page = st.number_input("Page", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+                start = (application_page - 1) * APPLICATIONS_PER_PAGE
+                page_applications = applications[start:start + APPLICATIONS_PER_PAGE]
+                st.caption(f"Showing {start + 1}-{start + len(page_applications)} of {len(applications)} applications")
+
+                for app in page_applications:
+                    with st.expander(
+                        f"{app['user_name']} - {app['job_title']} - {app['score']:.0%} match - "
+                        f"{app['applied_date'].strftime('%B %d, %Y')}"
+                    ):
+                        # Display applicant information
+                        st.subheader("Applicant Information")
+                        st.write(f"Name: {app['user_name']}")
+                        st.write(f"Email: {app['user_email']}")
+                        st.write(f"Status: {app['status'].capitalize()}")
+                        st.write(
+                            f"Match: skills {app['skills_score']:.0%}, experience {app['experience_score']:.0%}, "
+                            f"education {app['education_score']:.0%}"
+                        )
                     
-                    # Display resume
-                    st.subheader("Resume")
-                    if app['user_resume']:
-                        resume = app['user_resume']
-                        if 'first_name' in resume and 'last_name' in resume:
-                            st.write(f"Full Name: {resume.get('first_name', '')} {resume.get('last_name', '')}")
-                        if 'summary' in resume:
-                            st.write("Summary:", resume.get('summary', ''))
-                        if 'skills' in resume:
-                            st.write("Skills:", ", ".join(resume.get('skills', [])))
-                        if 'experience' in resume:
-                            st.subheader("Experience")
-                            for exp in resume.get('experience', []):
-                                st.write(f"{exp.get('title', '')} at {exp.get('company', '')}")
-                                st.write(f"{exp.get('start_date', '')} - {exp.get('end_date', '')}")
-                                st.write(exp.get('description', ''))
-                        if 'education' in resume:
-                            st.subheader("Education")
-                            for edu in resume.get('education', []):
-                                st.write(f"{edu.get('degree', '')} from {edu.get('institution', '')}")
-                                st.write(f"{edu.get('start_date', '')} - {edu.get('end_date', '')}")
-                    else:
-                        st.warning("No resume data available")
+                        # Display resume
+                        st.subheader("Resume")
+                        if app['user_resume']:
+                            resume = app['user_resume']
+                            if 'first_name' in resume and 'last_name' in resume:
+                                st.write(f"Full Name: {resume.get('first_name', '')} {resume.get('last_name', '')}")
+                            if 'summary' in resume:
+                                st.write("Summary:", resume.get('summary', ''))
+                            if 'skills' in resume:
+                                st.write("Skills:", ", ".join(resume.get('skills', [])))
+                            if 'experience' in resume:
+                                st.subheader("Experience")
+                                for exp in resume.get('experience', []):
+                                    st.write(f"{exp.get('title', '')} at {exp.get('company', '')}")
+                                    st.write(f"{exp.get('start_date', '')} - {exp.get('end_date', '')}")
+                                    st.write(exp.get('description', ''))
+                            if 'education' in resume:
+                                st.subheader("Education")
+                                for edu in resume.get('education', []):
+                                    st.write(f"{edu.get('degree', '')} from {edu.get('institution', '')}")
+                                    st.write(f"{edu.get('start_date', '')} - {edu.get('end_date', '')}")
+                        else:
+                            st.warning("No resume data available")
+                        if app['resume_key']:
+                            st.download_button(
+                                label="Download Uploaded Resume",
+                                data=partial(read_resume, app['resume_key']),
+                                file_name=f"{app['user_name']}_resume.pdf",
+                                mime="application/pdf",
+                                key=f"download_resume_{app['application_id']}"
+                            )
                     
-                    # Email applicant
-                    st.subheader("Contact Applicant")
-                    with st.form(key=f"email_form_{app['application_id']}"):
-                        email_subject = st.text_input("Subject", value=f"Regarding your application for {app['job_title']}")
-                        email_body = st.text_area("Message")
-                        status_options = ["reviewing", "interview", "selected", "rejected"]
-                        new_status = st.selectbox("Update Status", options=status_options, index=0)
+                        # Email applicant
+                        st.subheader("Contact Applicant")
+                        with st.form(key=f"email_form_{app['application_id']}"):
+                            email_subject = st.text_input("Subject", value=f"Regarding your application for {app['job_title']}")
+                            email_body = st.text_area("Message")
+                            new_status = st.selectbox("Update Status", options=APPLICATION_STATUSES, index=0)
                         
-                        if st.form_submit_button("Send Email"):
-                            email_data = {
-                                'subject': email_subject,
-                                'message': email_body,
-                                'status': new_status
-                            }
-                            if send_email_to_applicant(app['application_id'], email_data):
-                                st.success("Email sent successfully!")
-                            else:
-                                st.error("Failed to send email")
-        else:
-            st.info("No applications received yet.")
+                            if st.form_submit_button("Send Email"):
+                                email_data = {
+                                    'subject': email_subject,
+                                    'message': email_body,
+                                    'status': new_status
+                                }
+                                if send_email_to_applicant(app['application_id'], email_data):
+                                    st.success("Email queued for delivery!")
+                                else:
+                                    st.error("Failed to send email")
+            else:
+                st.info("No applications received yet.")
     
-    elif page == "Post New Job":
-        # Post New Job
-        st.header("Post a New Job")
+        elif page == "Post New Job":
+            # Post New Job
+            st.header("Post a New Job")
         
-        with st.form("post_job_form"):
-            job_title = st.text_input("Job Title")
-            job_description = st.text_area("Job Description")
-            job_requirements = st.text_area("Job Requirements")
+            with st.form("post_job_form"):
+                job_title = st.text_input("Job Title")
+                job_description = st.text_area("Job Description")
+                job_requirements = st.text_area("Job Requirements")
             
-            col1, col2 = st.columns(2)
-            with col1:
-                job_type = st.selectbox(
-                    "Job Type",
-                    ["Full-time", "Part-time", "Contract", "Internship", "Remote"]
-                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    job_type = st.selectbox("Job Type", JOB_TYPES)
             
-            with col2:
-                job_location = st.text_input("Location")
+                with col2:
+                    job_location = st.text_input("Location")
             
-            # Accommodations
-            st.subheader("Available Accommodations")
-            accommodations = st.multiselect(
-                "Select all accommodations available for this position",
-                [
-                    "Visual Impairment",
-                    "Hearing Impairment",
-                    "Mobility Support",
-                    "Cognitive Support",
-                    "Remote Work",
-                    "Flexible Hours",
-                    "Assistive Technology",
-                    "Sign Language"
-                ]
-            )
+                # Accommodations
+                st.subheader("Available Accommodations")
+                accommodations = st.multiselect(
+                    "Select all accommodations available for this position",
+                    ACCOMMODATIONS
+                )
             
-            if st.form_submit_button("Post Job"):
-                if not job_title or not job_description or not job_requirements:
-                    st.error("Please fill in all required fields")
+                if st.form_submit_button("Post Job"):
+                    if not job_title or not job_description or not job_requirements:
+                        st.error("Please fill in all required fields")
+                    else:
+                        job_data = {
+                            'title': job_title,
+                            'company_id': company_id,
+                            'description': job_description,
+                            'requirements': job_requirements,
+                            'job_type': job_type,
+                            'location': job_location,
+                            'accommodations': accommodations
+                        }
+                        try:
+                            post_new_job(job_data)
+                            st.success("Job posted successfully!")
+                        except Exception as e:
+                            st.error(f"Error posting job: {str(e)}")
+
+            # Bulk upload
+            st.subheader("Bulk Upload")
+            st.write(
+                "Upload a CSV with the columns title, location, job_type, description, requirements "
+                "and accommodations (separated by ';'), or a JSON Lines file with the same keys."
+            )
+            feed = st.file_uploader("Job feed", type=['csv', 'jsonl'])
+            if feed is not None:
+                try:
+                    jobs, errors = validate_feed(decode_feed(feed.getvalue()), feed_format(feed.name))
+                except InvalidFeed as e:
+                    st.error(str(e))
                 else:
-                    job_data = {
-                        'title': job_title,
-                        'company_id': company_id,
-                        'description': job_description,
-                        'requirements': job_requirements,
-                        'job_type': job_type,
-                        'location': job_location,
-                        'accommodations': accommodations
-                    }
-                    try:
-                        post_new_job(job_data)
-                        st.success("Job posted successfully!")
-                    except Exception as e:
-                        st.error(f"Error posting job: {str(e)}")
+                    st.write(f"{len(jobs)} valid jobs, {len(errors)} rows with errors")
+                    if errors:
+                        st.dataframe([error._asdict() for error in errors])
+                    if jobs and st.button(f"Import {len(jobs)} jobs"):
+                        try:
+                            report = import_jobs(company_id, jobs, errors)
+                            st.success(f"Imported {report.inserted} jobs!")
+                        except Exception as e:
+                            st.error(f"Error importing jobs: {str(e)}")
 
-else:
-    st.error("Error loading company profile data. Please try again later.")
+    else:
+        st.error("Error loading company profile data. Please try again later.")
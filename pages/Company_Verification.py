@@ -1,8 +1,15 @@
 import streamlit as st
 from utils.data_manager import save_company_verification
+from utils.notifications import start_worker_pool
+from utils.pool_stats import start_reporter
 
 st.set_page_config(page_title="Company Verification", page_icon="✓")
 
+# Delivers queued emails in the background (once per server process)
+start_worker_pool()
+# Logs connection pool statistics every DB_POOL_STATS_INTERVAL seconds (once per server process)
+start_reporter()
+
 st.title("Company Verification ✓")
 
 st.markdown("""
@@ -92,18 +99,9 @@ if submitted:
             "password": password
         }
         
+        # Also queues the confirmation email, delivered by the notification workers
         save_company_verification(verification_data)
-        
-        # Send verification email
-        subject = "Company Verification Request Received"
-        message = f"""
-        Dear {company_name},
-
-        Thank you for submitting your company verification request. Our team will review your application and contact you within 5 business days.
 
-        Best regards,
-        The Able Connect Team
-        """
         st.success("Verification request submitted successfully. Our team will contact you soon.")
         st.info("You can now log in with your company email and password once your account is approved.")
 
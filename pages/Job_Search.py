@@ -1,18 +1,23 @@
 import streamlit as st
-from utils.data_manager import get_user_profile_by_email, load_jobs
+from utils.auth import current_principal
+from utils.data_manager import get_user_profile_by_email, recommend_jobs, search_jobs
+
+JOBS_PER_PAGE = 20
+RECOMMENDED_JOBS = 5
 
 st.set_page_config(page_title="Job Search", page_icon="🔍")
 
 st.title("Job Search 🔍")
 
-# Check if user is logged in (email stored in session state)
-if 'user_email' not in st.session_state:
+# Check if user is logged in (signed token stored in session state)
+principal = current_principal(st.session_state, 'user')
+if principal is None:
     st.warning("Please log in to search for jobs")
     if st.button("Go to Login"):
         st.switch_page("pages/Login.py")
     st.stop()
 
-user_email = st.session_state.user_email
+user_email = principal.email
 user_profile = get_user_profile_by_email(user_email)
 
 if user_profile:
@@ -20,32 +25,69 @@ if user_profile:
     
     # Job Search Filters
     st.sidebar.header("Filter Jobs")
+    keywords = st.sidebar.text_input(
+        "Keywords",
+        help="Search job titles, descriptions and requirements"
+    )
     job_type = st.sidebar.multiselect(
         "Job Type",
         ["Full-time", "Part-time", "Remote", "Hybrid", "On-site"],
         default=user_profile.get('preferred_job_types', [])
     )
     location = st.sidebar.text_input("Location", value=user_profile.get('location', ''))
-    
-    # Load jobs from database
-    jobs = load_jobs()
-    
-    # Filter jobs based on user input
-    if job_type:
-        jobs = [job for job in jobs if job.job_type in job_type]
-    if location:
-        jobs = [job for job in jobs if location.lower() in job.location.lower()]
+    accommodations = st.sidebar.multiselect(
+        "Accommodations",
+        [
+            "Visual Impairment",
+            "Hearing Impairment",
+            "Mobility Support",
+            "Cognitive Support",
+            "Remote Work",
+            "Flexible Hours",
+            "Assistive Technology",
+            "Sign Language"
+        ]
+    )
+
+    # Best matches for the profile's desired role, skills, needs and location
+    recommended = recommend_jobs(user_profile, limit=RECOMMENDED_JOBS)
+    if recommended:
+        st.subheader("Recommended for you")
+        for job in recommended:
+            with st.expander(f"{job.title} at {job.company_name} ({job.match_score:.0%} match)"):
+                st.write(f"Location: {job.location}")
+                st.write(f"Job Type: {job.job_type}")
+                st.write(f"Accommodations: {', '.join(job.accommodations or [])}")
+                st.write(f"Description: {job.description}")
+                if st.button("Apply", key=f"apply_recommended_{job.id}"):
+                    st.session_state.selected_job = job._asdict()
+                    st.switch_page("pages/Apply_Job.py")
+        st.subheader("All jobs")
+
+    # Filtering and ranking happen in the database
+    if 'job_search_limit' not in st.session_state:
+        st.session_state.job_search_limit = JOBS_PER_PAGE
+    jobs = search_jobs(
+        query=keywords,
+        job_types=job_type,
+        location=location,
+        accommodations=accommodations,
+        limit=st.session_state.job_search_limit
+    )
     
     # Display jobs
     if jobs:
         for job in jobs:
-            with st.expander(f"{job.title} at {job.company.name}"):
+            with st.expander(f"{job.title} at {job.company_name}"):
                 st.write(f"Location: {job.location}")
                 st.write(f"Job Type: {job.job_type}")
                 st.write(f"Description: {job.description}")
                 if st.button("Apply", key=f"apply_{job.id}"):
-                    st.session_state.selected_job = job
+                    st.session_state.selected_job = job._asdict()
                     st.switch_page("pages/Apply_Job.py")
+        if len(jobs) >= st.session_state.job_search_limit and st.button("Show more jobs"):
+            st.session_state.job_search_limit += JOBS_PER_PAGE
+            st.rerun()
     else:
         st.info("No jobs found matching your criteria.")
 else:
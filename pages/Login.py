@@ -1,17 +1,19 @@
 import streamlit as st
-from utils.data_manager import get_user_profile
+from utils.auth import LoginBusy, current_principal
+from utils.data_manager import authenticate_user
 
 st.set_page_config(page_title="Login", page_icon="🔑")
 
 st.title("Login 🔑")
 
 # Check if user is already logged in
-if 'user_email' in st.session_state:
-    st.success(f"You are already logged in as {st.session_state.user_email}")
+principal = current_principal(st.session_state, 'user')
+if principal:
+    st.success(f"You are already logged in as {principal.email}")
     if st.button("Go to Your Profile"):
-        st.experimental_set_query_params(page="user_profile", user_email=st.session_state.user_email)
+        st.experimental_set_query_params(page="user_profile", user_email=principal.email)
     if st.button("Logout"):
-        del st.session_state['user_email']
+        del st.session_state['user_token']
         st.experimental_set_query_params(page="home")
     st.stop()
 
@@ -34,10 +36,14 @@ with st.form("login_form"):
             st.error("Please enter a valid email address")
         else:
             # Check if user exists and password matches
-            user_profile = get_user_profile(email, password)
-            if user_profile is not None:
+            try:
+                authenticated = authenticate_user(email, password)
+            except LoginBusy:
+                st.error("Too many sign-ins right now. Please try again in a moment.")
+                st.stop()
+            if authenticated is not None:
                 # Set session state
-                st.session_state['user_email'] = email
+                st.session_state['user_token'] = authenticated[0]
                 st.success("Login successful! Redirecting to your profile...")
                 st.switch_page("pages/User_Profile.py")
             else:
@@ -1,5 +1,7 @@
 import streamlit as st
-from utils.pdf_generator import generate_resume_pdf, get_template_1, get_template_2
+from utils.pdf_generator import TEMPLATES
+from utils.photo import InvalidPhoto
+from utils.render_service import RenderQueueFull, RenderTimeout, cancel_render, get_result, submit_render
 
 st.set_page_config(page_title="Resume Builder", page_icon="📝")
 
@@ -72,7 +74,7 @@ with st.form("resume_form"):
     st.header("Choose Template")
     template = st.selectbox(
         "Resume Template",
-        ["Professional", "Modern"],
+        list(TEMPLATES),
         key="template"
     )
 
@@ -96,15 +98,29 @@ if submitted:
         "skills": [skill.strip() for skill in skills.split("\n") if skill.strip()]
     }
 
-    # Generate PDF
-    template_func = get_template_1 if template == "Professional" else get_template_2
-    pdf_file = generate_resume_pdf(resume_data, template_func)
-    
-    # Offer download
-    st.success("Resume generated successfully!")
-    st.download_button(
-        label="Download Resume PDF",
-        data=pdf_file,
-        file_name="resume.pdf",
-        mime="application/pdf"
-    )
\ No newline at end of file
+    # Render in the worker pool (an unchanged resume is served from the render cache)
+    pdf_file = None
+    try:
+        job_id = submit_render(resume_data, template)
+        with st.spinner("Generating your resume..."):
+            pdf_file = get_result(job_id)
+    except RenderQueueFull:
+        st.warning("Many resumes are being generated right now. Please try again in a few seconds.")
+    except RenderTimeout:
+        # Frees the queue slot now unless the render already started
+        cancel_render(job_id)
+        st.error("Generating your resume took too long. Please try again.")
+    except InvalidPhoto as e:
+        st.error(f"Please upload a different picture. {str(e)}")
+    except Exception as e:
+        st.error(f"Error generating your resume: {str(e)}")
+
+    if pdf_file is not None:
+        # Offer download
+        st.success("Resume generated successfully!")
+        st.download_button(
+            label="Download Resume PDF",
+            data=pdf_file,
+            file_name="resume.pdf",
+            mime="application/pdf"
+        )
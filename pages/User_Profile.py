@@ -1,20 +1,28 @@
 import streamlit as st
-from utils.data_manager import get_user_profile_by_email, update_user_profile, get_job_applications
+from utils.auth import current_principal
+from utils.data_manager import get_user_profile_by_email, update_user_profile, get_job_applications, read_resume
+from utils.data_manager import unit_of_work
+from functools import partial
 import json
 
 st.set_page_config(page_title="User Profile", page_icon="👤")
 
 st.title("User Profile 👤")
 
-# Check if user is logged in (email stored in session state)
-if 'user_email' not in st.session_state:
+# Check if user is logged in (signed token stored in session state)
+principal = current_principal(st.session_state, 'user')
+if principal is None:
     st.warning("Please log in to view your profile")
     if st.button("Go to Login"):
         st.experimental_set_query_params(page="login")
     st.stop()
 
-user_email = st.session_state.user_email
-user_data = get_user_profile_by_email(user_email)
+user_email = principal.email
+# Read the profile and the application list from one snapshot; from the
+# primary right after either changed, e.g. just after applying to a job
+with unit_of_work(read_only=True, tags=['applications', f'user:{user_email}']):
+    user_data = get_user_profile_by_email(user_email)
+    applications = get_job_applications(user_email) if user_data else []
 
 if user_data:
     # Profile Information
@@ -49,6 +57,12 @@ if user_data:
         )
         
         desired_role = st.text_input("Desired Role", value=user_data.get('desired_role', ''))
+        listed_skills = user_data.get('skills') or []
+        skills = st.text_input(
+            "Skills",
+            value=listed_skills if isinstance(listed_skills, str) else ", ".join(listed_skills),
+            help="Comma-separated, e.g. SQL, Customer service"
+        )
         
         if st.form_submit_button("Update Profile"):
             updated_data = {
@@ -59,27 +73,31 @@ if user_data:
                 'location': location,
                 'accessibility_needs': accessibility_needs,
                 'preferred_job_types': preferred_job_types,
-                'desired_role': desired_role
+                'desired_role': desired_role,
+                'skills': [skill.strip() for skill in skills.split(',') if skill.strip()]
             }
-            update_user_profile(email, updated_data)
+            # Only the changed fields are written; the rest of the profile is kept
+            changes = {key: value for key, value in updated_data.items() if user_data.get(key) != value}
+            if changes:
+                update_user_profile(email, changes)
             st.success("Profile updated successfully!")
 
     # Job Applications
     st.header("Your Job Applications")
-    applications = get_job_applications(user_email)
     
     if applications:
         for idx, app in enumerate(applications):
-            with st.expander(f"{app.job.title} at {app.job.company.name}"):
+            with st.expander(f"{app.job_title} at {app.company_name}"):
                 st.write(f"Status: {app.status}")
                 st.write(f"Applied: {app.applied_date.strftime('%B %d, %Y')}")
-                st.write(f"Location: {app.job.location}")
-                st.write(f"Job Type: {app.job.job_type}")
-                if app.resume:
+                st.write(f"Location: {app.job_location}")
+                st.write(f"Job Type: {app.job_type}")
+                if app.resume_key:
+                    # The file is read from the blob store only when clicked
                     st.download_button(
                         label="Download Resume",
-                        data=app.resume,
-                        file_name=f"{app.job.title}_resume.pdf",
+                        data=partial(read_resume, app.resume_key),
+                        file_name=f"{app.job_title}_resume.pdf",
                         mime="application/pdf",
                         key=f"download_resume_{idx}"
                     )
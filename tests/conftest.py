@@ -0,0 +1,4 @@
+import os
+
+# The apps under test start no background threads that poll the database
+os.environ.setdefault('NOTIFICATION_WORKERS', '0')
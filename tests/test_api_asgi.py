@@ -0,0 +1,29 @@
+import pytest
+from starlette.testclient import TestClient
+
+from api.asgi import app
+from utils.async_db import async_database_url
+
+
+def test_asgi_health_check_returns_200_and_status():
+    client = TestClient(app)
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+
+
+def test_asgi_invalid_cursor_is_rejected_before_touching_the_database():
+    client = TestClient(app)
+    response = client.get("/api/v1/jobs?cursor=not-a-cursor")
+
+    assert response.status_code == 400
+    assert "error" in response.json()
+
+
+def test_async_database_url_switches_to_asyncio_drivers():
+    assert async_database_url("postgresql://u:p@db/app").drivername == "postgresql+asyncpg"
+    assert async_database_url("postgresql+psycopg2://u:p@db/app").drivername == "postgresql+asyncpg"
+    assert async_database_url("sqlite:///jobs.db").drivername == "sqlite+aiosqlite"
+    with pytest.raises(ValueError):
+        async_database_url("mysql://u:p@db/app")
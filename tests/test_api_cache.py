@@ -0,0 +1,42 @@
+import pytest
+from cachelib import SimpleCache
+from werkzeug.datastructures import MultiDict
+
+from api.app import app, _response_cache_key
+from api.serializers import normalized_query
+from utils import cache, shared_cache
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+def test_normalized_query_ignores_order_unknown_and_empty_params():
+    params = ["q", "job_type", "limit"]
+    first = MultiDict([("job_type", "Part-time"), ("q", "data"), ("job_type", "Full-time"), ("_", "1")])
+    second = MultiDict([("q", "data"), ("job_type", "Full-time"), ("limit", ""), ("job_type", "Part-time")])
+
+    assert normalized_query(first, params) == normalized_query(second, params)
+    assert normalized_query(first, params) == "job_type=Full-time&job_type=Part-time&q=data"
+
+
+def test_single_value_params_keep_the_value_the_view_reads():
+    args = MultiDict([("limit", "5"), ("limit", "10")])
+    assert normalized_query(args, ["limit"]) == "limit=5"
+
+
+def test_response_cache_key_changes_when_its_tag_is_invalidated():
+    make_key = _response_cache_key(["location"], ["jobs"])
+    with app.test_request_context("/api/v1/jobs?location=Remote"):
+        before = make_key()
+        assert make_key() == before
+        cache.on_invalidate(shared_cache.invalidate_tags)
+        cache.invalidate("jobs")
+        assert make_key() != before
+
+
+def test_evicted_tag_version_never_matches_an_old_key():
+    version = shared_cache.tag_version("jobs")
+    shared_cache.get_shared_cache().clear()
+    assert shared_cache.tag_version("jobs") != version
@@ -0,0 +1,141 @@
+import threading
+
+import pytest
+from itsdangerous import URLSafeTimedSerializer
+from starlette.testclient import TestClient
+from werkzeug.security import generate_password_hash
+
+from api.app import app
+from api.serializers import application_params
+from api.asgi import app as asgi_app
+from utils import auth
+from utils.auth import Forbidden, InvalidToken, LoginBusy, PasswordHasher, Principal
+
+
+@pytest.fixture
+def hasher():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+    yield hasher
+    hasher.shutdown()
+
+
+def bearer(principal):
+    return {"Authorization": f"Bearer {auth.issue_token(principal)}"}
+
+
+def test_token_round_trips_and_is_checked_for_role():
+    token = auth.issue_token(Principal(7, "company", "hr@acme.test"))
+
+    assert auth.verify_token(token) == Principal(7, "company", "hr@acme.test")
+    assert auth.verify_token(token, "company").id == 7
+    with pytest.raises(InvalidToken):
+        auth.verify_token(token, "user")
+
+
+def test_tampered_foreign_and_expired_tokens_are_rejected(monkeypatch):
+    token = auth.issue_token(Principal(1, "user", "jo@example.test"))
+    forged = URLSafeTimedSerializer("another key", salt="auth-token").dumps([2, "user", "jo@example.test"])
+
+    for bad in (None, "", token[:-2] + "xx", forged):
+        with pytest.raises(InvalidToken):
+            auth.verify_token(bad)
+    monkeypatch.setenv("AUTH_TOKEN_TTL", "-1")
+    with pytest.raises(InvalidToken, match="expired"):
+        auth.verify_token(token)
+
+
+def test_authorize_reads_bearer_header_and_checks_the_subject():
+    header = bearer(Principal(3, "user", "jo@example.test"))["Authorization"]
+
+    assert auth.authorize(header, "user", 3).id == 3
+    with pytest.raises(Forbidden):
+        auth.authorize(header, "user", 4)
+    with pytest.raises(Forbidden):
+        auth.authorize(header, "company")
+    with pytest.raises(InvalidToken):
+        auth.authorize("Basic abc", "user")
+
+
+def test_current_principal_is_none_without_a_valid_token():
+    state = {"user_token": auth.issue_token(Principal(3, "user", "jo@example.test"))}
+
+    assert auth.current_principal(state, "user").email == "jo@example.test"
+    assert auth.current_principal(state, "company") is None
+    assert auth.current_principal({}, "user") is None
+
+
+def test_user_and_company_sign_ins_keep_separate_tokens():
+    state = {
+        "user_token": auth.issue_token(Principal(3, "user", "jo@example.test")),
+        "company_token": auth.issue_token(Principal(7, "company", "hr@acme.test")),
+    }
+
+    assert auth.current_principal(state, "user").id == 3
+    assert auth.current_principal(state, "company").id == 7
+
+
+def test_password_pool_verifies_off_thread_and_applies_backpressure(hasher):
+    stored = generate_password_hash("secret")
+    release = threading.Event()
+    blocked = hasher.submit(release.wait)
+    # The only slot is taken until the first check finishes
+    with pytest.raises(LoginBusy):
+        hasher.verify(stored, "secret")
+    release.set()
+    blocked.result(5)
+
+    assert hasher.verify(stored, "secret").result(5) is True
+    assert hasher.verify(stored, "wrong").result(5) is False
+    # Unknown accounts are rejected after the same amount of hashing
+    assert hasher.verify(None, "secret").result(5) is False
+
+
+def test_flask_routes_require_a_token_for_the_right_subject():
+    client = app.test_client()
+
+    response = client.get("/api/v1/applications/3")
+    assert response.status_code == 401
+    assert response.headers["WWW-Authenticate"] == "Bearer"
+
+    company = bearer(Principal(3, "company", "hr@acme.test"))
+    assert client.get("/api/v1/applications/3", headers=company).status_code == 403
+    other_user = bearer(Principal(4, "user", "al@example.test"))
+    assert client.get("/api/v1/applications/3", headers=other_user).status_code == 403
+    response = client.post("/api/v1/companies/9/applications:updateStatus", headers=company, json={})
+    assert response.status_code == 403
+
+
+def test_asgi_routes_require_a_token_for_the_right_subject():
+    client = TestClient(asgi_app)
+
+    assert client.get("/api/v1/companies/3/applications").status_code == 401
+    user = bearer(Principal(3, "user", "jo@example.test"))
+    assert client.get("/api/v1/companies/3/applications", headers=user).status_code == 403
+    assert client.post("/api/v1/applications", headers=user, json={"user_id": 4, "job_id": 1}).status_code == 403
+
+
+def test_token_request_is_validated_before_touching_the_database():
+    client = app.test_client()
+
+    response = client.post("/api/v1/auth:token", json={"email": "jo@example.test", "role": "admin"})
+    assert response.status_code == 400
+    response = TestClient(asgi_app).post("/api/v1/auth:token", json={"email": "jo@example.test"})
+    assert response.status_code == 400
+
+
+def test_application_body_is_validated_before_touching_the_database():
+    user = bearer(Principal(5, "user", "jo@example.test"))
+    raw_json = {**user, "Content-Type": "application/json"}
+
+    for client in (app.test_client(), TestClient(asgi_app)):
+        assert client.post("/api/v1/applications", headers=raw_json, data="not json").status_code == 400
+        assert client.post("/api/v1/applications", headers=user, json={"user_id": 5}).status_code == 400
+        assert client.post("/api/v1/applications", headers=user, json={"job_id": "one"}).status_code == 400
+        assert client.post("/api/v1/applications", headers=user, json={"user_id": "6", "job_id": 1}).status_code == 403
+
+
+def test_application_ids_may_be_sent_as_numeric_strings():
+    assert application_params({"job_id": "3", "user_id": "5"}) == (3, 5)
+    assert application_params({"job_id": 3}) == (3, None)
+    with pytest.raises(ValueError):
+        application_params({"job_id": True})
@@ -0,0 +1,28 @@
+import io
+
+import pytest
+
+from utils.blob_store import BlobNotFound, LocalBlobStore
+
+
+def test_identical_uploads_are_stored_once(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    first = store.put(b"%PDF resume")
+    second = store.put(io.BytesIO(b"%PDF resume"))
+
+    assert first == second
+    assert store.get(first) == b"%PDF resume"
+    stored = [p for p in tmp_path.rglob("*") if p.is_file()]
+    assert [p.name for p in stored] == [first]
+
+
+def test_missing_blob_raises_blob_not_found(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    with pytest.raises(BlobNotFound):
+        store.open("0" * 64)
+
+
+def test_keys_cannot_escape_the_store_directory(tmp_path):
+    store = LocalBlobStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.open("../../etc/passwd")
@@ -0,0 +1,90 @@
+from utils import cache
+
+
+def setup_function():
+    cache.clear()
+
+
+def test_cached_reads_are_served_from_memory_until_invalidated():
+    calls = []
+
+    @cache.cached(60, tags=lambda email: [f"user:{email}"])
+    def load_profile(email):
+        calls.append(email)
+        return {"email": email}
+
+    assert load_profile("a@example.test") == {"email": "a@example.test"}
+    load_profile("a@example.test")
+    load_profile("b@example.test")
+    assert calls == ["a@example.test", "b@example.test"]
+
+    cache.invalidate("user:a@example.test")
+    load_profile("a@example.test")
+    load_profile("b@example.test")
+    assert calls == ["a@example.test", "b@example.test", "a@example.test"]
+
+
+def test_list_arguments_are_part_of_the_key():
+    calls = []
+
+    @cache.cached(60, tags=lambda *args, **kwargs: ["jobs"])
+    def search(job_types=None):
+        calls.append(job_types)
+        return list(job_types or [])
+
+    search(job_types=["Remote"])
+    search(job_types=["Remote"])
+    search(job_types=["Hybrid"])
+    assert calls == [["Remote"], ["Hybrid"]]
+
+
+def test_none_results_are_not_cached():
+    calls = []
+
+    @cache.cached(60, tags=lambda company_id: [f"company:{company_id}"])
+    def load_company(company_id):
+        calls.append(company_id)
+        return None
+
+    load_company(1)
+    load_company(1)
+    assert calls == [1, 1]
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    cache.store("key", "value", ttl=30, tags=["jobs"])
+
+    assert cache.lookup("key") == "value"
+    now[0] += 31
+    assert cache.lookup("key") is None
+
+
+def test_entries_written_under_older_tag_versions_are_not_served(monkeypatch):
+    versions = {"jobs": "1"}
+    monkeypatch.setattr(cache, "_version_source", lambda tags: [versions[tag] for tag in tags])
+    calls = []
+
+    @cache.cached(60, tags=lambda: ["jobs"])
+    def load_jobs():
+        calls.append(1)
+        return ["job"]
+
+    load_jobs()
+    load_jobs()
+    # Another process invalidated "jobs"
+    versions["jobs"] = "2"
+    load_jobs()
+    assert len(calls) == 2
+
+
+def test_hits_return_copies_of_the_cached_value(monkeypatch):
+    monkeypatch.setattr(cache, "_version_source", None)
+
+    @cache.cached(60, tags=lambda email: [f"user:{email}"])
+    def load_profile(email):
+        return {"email": email, "skills": ["SQL"]}
+
+    load_profile("a@example.test")["skills"].append("Go")
+    assert load_profile("a@example.test") == {"email": "a@example.test", "skills": ["SQL"]}
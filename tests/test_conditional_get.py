@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from api.serializers import entity_tag, is_not_modified, validator_headers
+
+LAST_MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 250000)
+
+
+def test_matching_etag_is_not_modified():
+    etag = entity_tag("/api/v1/jobs", "limit=20", LAST_MODIFIED)
+    headers = validator_headers(etag, LAST_MODIFIED)
+
+    assert headers["ETag"] == f'W/"{etag}"'
+    assert is_not_modified({"If-None-Match": headers["ETag"]}, etag, LAST_MODIFIED)
+    assert is_not_modified({"If-None-Match": f'"other", "{etag}"'}, etag, LAST_MODIFIED)
+    assert not is_not_modified({"If-None-Match": '"other"'}, etag, LAST_MODIFIED)
+
+
+def test_etag_depends_on_query_and_last_modified():
+    etag = entity_tag("/api/v1/jobs", "limit=20", LAST_MODIFIED)
+    assert entity_tag("/api/v1/jobs", "limit=50", LAST_MODIFIED) != etag
+    assert entity_tag("/api/v1/jobs", "limit=20", LAST_MODIFIED.replace(second=16)) != etag
+
+
+def test_if_modified_since_compares_whole_seconds():
+    etag = entity_tag("/api/v1/companies", "", LAST_MODIFIED)
+    last_modified_header = validator_headers(etag, LAST_MODIFIED)["Last-Modified"]
+
+    assert last_modified_header == "Wed, 01 May 2024 12:30:15 GMT"
+    assert is_not_modified({"If-Modified-Since": last_modified_header}, etag, LAST_MODIFIED)
+    assert not is_not_modified({"If-Modified-Since": "Wed, 01 May 2024 12:30:14 GMT"}, etag, LAST_MODIFIED)
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    etag = entity_tag("/api/v1/companies", "", LAST_MODIFIED)
+    headers = {"If-None-Match": '"stale"', "If-Modified-Since": "Wed, 01 May 2024 12:30:15 GMT"}
+    assert not is_not_modified(headers, etag, LAST_MODIFIED)
+
+
+def test_collection_etags_change_with_the_table_version():
+    etag = entity_tag("/api/v1/jobs", "", LAST_MODIFIED, "v1")
+    assert entity_tag("/api/v1/jobs", "", LAST_MODIFIED, "v2") != etag
+    # A row committed late with an older updated_at still changes the version
+    headers = {"If-None-Match": f'W/"{etag}"'}
+    assert not is_not_modified(headers, entity_tag("/api/v1/jobs", "", LAST_MODIFIED, "v2"), None)
+
+
+def test_if_modified_since_is_ignored_without_last_modified():
+    etag = entity_tag("/api/v1/jobs", "", LAST_MODIFIED, "v1")
+    headers = {"If-Modified-Since": "Wed, 01 May 2024 12:30:15 GMT"}
+    assert is_not_modified(headers, etag, LAST_MODIFIED)
+    assert not is_not_modified(headers, etag, None)
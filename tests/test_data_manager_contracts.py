@@ -1,5 +1,7 @@
 import inspect
 
+import pytest
+
 from utils import data_manager
 
 
@@ -16,3 +18,120 @@ def test_get_applications_for_company_signature_uses_company_id():
 def test_send_email_to_applicant_contract():
     signature = inspect.signature(data_manager.send_email_to_applicant)
     assert list(signature.parameters.keys()) == ["application_id", "email_data"]
+
+
+def test_search_jobs_signature():
+    signature = inspect.signature(data_manager.search_jobs)
+    assert list(signature.parameters.keys()) == [
+        "query", "job_types", "location", "accommodations", "limit", "offset", "after"
+    ]
+
+
+def test_job_search_query_uses_indexed_search_document():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex
+    from utils.models import Job
+
+    session = data_manager.get_db_session()
+    try:
+        query, sort_key = data_manager._job_search_query(session, query="data analyst")
+        sql = str(query.statement.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        ))
+    finally:
+        session.close()
+
+    index = next(ix for ix in Job.__table__.indexes if ix.name == "ix_jobs_search_document")
+    index_sql = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    document = index_sql[index_sql.index("gin (") + len("gin ("):-1]
+
+    assert document.replace("coalesce(", "coalesce(jobs.") in sql
+    assert "@@ websearch_to_tsquery" in sql
+    assert len(sort_key) == 3
+
+
+def test_job_summary_columns_match_read_model_fields():
+    from utils.read_models import JobSummary
+
+    labels = [column.key for column in data_manager.JOB_SUMMARY_COLUMNS]
+    assert labels + ["search_rank", "match_score"] == list(JobSummary._fields)
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        return []
+
+
+def test_bulk_status_update_is_one_company_scoped_update():
+    from sqlalchemy.dialects import postgresql
+
+    session = _RecordingSession()
+    data_manager.set_application_statuses(session, 7, [3, 1, 3, 2], "rejected")
+
+    assert len(session.statements) == 1
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    assert "UPDATE job_applications SET status='rejected' FROM" in sql
+    assert "job_applications.id IN (1, 2, 3)" in sql
+    # The previous statuses, for the application counters, come from rows locked in id order
+    assert "ORDER BY job_applications.id FOR UPDATE" in sql
+    assert "jobs.company_id = 7" in sql
+    assert "RETURNING" in sql
+
+
+def test_bulk_status_update_rejects_unknown_statuses_and_skips_empty_batches():
+    session = _RecordingSession()
+    with pytest.raises(ValueError):
+        data_manager.set_application_statuses(session, 7, [1], "hired!")
+    assert data_manager.set_application_statuses(session, 7, [], "rejected") == []
+    assert session.statements == []
+
+
+def test_application_counters_are_one_upsert_in_key_order():
+    from sqlalchemy.dialects import postgresql
+
+    session = _RecordingSession()
+    data_manager.count_applications(session, {(2, "rejected"): 1, (1, "applied"): 1, (2, "applied"): -1, (3, "x"): 0})
+
+    assert len(session.statements) == 1
+    statement = session.statements[0]
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("INSERT INTO job_application_counts")
+    assert "ON CONFLICT (job_id, status) DO UPDATE SET count = (job_application_counts.count + excluded.count)" in sql
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert [(params[f"job_id_m{i}"], params[f"status_m{i}"], params[f"count_m{i}"]) for i in range(3)] == [
+        (1, "applied", 1), (2, "applied", -1), (2, "rejected", 1)
+    ]
+
+    data_manager.count_applications(session, {(1, "applied"): 0})
+    assert len(session.statements) == 1
+
+
+def test_profile_update_merges_only_the_given_fields_in_sql(monkeypatch):
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import postgresql
+
+    class Session(_RecordingSession):
+        def execute(self, statement):
+            super().execute(statement)
+            return SimpleNamespace(rowcount=1)
+
+    session = Session()
+    invalidated = []
+    monkeypatch.setattr(data_manager, "get_db_session", lambda: session)
+    monkeypatch.setattr(data_manager, "commit_session", lambda session: None)
+    monkeypatch.setattr(data_manager, "release_session", lambda session: None)
+    monkeypatch.setattr(data_manager, "invalidate_cache", lambda *tags: invalidated.extend(tags))
+
+    data_manager.update_user_profile("jo@example.test", {"skills": ["SQL"]})
+    data_manager.update_user_profile("jo@example.test", {"first_name": "Jo"})
+
+    skills_sql, name_sql = (str(statement.compile(dialect=postgresql.dialect())) for statement in session.statements)
+    assert "SET profile=(coalesce(users.profile, %(param_1)s::JSONB) || %(profile_data)s::JSONB)" in skills_sql
+    assert "name=" not in skills_sql
+    assert "name=trim(concat(" in name_sql
+    assert session.statements[0].compile().params["profile_data"] == {"skills": ["SQL"]}
+    assert invalidated == ["user:jo@example.test", "applications"] * 2
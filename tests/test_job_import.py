@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from utils.job_import import InvalidFeed, feed_format, main, validate_body, validate_feed
+
+CSV_FEED = """title,location,job_type,description,requirements,accommodations
+Data Analyst,Remote,Full-time,Analyse data,SQL,Remote Work;Flexible Hours
+,Berlin,Contract,"Multi
+line",Python,
+Designer,Austin,Freelance,Design things,Figma,Telepathy
+"""
+
+
+def test_csv_rows_are_validated_and_errors_carry_line_numbers():
+    jobs, errors = validate_feed(CSV_FEED, "csv")
+
+    assert jobs == [{
+        "title": "Data Analyst", "location": "Remote", "job_type": "Full-time",
+        "description": "Analyse data", "requirements": "SQL",
+        "accommodations": ["Remote Work", "Flexible Hours"]
+    }]
+    # The quoted newline makes the second data row end on line 4
+    assert [(error.row, error.field) for error in errors] == [
+        (4, "title"), (5, "job_type"), (5, "accommodations")
+    ]
+
+
+def test_csv_without_required_columns_is_rejected_as_a_whole():
+    with pytest.raises(InvalidFeed):
+        validate_feed("title,location\nAnalyst,Remote\n", "csv")
+
+
+def test_jsonl_reports_bad_lines_and_keeps_good_ones():
+    lines = [
+        json.dumps({"title": "Writer", "description": "Write", "requirements": "Prose",
+                    "accommodations": ["Sign Language"]}),
+        "",
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"title": "T" * 201, "description": "d", "requirements": "r"}),
+    ]
+    jobs, errors = validate_feed("\n".join(lines), "jsonl")
+
+    assert [job["title"] for job in jobs] == ["Writer"]
+    assert jobs[0]["job_type"] == "Full-time"
+    assert [(error.row, error.field) for error in errors] == [(3, None), (4, None), (5, "title")]
+
+
+def test_request_bodies_accept_json_lists_wrapped_lists_and_csv():
+    job = {"title": "Engineer", "description": "Build", "requirements": "Code"}
+
+    assert len(validate_body(json.dumps([job]).encode())[0]) == 1
+    assert len(validate_body(json.dumps({"jobs": [job, {}]}).encode())[0]) == 1
+    assert len(validate_body(CSV_FEED.encode("utf-8-sig"), "text/csv")[0]) == 1
+    with pytest.raises(InvalidFeed):
+        validate_body(b'{"title": "Engineer"}')
+
+
+def test_feed_format_comes_from_extension_or_media_type():
+    assert feed_format("jobs.CSV") == "csv"
+    assert feed_format("jobs.jsonl") == "jsonl"
+    assert feed_format(content_type="application/x-ndjson") == "jsonl"
+    assert feed_format("jobs.txt") is None
+
+
+def test_cli_dry_run_validates_without_storing(tmp_path, capsys):
+    feed = tmp_path / "jobs.csv"
+    feed.write_text(CSV_FEED)
+
+    assert main(["--company-id", "1", "--dry-run", str(feed)]) == 1
+    captured = capsys.readouterr()
+    assert "1 valid jobs, 3 errors" in captured.out
+    assert "row 4: title: Required" in captured.err
@@ -0,0 +1,124 @@
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+from utils.matching import JobIndex, MatchQuery, accommodation_mask, profile_query, tokenize
+
+IndexedJob = namedtuple(
+    "IndexedJob",
+    ["id", "title", "description", "requirements", "location", "job_type", "accommodations", "updated_at"],
+)
+
+
+def job(job_id, title, location="Austin, TX", job_type="Full-time", accommodations=(), description="",
+        requirements="", updated_at=datetime(2026, 1, 1)):
+    return IndexedJob(job_id, title, description, requirements, location, job_type, list(accommodations), updated_at)
+
+
+def index(*jobs):
+    built = JobIndex()
+    built.add_jobs(jobs)
+    return built
+
+
+def test_tokenize_drops_stop_words_and_keeps_languages():
+    assert tokenize("The C++ and C# developer, for our team") == ["c++", "c#", "developer", "team"]
+
+
+def test_profile_query_maps_needs_to_accommodations():
+    query = profile_query({
+        "desired_role": "Data Analyst",
+        "skills": ["SQL"],
+        "accessibility_needs": ["Screen Reader Support"],
+        "location": "Austin, TX",
+        "preferred_job_types": ["Remote"],
+    })
+
+    assert query.terms == {"data": 2, "analyst": 2, "sql": 1}
+    assert query.needs == accommodation_mask(["Visual Impairment", "Assistive Technology"])
+    assert query.job_types == ["Remote"]
+
+
+def test_text_match_ranks_role_and_skills():
+    jobs = index(
+        job(1, "Data Analyst", requirements="SQL and dashboards"),
+        job(2, "Warehouse Associate", description="Lifting and inventory"),
+        job(3, "Senior Data Engineer", requirements="Python, SQL"),
+    )
+
+    matches = jobs.top(MatchQuery({"data": 2, "analyst": 2, "sql": 1}, 0, "", []), limit=10)
+
+    assert [match.job_id for match in matches] == [1, 3]
+    assert 0 < matches[1].score < matches[0].score < 1
+
+
+def test_text_scores_do_not_depend_on_the_best_match_in_the_catalog():
+    query = MatchQuery({"analyst": 1}, 0, "", [])
+    alone = index(job(1, "Analyst", description="Reports")).top(query)
+    # Same IDF, since both catalogs have one analyst in two jobs
+    with_exact = index(job(1, "Analyst", description="Reports"), job(2, "Nurse")).top(query)
+
+    assert alone[0].score == with_exact[0].score < 1
+    assert index(job(1, "Analyst")).top(query)[0].score == 1.0
+
+
+def test_scores_stay_within_zero_and_one():
+    jobs = index(job(1, "Data Analyst", location="Austin, TX", accommodations=["Visual Impairment"]))
+    query = MatchQuery({"data": 1, "analyst": 1}, accommodation_mask(["Visual Impairment"]), "Austin, TX",
+                       ["Full-time"])
+
+    assert jobs.scores(query).max() <= 1
+    assert jobs.top(query)[0].score == pytest.approx(1)
+
+
+def test_idf_counts_only_live_rows():
+    jobs = index(job(1, "Analyst"), job(2, "Analyst"), job(3, "Nurse"))
+    fresh = index(job(1, "Analyst"), job(2, "Nurse Analyst"), job(3, "Nurse"))
+    # Job 2's replaced version stays in the postings for analyst
+    jobs.add_jobs([job(2, "Nurse Analyst", updated_at=datetime(2026, 2, 1))])
+    query = MatchQuery({"analyst": 1, "nurse": 1}, 0, "", [])
+
+    assert jobs.top(query) == fresh.top(query)
+
+
+def test_zero_limit_returns_nothing():
+    jobs = index(job(1, "Analyst"), job(2, "Analyst"))
+
+    assert jobs.top(MatchQuery({"analyst": 1}, 0, "", []), limit=0) == []
+
+
+def test_accommodations_location_and_job_type_are_scored():
+    jobs = index(
+        job(1, "Clerk", location="Austin, TX", accommodations=["Visual Impairment"]),
+        job(2, "Clerk", location="Dallas, TX", job_type="Part-time"),
+        job(3, "Clerk", location="Anywhere (Remote)"),
+        job(4, "Clerk", location="Boston, MA", job_type="Part-time"),
+    )
+    query = MatchQuery({}, accommodation_mask(["Visual Impairment"]), "austin,tx", ["Full-time"])
+
+    scores = dict(jobs.top(query, limit=10))
+
+    assert scores[1] == 1.0
+    # Same place, remote and same region score 1, 1 and 0.5 on location
+    assert scores[3] > scores[2] > 0
+    assert 4 not in scores
+
+
+def test_top_k_and_incremental_updates():
+    jobs = index(*[job(job_id, "Analyst") for job_id in range(1, 101)])
+    query = MatchQuery({"analyst": 1}, 0, "", [])
+
+    # Equal scores list newer jobs first
+    assert [match.job_id for match in jobs.top(query, limit=3)] == [100, 99, 98]
+
+    # Re-adding an unchanged job is a no-op; an updated one replaces it
+    jobs.add_jobs([job(5, "Analyst"), job(6, "Nurse", updated_at=datetime(2026, 2, 1))])
+    assert len(jobs) == 100
+    assert jobs.synced_through == datetime(2026, 2, 1)
+    assert 6 not in [match.job_id for match in jobs.top(query, limit=100)]
+    assert [match.job_id for match in jobs.top(MatchQuery({"nurse": 1}, 0, "", []))] == [6]
+
+
+def test_empty_profile_matches_nothing():
+    assert index(job(1, "Analyst")).top(MatchQuery({}, 0, "", [])) == []
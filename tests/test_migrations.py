@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from utils import migrations
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+def test_legacy_accommodations_json_is_parsed_into_tags():
+    assert migrations._parse_legacy_accommodations('["Remote Work", "Sign Language"]') == [
+        "Remote Work", "Sign Language"
+    ]
+
+
+def test_malformed_legacy_accommodations_become_empty_tags():
+    assert migrations._parse_legacy_accommodations("not json") == []
+    assert migrations._parse_legacy_accommodations('{"a": 1}') == []
+
+
+def test_accommodation_tags_index_uses_gin():
+    from sqlalchemy.dialects import postgresql
+    from sqlalchemy.schema import CreateIndex
+    from utils.models import Job
+
+    index = migrations._model_index(Job, "ix_jobs_accommodation_tags")
+    ddl = str(CreateIndex(index).compile(dialect=postgresql.dialect()))
+    assert ddl == "CREATE INDEX ix_jobs_accommodation_tags ON jobs USING gin (accommodation_tags)"
+
+
+def test_only_plaintext_company_passwords_are_hashed():
+    from werkzeug.security import generate_password_hash
+
+    assert migrations._is_password_hash(generate_password_hash("secret"))
+    assert migrations._is_password_hash(generate_password_hash("secret", method="pbkdf2"))
+    assert not migrations._is_password_hash("secret")
+
+
+def test_legacy_profile_json_is_parsed_into_a_dict():
+    assert migrations._parse_legacy_profile('{"skills": ["SQL"], "location": "Austin, TX"}') == {
+        "skills": ["SQL"], "location": "Austin, TX"
+    }
+    assert migrations._parse_legacy_profile("not json") == {}
+    assert migrations._parse_legacy_profile('["SQL"]') == {}
+    assert migrations._parse_legacy_profile(None) == {}
+
+
+def test_resume_blobs_are_only_moved_once_they_read_back(tmp_path):
+    from utils.blob_store import BlobNotFound, LocalBlobStore
+
+    class LostBlobStore(LocalBlobStore):
+        def open(self, key):
+            raise BlobNotFound(key)
+
+    assert migrations._stored_blob_key(LocalBlobStore(str(tmp_path)), b"resume") is not None
+    assert migrations._stored_blob_key(LostBlobStore(str(tmp_path)), b"resume") is None
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_applied_migrations_are_recorded_and_skipped(monkeypatch):
+    from sqlalchemy import create_engine, text
+
+    calls = []
+    monkeypatch.setattr(migrations, "MIGRATIONS", [
+        ("0001_once", lambda conn: calls.append("once")),
+        ("0002_unfinished", lambda conn: calls.append("unfinished") or False),
+    ])
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+
+        migrations.run_migrations(engine)
+        migrations.run_migrations(engine)
+        assert calls == ["once", "unfinished", "unfinished"]
+        migrations.run_migrations(engine, rerun=["0001_once"])
+        assert calls[-2:] == ["once", "unfinished"]
+        with engine.connect() as conn:
+            assert migrations.applied_migrations(conn) == {"0001_once"}
+        with pytest.raises(ValueError):
+            migrations.run_migrations(engine, rerun=["0010_missing"])
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+        engine.dispose()
+
+
+def test_keyset_date_columns_are_never_null():
+    from utils.models import Job, JobApplication
+
+    for column in (Job.__table__.c.posted_date, JobApplication.__table__.c.applied_date):
+        assert not column.nullable and column.server_default is not None
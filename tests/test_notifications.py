@@ -0,0 +1,110 @@
+import random
+import socketserver
+import threading
+from datetime import timedelta
+
+import pytest
+
+from utils import notifications
+from utils.notifications import Notification, SmtpTransport
+from utils.read_models import ApplicationNotice
+
+
+class _SmtpSink(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages, standing in for a mail server"""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline().decode().strip()
+            command = line.split(" ", 1)[0].upper()
+            if not line or command == "QUIT":
+                self.reply("221 bye")
+                return
+            if command == "DATA":
+                self.reply("354 end with .")
+                lines = []
+                for data in iter(self.rfile.readline, b".\r\n"):
+                    lines.append(data.decode())
+                message = "".join(lines)
+                if "reject@" in message:
+                    self.reply("550 mailbox unavailable")
+                else:
+                    self.server.received.append(message)
+                    self.reply("250 queued")
+            else:
+                self.reply("250 ok")
+
+
+@pytest.fixture
+def smtp_sink():
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpSink)
+    server.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_smtp_transport_sends_a_batch_and_reports_each_failure(smtp_sink):
+    transport = SmtpTransport("127.0.0.1", smtp_sink.server_address[1], sender="jobs@test")
+    errors = transport.send_batch([
+        Notification("a@test", "First", "Hello"),
+        Notification("reject@test", "Second", "Hello"),
+        Notification("b@test", "Third", "Hello"),
+    ])
+
+    assert errors[0] is None and errors[2] is None
+    assert "mailbox unavailable" in errors[1]
+    assert len(smtp_sink.received) == 2
+    assert "Subject: First" in smtp_sink.received[0]
+
+
+def test_smtp_transport_fails_the_whole_batch_when_the_server_is_down():
+    with socketserver.TCPServer(("127.0.0.1", 0), _SmtpSink) as closed:
+        port = closed.server_address[1]
+    errors = SmtpTransport("127.0.0.1", port, timeout=1).send_batch([Notification("a@test", "s", "b")] * 2)
+    assert len(errors) == 2 and all(errors)
+
+
+def test_retry_delay_doubles_up_to_the_cap_with_jitter():
+    rng = random.Random(0)
+    for attempts in range(1, 12):
+        ceiling = min(notifications.BACKOFF_BASE * 2 ** (attempts - 1), notifications.BACKOFF_MAX)
+        assert ceiling / 2 <= notifications.retry_delay(attempts, rng) <= ceiling
+    assert notifications.retry_delay(20, rng) <= timedelta(hours=1)
+
+
+class _RecordingSession:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, rows):
+        self.executed.append(rows)
+
+
+def test_enqueue_writes_one_insert_and_skips_applicants_without_email():
+    notices = [
+        ApplicationNotice(1, 7, "Analyst", "Ada", "ada@test", "rejected"),
+        ApplicationNotice(2, 7, "Analyst", None, None, "rejected"),
+    ]
+    session = _RecordingSession()
+    count = notifications.enqueue(session, [
+        notifications.application_status_notification(notice) for notice in notices
+    ])
+
+    assert count == 1
+    assert len(session.executed) == 1
+    assert session.executed[0][0]["recipient"] == "ada@test"
+    assert "rejected" in session.executed[0][0]["body"]
+
+
+def test_unknown_transport_is_rejected(monkeypatch):
+    monkeypatch.setattr(notifications, "_transport", None)
+    monkeypatch.setenv("NOTIFICATION_TRANSPORT", "pigeon")
+    with pytest.raises(ValueError):
+        notifications.get_transport()
@@ -0,0 +1,136 @@
+"""Outbox delivery against a real database: claiming, leases, backoff and SKIP LOCKED.
+
+These tests need a disposable PostgreSQL database named by TEST_DATABASE_URL;
+the notification_outbox table there is dropped and recreated.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select, text, update
+
+from utils import models, notifications
+from utils.models import OutboxMessage
+from utils.notifications import MemoryTransport, Notification, WorkerPool
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+outbox = OutboxMessage.__table__
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(TEST_DATABASE_URL)
+    outbox.drop(engine, checkfirst=True)
+    outbox.create(engine)
+    models.Session.configure(bind=engine)
+    yield engine
+    models.Session.configure(bind=None)
+    outbox.drop(engine)
+    engine.dispose()
+
+
+def queue(engine, *recipients, available_at=None):
+    with engine.begin() as conn:
+        conn.execute(insert(outbox), [
+            {'recipient': recipient, 'subject': 'Hello', 'body': 'Hi',
+             'available_at': available_at or datetime.utcnow() - timedelta(seconds=1)}
+            for recipient in recipients
+        ])
+
+
+def messages(engine):
+    with engine.connect() as conn:
+        return {row.recipient: row for row in conn.execute(select(outbox))}
+
+
+class FailingTransport(notifications.Transport):
+    def send_batch(self, messages):
+        return ["mailbox unavailable"] * len(messages)
+
+
+class LockCheckingTransport(MemoryTransport):
+    """Checks from another connection that no claimed row is locked while sending"""
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    def send_batch(self, messages):
+        with self.engine.begin() as conn:
+            conn.execute(text("SET LOCAL lock_timeout = '100ms'"))
+            conn.execute(select(outbox.c.id).with_for_update(nowait=True))
+        return super().send_batch(messages)
+
+
+def test_due_messages_are_sent_without_holding_their_locks(engine):
+    queue(engine, 'a@test', 'b@test')
+    queue(engine, 'later@test', available_at=datetime.utcnow() + timedelta(hours=1))
+    transport = LockCheckingTransport(engine)
+
+    assert notifications.deliver_due(transport=transport) == 2
+    assert sorted(message.recipient for message in transport.sent) == ['a@test', 'b@test']
+    rows = messages(engine)
+    assert rows['a@test'].status == 'sent' and rows['a@test'].attempts == 1 and rows['a@test'].sent_at
+    assert rows['later@test'].status == 'pending' and rows['later@test'].attempts == 0
+    assert notifications.deliver_due(transport=transport) == 0
+
+
+def test_failures_back_off_until_the_last_attempt(engine):
+    queue(engine, 'a@test', 'b@test')
+    with engine.begin() as conn:
+        conn.execute(update(outbox).where(outbox.c.recipient == 'b@test').values(
+            attempts=notifications.MAX_ATTEMPTS - 1
+        ))
+
+    assert notifications.deliver_due(transport=FailingTransport()) == 2
+    rows = messages(engine)
+    assert rows['a@test'].status == 'pending' and rows['a@test'].attempts == 1
+    assert rows['a@test'].available_at > datetime.utcnow() + notifications.BACKOFF_BASE / 3
+    assert rows['a@test'].last_error == "mailbox unavailable"
+    assert rows['b@test'].status == 'failed'
+
+
+def test_claims_skip_locked_and_leased_messages(engine):
+    queue(engine, 'a@test', 'b@test')
+    with engine.connect() as other:
+        with other.begin():
+            # Another worker is in the middle of claiming a@test
+            other.execute(select(outbox).where(outbox.c.recipient == 'a@test').with_for_update())
+            claimed = notifications.lease_due()
+        assert [message.recipient for message in claimed] == ['b@test']
+    # b@test is leased, so only a@test is left to claim
+    assert [message.recipient for message in notifications.lease_due()] == ['a@test']
+    assert notifications.lease_due() == []
+
+
+def test_an_outcome_is_not_recorded_after_the_lease_passed_to_another_worker(engine):
+    queue(engine, 'a@test')
+    first = notifications.lease_due(lease=timedelta(0))
+    second = notifications.lease_due()
+
+    notifications.record_outcomes(first, ["too slow"])
+    assert messages(engine)['a@test'].attempts == 0
+    notifications.record_outcomes(second, [None])
+    assert messages(engine)['a@test'].status == 'sent'
+
+
+def test_worker_pool_drains_the_outbox(engine):
+    queue(engine, *[f'user{number}@test' for number in range(25)])
+    transport = MemoryTransport()
+    pool = WorkerPool(workers=3, batch_size=4, poll_interval=0.05, transport=transport).start()
+    try:
+        deadline = time.monotonic() + 10
+        while len(transport.sent) < 25 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        pool.stop(5)
+
+    assert sorted(message.recipient for message in transport.sent) == sorted(
+        f'user{number}@test' for number in range(25)
+    )
+    assert {row.status for row in messages(engine).values()} == {'sent'}
+    assert isinstance(transport.sent[0], Notification)
@@ -0,0 +1,36 @@
+from datetime import datetime
+
+import pytest
+
+from utils.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_slice
+
+
+def test_cursor_round_trips_sort_key_values():
+    sort_key = [0.25, datetime(2024, 3, 1, 12, 30, 5, 123456), 42]
+    assert decode_cursor(encode_cursor(sort_key)) == sort_key
+
+
+def test_cursor_is_url_safe():
+    token = encode_cursor([datetime(2024, 1, 1), 7])
+    assert all(ch.isalnum() or ch in "-_" for ch in token)
+
+
+def test_garbage_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_jobs_endpoint_rejects_invalid_cursor():
+    from api.app import app
+
+    response = app.test_client().get("/api/v1/jobs?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+def test_keyset_slice_continues_after_the_cursor():
+    rows = [[0.9, 5], [0.9, 3], [0.5, 4], [0.1, 1]]
+
+    assert keyset_slice(rows, list, None, 2) == rows[:3]
+    assert keyset_slice(rows, list, decode_cursor(encode_cursor([0.9, 3])), 2) == rows[2:]
+    with pytest.raises(InvalidCursor):
+        keyset_slice(rows, list, [3], 2)
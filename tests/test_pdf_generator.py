@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+from cachelib import SimpleCache
+
+from utils import pdf_generator, shared_cache
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+def resume(**overrides):
+    data = {
+        "personal_info": {
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@test", "phone": "555",
+            "location": "London", "linkedin": "", "picture": None
+        },
+        "summary": "Analyst",
+        "experiences": [{
+            "company": "Engines", "position": "Programmer", "start_date": date(1842, 1, 1),
+            "end_date": date(1843, 1, 1), "description": "Notes on the engine"
+        }],
+        "education": [{"institution": "Home", "degree": "Mathematics", "graduation_date": date(1835, 1, 1)}],
+        "skills": ["Mathematics"]
+    }
+    data.update(overrides)
+    return data
+
+
+def test_styles_are_built_once_per_process():
+    assert pdf_generator.get_styles() is pdf_generator.get_styles()
+    assert "CustomHeading" in pdf_generator.get_styles()
+
+
+def test_unchanged_resume_is_served_from_the_render_cache(monkeypatch):
+    calls = []
+    template = pdf_generator.TEMPLATES["Professional"]
+    monkeypatch.setitem(pdf_generator.TEMPLATES, "Professional", lambda *args: calls.append(1) or template(*args))
+
+    first = pdf_generator.render_resume(resume(), "Professional")
+    # Surrounding whitespace does not change the PDF, so it does not change the key either
+    second = pdf_generator.render_resume(resume(summary="  Analyst "), "Professional")
+
+    assert first.startswith(b"%PDF")
+    assert second == first
+    assert len(calls) == 1
+
+
+def test_fingerprint_depends_on_content_template_and_picture():
+    base = pdf_generator.resume_fingerprint(resume(), "Professional")
+
+    assert pdf_generator.resume_fingerprint(resume(summary="Engineer"), "Professional") != base
+    assert pdf_generator.resume_fingerprint(resume(), "Modern") != base
+    with_picture = resume()
+    with_picture["personal_info"] = dict(with_picture["personal_info"], picture=b"\x89PNG")
+    assert pdf_generator.resume_fingerprint(with_picture, "Professional") != base
+
+
+def test_unknown_template_is_rejected():
+    with pytest.raises(ValueError):
+        pdf_generator.render_resume(resume(), "Baroque")
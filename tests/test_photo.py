@@ -0,0 +1,54 @@
+from io import BytesIO
+
+import pytest
+from cachelib import SimpleCache
+from PIL import Image
+
+from utils import photo, shared_cache
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+def encode(image, fmt, **params):
+    output = BytesIO()
+    image.save(output, fmt, **params)
+    return output.getvalue()
+
+
+def test_large_photo_is_downsampled_rotated_and_stripped():
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise to display
+    exif[0x010F] = "PhoneMaker"
+    upload = encode(Image.new("RGB", (3000, 2000), "teal"), "JPEG", quality=95, exif=exif)
+
+    normalized = Image.open(BytesIO(photo.normalize_photo(upload)))
+
+    assert normalized.format == "JPEG"
+    assert normalized.size == (photo.PHOTO_PIXELS, photo.PHOTO_PIXELS)
+    assert not normalized.getexif()
+    assert len(photo.normalize_photo(upload)) < len(upload)
+
+
+def test_transparent_png_is_flattened_onto_white():
+    upload = encode(Image.new("RGBA", (400, 400), (0, 0, 0, 0)), "PNG")
+
+    normalized = Image.open(BytesIO(photo.normalize_photo(upload)))
+
+    assert normalized.mode == "RGB"
+    assert min(normalized.getpixel((150, 150))) > 245
+
+
+def test_result_is_cached_by_content_hash(monkeypatch):
+    upload = encode(Image.new("RGB", (800, 600), "navy"), "PNG")
+    first = photo.normalize_photo(upload)
+    monkeypatch.setattr(photo, "_process", lambda data: pytest.fail("photo processed twice"))
+
+    assert photo.normalize_photo(upload) == first
+
+
+def test_unreadable_upload_is_rejected():
+    with pytest.raises(photo.InvalidPhoto):
+        photo.normalize_photo(b"not an image")
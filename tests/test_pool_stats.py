@@ -0,0 +1,103 @@
+import logging
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from starlette.testclient import TestClient
+
+from api.app import app
+from api.asgi import app as asgi_app
+from utils import pool_stats
+from utils.models import POOL_OPTIONS
+from utils.pool_stats import InstrumentedQueuePool, PoolStats
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_stats, "_engines", {})
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=1,
+        pool_timeout=0.05
+    )
+    yield engine
+    engine.dispose()
+
+
+def report(name):
+    return next(pool for pool in pool_stats.pool_report() if pool["name"] == name)
+
+
+def test_checkouts_in_use_and_overflow_are_counted(engine):
+    pool_stats.instrument(engine, "test", max_overflow=1)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("SELECT 1"))
+        second.execute(text("SELECT 1"))
+        busy = report("test")
+    idle = report("test")
+
+    assert (busy["size"], busy["max_overflow"], busy["in_use"], busy["overflow"]) == (1, 1, 2, 1)
+    assert (idle["in_use"], idle["idle"], idle["peak_in_use"], idle["peak_overflow"]) == (0, 1, 2, 1)
+    assert idle["checkouts"] == 2 and idle["connects"] == 2
+    assert idle["checkout_wait_ms"]["samples"] == 2
+    assert idle["checkout_wait_ms"]["p50"] <= idle["checkout_wait_ms"]["max"]
+
+
+def test_pool_timeouts_are_counted_and_logged(engine, caplog):
+    pool_stats.instrument(engine, "test")
+
+    with engine.connect(), engine.connect():
+        with caplog.at_level(logging.ERROR, logger=pool_stats.__name__), pytest.raises(PoolTimeout):
+            engine.connect()
+
+    assert report("test")["timeouts"] == 1
+    assert "Pool test: checkout timed out" in caplog.text
+
+
+def test_slow_checkouts_are_logged_once_per_interval(engine, caplog):
+    stats = PoolStats("test", slow_checkout=0.01)
+    stats.listen(engine.pool)
+
+    with caplog.at_level(logging.WARNING, logger=pool_stats.__name__):
+        for _ in range(3):
+            stats.record_wait(0.02, engine.pool)
+        stats.record_wait(0.001, engine.pool)
+
+    assert caplog.text.count("checkouts waited over 10 ms") == 1
+    assert stats._slow_since_log == 2
+
+
+def test_statistics_survive_the_engine_recreating_its_pool(engine):
+    stats = pool_stats.instrument(engine, "test")
+    engine.dispose()
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    assert engine.pool.stats is stats
+    assert report("test")["checkouts"] == 1
+
+
+def test_both_apis_report_the_pools_of_their_process(monkeypatch):
+    monkeypatch.setenv("OPERATOR_TOKEN", "ops-secret")
+    headers = {"Authorization": "Bearer ops-secret"}
+
+    response = app.test_client().get("/api/v1/pools", headers=headers)
+    assert response.status_code == 200
+    primary = next(pool for pool in response.get_json()["pools"] if pool["name"] == "primary")
+    assert primary["max_overflow"] == POOL_OPTIONS["max_overflow"]
+
+    names = [pool["name"] for pool in TestClient(asgi_app).get("/api/v1/pools", headers=headers).json()["pools"]]
+    assert {"primary", "async-primary"} <= set(names)
+
+
+def test_pools_are_only_reported_to_operators(monkeypatch):
+    monkeypatch.delenv("OPERATOR_TOKEN", raising=False)
+    flask_client, asgi_client = app.test_client(), TestClient(asgi_app)
+    for client in (flask_client, asgi_client):
+        assert client.get("/api/v1/pools", headers={"Authorization": "Bearer anything"}).status_code == 401
+
+    monkeypatch.setenv("OPERATOR_TOKEN", "ops-secret")
+    for client in (flask_client, asgi_client):
+        assert client.get("/api/v1/pools").status_code == 401
+        assert client.get("/api/v1/pools", headers={"Authorization": "Bearer wrong"}).status_code == 401
@@ -0,0 +1,148 @@
+"""Checks that data_manager queries are answered from indexes.
+
+These tests need a disposable PostgreSQL database named by TEST_DATABASE_URL.
+The schema is created from the models, every SELECT a data_manager function
+issues is captured, and each one is EXPLAINed with sequential scans disabled.
+A scan that still reads a whole table (a Seq Scan, or an index scan without
+an Index Cond) means no index can serve that query.
+"""
+import os
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from utils import cache, data_manager, matching, models, notifications
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+
+@pytest.fixture(scope="module")
+def database():
+    engine = create_engine(TEST_DATABASE_URL)
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except SQLAlchemyError:
+        engine.dispose()
+        pytest.skip("pg_trgm extension is not available")
+
+    models.Base.metadata.drop_all(engine)
+    models.Base.metadata.create_all(engine)
+    models.Session.configure(bind=engine)
+
+    statements = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    try:
+        data_manager.save_company_verification({
+            'company_name': 'Acme', 'company_website': 'https://acme.test',
+            'contact_name': 'Ada', 'contact_email': 'hr@acme.test',
+            'contact_position': 'HR', 'contact_phone': '555',
+            'commitments': [], 'documentation': [], 'additional_info': '',
+            'password': 'secret'
+        })
+        company = data_manager.get_company_by_email('hr@acme.test')
+        data_manager.post_new_job({
+            'title': 'Data Analyst', 'location': 'Remote', 'job_type': 'Full-time',
+            'accommodations': ['Flexible Hours'], 'description': 'SQL reporting',
+            'requirements': 'SQL'
+        }, company.id)
+        data_manager.create_user_if_not_exists('jo', 'jo@example.test', 'pw', {'first_name': 'Jo'})
+        job = data_manager.search_jobs(limit=1)[0]
+        data_manager.save_job_application({'email': 'jo@example.test'}, job.id)
+
+        # Enough filler rows for the planner to prefer selective scans
+        with engine.begin() as conn:
+            filler_company_ids = conn.execute(insert(models.Company).returning(models.Company.id), [{
+                'name': f'Filler {i}', 'website': '', 'contact_name': '', 'contact_email': f'{i}@filler.test',
+                'contact_position': '', 'contact_phone': '', 'password': '', 'verification_status': 'pending'
+            } for i in range(50)]).scalars().all()
+            filler_job_ids = conn.execute(insert(models.Job).returning(models.Job.id), [{
+                'title': f'Filler role {i}', 'company_id': filler_company_ids[i % 50], 'location': f'City {i}',
+                'job_type': 'Part-time', 'accommodations': [f'Tag {i % 50}'],
+                'description': 'filler', 'requirements': 'filler'
+            } for i in range(2000)]).scalars().all()
+            filler_user_ids = conn.execute(insert(models.User).returning(models.User.id), [{
+                'username': f'filler{i}', 'email': f'{i}@users.test', 'password': '', 'resume_data': {}
+            } for i in range(200)]).scalars().all()
+            conn.execute(insert(models.JobApplication), [{
+                'user_id': filler_user_ids[i % 200], 'job_id': filler_job_ids[i % 2000], 'status': 'applied'
+            } for i in range(4000)])
+            conn.execute(insert(models.ApplicationCount), [
+                {'job_id': job_id, 'status': 'applied', 'count': 2} for job_id in filler_job_ids
+            ])
+            conn.execute(text("ANALYZE"))
+
+        yield {'engine': engine, 'statements': statements, 'company_id': company.id}
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+        models.Session.configure(bind=None)
+        models.Base.metadata.drop_all(engine)
+        engine.dispose()
+
+
+def _sync_recent_jobs():
+    index = matching.JobIndex()
+    index.synced_through = datetime.utcnow()
+    session = models.Session()
+    try:
+        data_manager.sync_job_index(session, index)
+    finally:
+        session.close()
+
+
+QUERIES = {
+    'search_jobs_keywords': lambda db: data_manager.search_jobs(query='analyst'),
+    'search_jobs_job_type': lambda db: data_manager.search_jobs(job_types=['Full-time']),
+    'search_jobs_location': lambda db: data_manager.search_jobs(location='remo'),
+    'search_jobs_accommodations': lambda db: data_manager.search_jobs(accommodations=['Flexible Hours']),
+    'get_company_by_email': lambda db: data_manager.get_company_by_email('hr@acme.test'),
+    'get_company_profile': lambda db: data_manager.get_company_profile(db['company_id']),
+    'get_company_jobs': lambda db: data_manager.get_company_jobs(db['company_id']),
+    'get_applications_for_company': lambda db: data_manager.get_applications_for_company(db['company_id']),
+    'rank_applications': lambda db: data_manager.rank_applications(db['company_id']),
+    'rank_applications_skills': lambda db: data_manager.rank_applications(db['company_id'], skills=('SQL',)),
+    'get_application_counts': lambda db: data_manager.get_application_counts(db['company_id']),
+    'get_job_applications': lambda db: data_manager.get_job_applications('jo@example.test'),
+    'get_user_profile_by_email': lambda db: data_manager.get_user_profile_by_email('jo@example.test'),
+    'find_last_modified_jobs': lambda db: data_manager.find_last_modified(models.Session(), models.Job),
+    'find_last_modified_company': lambda db: data_manager.find_last_modified(
+        models.Session(), models.Company, db['company_id']
+    ),
+    'sync_job_index': lambda db: _sync_recent_jobs(),
+    'claim_due_notifications': lambda db: notifications.claim_due(models.Session()),
+}
+
+
+def _full_scans(plan):
+    """Yield scan nodes of an EXPLAIN (FORMAT JSON) plan that read a whole table"""
+    node_type = plan['Node Type']
+    if node_type == 'Seq Scan':
+        yield plan
+    elif node_type in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in plan:
+        yield plan
+    for child in plan.get('Plans', []):
+        yield from _full_scans(child)
+
+
+@pytest.mark.parametrize("name", sorted(QUERIES))
+def test_data_manager_query_uses_an_index(database, name):
+    cache.clear()
+    database['statements'].clear()
+    QUERIES[name](database)
+    assert database['statements'], f"{name} issued no SELECT"
+
+    with database['engine'].connect() as conn:
+        conn.exec_driver_sql("SET enable_seqscan = off")
+        for statement, parameters in database['statements']:
+            plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters).scalar()[0]['Plan']
+            full_scans = [f"{node['Node Type']} on {node['Relation Name']}" for node in _full_scans(plan)]
+            assert not full_scans, f"{name} is not served by an index: {full_scans}\n{statement}"
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+from cachelib import SimpleCache
+
+from utils import ranking, shared_cache
+
+TODAY = date(2026, 1, 1)
+REQUIREMENTS = "5+ years of SQL and Python. Bachelor's degree in statistics."
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+def profile(skills=(), years=0, degree=None, summary=""):
+    return {
+        "skills": list(skills),
+        "summary": summary,
+        "experiences": [{"position": "Analyst", "start_date": date(2026 - years, 1, 1).isoformat()}] if years else [],
+        "education": [{"degree": degree}] if degree else [],
+    }
+
+
+def test_requirements_are_parsed_once_per_job():
+    assert ranking.years_required(REQUIREMENTS) == 5
+    assert ranking.years_required("SQL") == ranking.DEFAULT_YEARS_REQUIRED
+    assert ranking.degree_level(REQUIREMENTS) == 2
+    assert ranking.degree_level("PhD or Master") == 4
+
+
+def test_applicants_are_scored_on_skills_experience_and_education():
+    strong, partial, textual, empty = ranking.score_applicants("Data Analyst", REQUIREMENTS, [
+        profile(["SQL", "Python", "Statistics", "Data analysis"], years=6, degree="Master of Science"),
+        profile(["SQL"], years=2, degree="Associate"),
+        profile(summary="SQL and Python every day"),
+        "not a profile",
+    ], today=TODAY)
+
+    assert strong.experience == 1 and strong.education == 1
+    assert partial.experience == pytest.approx(2 / 5, abs=0.01)
+    assert partial.education == 0.5
+    # Terms only in free text count half as much as listed skills
+    assert textual.skills == pytest.approx(
+        ranking.score_applicants("Data Analyst", REQUIREMENTS, [profile(["SQL", "Python"])])[0].skills / 2
+    )
+    assert strong.score > partial.score > empty.score == 0
+
+
+def test_scores_are_cached_per_application_and_profile(monkeypatch):
+    calls = []
+    score = ranking.score_applicants
+    monkeypatch.setattr(ranking, "score_applicants", lambda *args: calls.append(len(args[2])) or score(*args))
+    applicants = [(1, profile(["SQL"])), (2, profile(["Python"]))]
+
+    first = ranking.rank_job_applicants(7, "Analyst", REQUIREMENTS, applicants)
+    assert ranking.rank_job_applicants(7, "Analyst", REQUIREMENTS, applicants) == first
+    # An edited profile is scored again, alone
+    ranking.rank_job_applicants(7, "Analyst", REQUIREMENTS, [applicants[0], (2, profile(["Python", "SQL"]))])
+
+    assert calls == [2, 1]
+    assert isinstance(first[1], ranking.ApplicantScore)
+
+
+def test_cached_scores_age_with_the_date():
+    applicants = [(1, profile(["SQL"], years=2))]
+
+    before = ranking.rank_job_applicants(7, "Analyst", REQUIREMENTS, applicants, today=TODAY)
+    later = ranking.rank_job_applicants(7, "Analyst", REQUIREMENTS, applicants, today=date(2027, 1, 1))
+
+    assert later[1].skills == before[1].skills
+    assert before[1].experience == pytest.approx(2 / 5, abs=0.01)
+    assert later[1].experience == pytest.approx(3 / 5, abs=0.01)
+    assert later[1].score > before[1].score
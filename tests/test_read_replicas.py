@@ -0,0 +1,128 @@
+from types import SimpleNamespace
+
+import pytest
+from cachelib import SimpleCache
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from api import app as flask_api
+from api.serializers import read_tags
+from utils import async_db, cache, data_manager, shared_cache
+from utils.models import RoutingSession, replica_reads
+
+metadata = MetaData()
+servers = Table("servers", metadata, Column("id", Integer, primary_key=True), Column("name", String))
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+def database(path, name):
+    engine = create_engine(f"sqlite:///{path}")
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(servers), {"id": 1, "name": name})
+    return engine
+
+
+@pytest.fixture
+def Session(tmp_path):
+    primary = database(tmp_path / "primary.db", "primary")
+    replica = database(tmp_path / "replica.db", "replica")
+    yield sessionmaker(class_=RoutingSession, primary=primary, replicas=[replica])
+    primary.dispose()
+    replica.dispose()
+
+
+def server(session, statement=select(servers.c.name)):
+    return session.execute(statement).scalar()
+
+
+def test_reads_use_the_primary_unless_replica_reads_are_allowed(Session):
+    with Session() as session:
+        assert server(session) == "primary"
+    with replica_reads(), Session() as session:
+        assert server(session) == "replica"
+        assert server(session, select(servers.c.name).with_for_update()) == "primary"
+    with replica_reads(False), Session() as session:
+        assert server(session) == "primary"
+
+
+def test_a_session_reads_its_own_writes_from_the_primary(Session):
+    with replica_reads(), Session() as session:
+        assert server(session) == "replica"
+        session.execute(insert(servers), {"id": 2, "name": "written"})
+        assert session.execute(select(servers.c.name).where(servers.c.id == 2)).scalar() == "written"
+        assert server(session) == "primary"
+
+
+def test_an_explicitly_bound_session_is_not_routed(Session):
+    replica = Session.kw["replicas"][0]
+    with replica_reads(False), Session(bind=replica) as session:
+        assert server(session) == "replica"
+
+
+def test_cached_reads_of_recently_written_tags_stay_on_the_primary(Session, monkeypatch):
+    cache.clear()
+    monkeypatch.setattr(cache, "_miss_handlers", [data_manager._replica_reads_unless_written])
+
+    @cache.cached(30, tags=lambda server_id: ["servers", f"server:{server_id}"])
+    def read_server(server_id):
+        with Session() as session:
+            return server(session, select(servers.c.name).where(servers.c.id == server_id))
+
+    assert read_server(1) == "replica"
+    cache.clear()
+    shared_cache.mark_written(["server:1"], 5)
+    assert read_server(1) == "primary"
+    assert shared_cache.recently_written(["servers", "server:1"])
+    assert not shared_cache.recently_written(["servers"])
+
+
+def test_api_reads_are_tagged_with_the_data_of_their_route():
+    assert read_tags("/api/v1/applications/5") == ["applications"]
+    assert read_tags("/api/v1/jobs:stream") == ["jobs"]
+    assert read_tags("/api/v1/companies/3/jobs", 3) == ["companies", "jobs", "company:3"]
+
+
+def test_flask_reads_after_a_write_to_their_data_stay_on_the_primary(monkeypatch):
+    opened = []
+
+    class RecordingUnitOfWork(data_manager.UnitOfWork):
+        def __init__(self, read_only=False, tags=()):
+            opened.append((read_only, list(tags)))
+            super().__init__(read_only, tags)
+
+    monkeypatch.setattr(flask_api, "UnitOfWork", RecordingUnitOfWork)
+    client = flask_api.app.test_client()
+    client.get("/api/v1/applications/5")
+    client.post("/api/v1/applications", json={"job_id": 1})
+
+    assert opened == [(True, ["applications"]), (False, [])]
+
+
+def test_async_reads_of_recently_written_tags_use_the_primary(monkeypatch):
+    replica = async_db.create_async_engine("sqlite+aiosqlite://")
+    monkeypatch.setattr(async_db, "async_replica_snapshot_engines", [replica])
+
+    assert async_db.read_only_session(["applications"]).bind is replica
+    shared_cache.mark_written(["applications"], 5)
+    assert async_db.read_only_session(["applications"]).bind is async_db.async_snapshot_engine
+    assert async_db.read_only_session(["jobs"]).bind is replica
+
+
+def test_job_streams_read_the_primary_after_a_job_write(monkeypatch):
+    binds = []
+    monkeypatch.setattr(data_manager, "replica_engines", ["replica"])
+    monkeypatch.setattr(data_manager, "read_snapshot_engine", lambda replica=True: replica)
+    session = SimpleNamespace(execute=lambda *args, **kwargs: [], close=lambda: None)
+    monkeypatch.setattr(data_manager, "Session", lambda bind: binds.append(bind) or session)
+    monkeypatch.setattr(data_manager, "job_search_statement", lambda *args: None)
+
+    assert list(data_manager.stream_jobs()) == []
+    shared_cache.mark_written(["jobs"], 5)
+    assert list(data_manager.stream_jobs()) == []
+
+    assert binds == [True, False]
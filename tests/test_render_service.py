@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from cachelib import SimpleCache
+
+from utils import shared_cache
+from utils.render_service import RenderQueueFull, RenderService, RenderTimeout, UnknownRender
+
+
+@pytest.fixture(autouse=True)
+def in_memory_shared_cache(monkeypatch):
+    monkeypatch.setattr(shared_cache, "_shared_cache", SimpleCache())
+
+
+@pytest.fixture
+def service():
+    service = RenderService(workers=1, queue_size=1)
+    yield service
+    service.shutdown()
+
+
+def resume(summary="Analyst"):
+    return {
+        "personal_info": {
+            "first_name": "Ada", "last_name": "Lovelace", "email": "ada@test", "phone": "555",
+            "location": "London", "linkedin": "", "picture": None
+        },
+        "summary": summary,
+        "experiences": [],
+        "education": [{"institution": "Home", "degree": "Mathematics", "graduation_date": date(1835, 1, 1)}],
+        "skills": ["Mathematics"]
+    }
+
+
+def test_render_runs_in_the_pool_and_applies_backpressure(service):
+    job_id = service.submit(resume(), "Professional")
+    # The only slot is taken until the first render finishes
+    with pytest.raises(RenderQueueFull):
+        service.submit(resume("Engineer"), "Professional")
+    with pytest.raises(RenderTimeout):
+        service.get_result(job_id, timeout=0)
+
+    assert service.get_result(job_id, timeout=60).startswith(b"%PDF")
+    with pytest.raises(UnknownRender):
+        service.get_result(job_id)
+
+
+def test_cached_render_skips_the_pool(service):
+    first = service.get_result(service.submit(resume(), "Professional"), timeout=60)
+    service.shutdown()
+
+    # A cache hit needs neither a queue slot nor a worker
+    assert service.get_result(service.submit(resume(), "Professional"), timeout=0) == first
+    assert service._executor is None
+
+
+def test_unknown_template_is_rejected_before_queueing(service):
+    with pytest.raises(ValueError):
+        service.submit(resume(), "Baroque")
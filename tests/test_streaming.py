@@ -0,0 +1,45 @@
+import gzip
+import json
+
+from werkzeug.datastructures import MultiDict
+
+from api import compression
+from api.serializers import StreamEncoder, wants_ndjson
+
+
+def serialize(row):
+    return {"id": row}
+
+
+def test_json_array_stream_is_valid_json_across_batches():
+    encoder = StreamEncoder(serialize)
+    text = encoder.start() + encoder.encode([1, 2]) + encoder.encode([]) + encoder.encode([3]) + encoder.end()
+    assert json.loads(text) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert "".join(StreamEncoder(serialize).chunks([])) == "[]"
+
+
+def test_ndjson_stream_has_one_document_per_line():
+    encoder = StreamEncoder(serialize, ndjson=True)
+    text = "".join(encoder.chunks([1, 2, 3]))
+    assert encoder.mimetype == "application/x-ndjson"
+    assert [json.loads(line) for line in text.splitlines()] == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def test_ndjson_is_chosen_by_format_parameter_or_accept_header():
+    assert wants_ndjson(MultiDict({"format": "ndjson"}), None)
+    assert not wants_ndjson(MultiDict({"format": "json"}), "application/x-ndjson")
+    assert wants_ndjson(MultiDict(), "application/x-ndjson")
+    assert not wants_ndjson(MultiDict(), "application/json, */*")
+
+
+def test_encoding_negotiation_respects_quality_values():
+    assert compression.negotiate(None) is None
+    assert compression.negotiate("gzip, deflate") == "gzip"
+    assert compression.negotiate("gzip;q=0, identity") is None
+
+
+def test_compressed_stream_decodes_to_the_original_text():
+    chunks = ["row %d\n" % i for i in range(5000)]
+    body = b"".join(compression.compress_stream(chunks, "gzip"))
+    assert gzip.decompress(body).decode("utf-8") == "".join(chunks)
+    assert b"".join(compression.compress_stream(chunks)) == "".join(chunks).encode("utf-8")
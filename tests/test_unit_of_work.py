@@ -0,0 +1,94 @@
+import os
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select, text
+from sqlalchemy.orm import sessionmaker
+
+from utils import cache, data_manager
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+def setup_function():
+    cache.clear()
+
+
+def test_calls_inside_a_unit_of_work_share_one_session():
+    with data_manager.unit_of_work() as session:
+        assert data_manager.get_db_session() is session
+        with data_manager.unit_of_work() as inner:
+            assert inner is session
+    assert data_manager.get_db_session() is not session
+
+
+def test_invalidation_waits_for_commit():
+    cache.store('profile', {'name': 'Jo'}, 60, tags=['user:jo'])
+    with data_manager.unit_of_work():
+        data_manager.invalidate_cache('user:jo')
+        assert cache.lookup('profile') == {'name': 'Jo'}
+    assert cache.lookup('profile') is None
+
+
+def test_rollback_drops_pending_invalidation():
+    cache.store('profile', {'name': 'Jo'}, 60, tags=['user:jo'])
+    with pytest.raises(RuntimeError):
+        with data_manager.unit_of_work():
+            data_manager.invalidate_cache('user:jo')
+            raise RuntimeError("write failed")
+    assert cache.lookup('profile') == {'name': 'Jo'}
+
+
+def test_cached_reads_after_a_write_in_the_unit_are_read_through(monkeypatch):
+    monkeypatch.setattr(cache, '_version_source', None)
+    calls = []
+
+    @cache.cached(60, tags=lambda: ['user:jo'])
+    def load_profile():
+        calls.append(1)
+        return {'version': len(calls)}
+
+    with pytest.raises(RuntimeError):
+        with data_manager.unit_of_work():
+            assert load_profile() == load_profile() == {'version': 1}
+            data_manager.invalidate_cache('user:jo')
+            assert load_profile() == {'version': 2}
+            assert load_profile() == {'version': 3}
+            raise RuntimeError("write failed")
+    # Nothing read after the rolled back write was cached
+    assert load_profile() == {'version': 1}
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+def test_a_failed_call_rolls_back_only_its_own_writes(monkeypatch):
+    engine = create_engine(TEST_DATABASE_URL)
+    metadata = MetaData()
+    notes = Table("uow_notes", metadata, Column("id", Integer, primary_key=True), Column("text", String))
+    metadata.create_all(engine)
+    monkeypatch.setattr(data_manager, "Session", sessionmaker(bind=engine))
+
+    def write(note_id, fail_with=None):
+        session = data_manager.get_db_session()
+        try:
+            session.execute(insert(notes), {"id": note_id, "text": "note"})
+            if fail_with is not None:
+                session.execute(text(fail_with))
+            data_manager.commit_session(session)
+            return True
+        except Exception:
+            data_manager.rollback_session(session)
+            return False
+        finally:
+            data_manager.release_session(session)
+
+    try:
+        with data_manager.unit_of_work():
+            assert write(1)
+            # A failed statement and a constraint violation both leave the unit usable
+            assert not write(2, fail_with="SELECT 1 / 0")
+            assert not write(1)
+            assert write(3)
+        with engine.connect() as conn:
+            assert conn.execute(select(notes.c.id).order_by(notes.c.id)).scalars().all() == [1, 3]
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
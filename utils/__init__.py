@@ -2,7 +2,11 @@
 from .models import Job, Company, User, JobApplication, Session, engine
 from .data_manager import (
     load_jobs,
+    search_jobs,
+    recommend_jobs,
     load_companies,
+    authenticate_user,
+    authenticate_company,
     save_company_verification,
     get_user_profile,
     update_user_profile,
@@ -11,8 +15,12 @@ from .data_manager import (
     get_company_jobs,
     save_job_application,
     get_job_applications,
+    read_resume,
     get_applications_for_company,
+    rank_applications,
     send_email_to_applicant,
-    save_job_application
+    update_application_statuses,
+    save_job_application,
+    unit_of_work
 
 )
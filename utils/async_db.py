@@ -0,0 +1,80 @@
+"""Asyncio engine and sessions for the ASGI edition of the API.
+
+The async engine talks to the same database as utils.models.engine. Its URL
+is ASYNC_DATABASE_URL when set, otherwise DATABASE_URL switched to the
+matching asyncio driver (asyncpg for PostgreSQL, aiosqlite for SQLite).
+Read replicas come from ASYNC_DATABASE_REPLICA_URLS, or
+DATABASE_REPLICA_URLS switched the same way; read_only_session() reads
+from one of them unless the data it reads was just written.
+"""
+import logging
+import os
+import random
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from . import shared_cache
+from .models import POOL_OPTIONS, database_url, replica_urls
+from .pool_stats import InstrumentedAsyncQueuePool, instrument
+
+logger = logging.getLogger(__name__)
+
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url):
+    """Return url with its driver replaced by the asyncio driver for its backend"""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+# Same sizes, with the asyncio flavour of the instrumented pool
+_ASYNC_POOL_OPTIONS = dict(POOL_OPTIONS, poolclass=InstrumentedAsyncQueuePool)
+
+_async_replica_urls = [url.strip() for url in os.getenv('ASYNC_DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+try:
+    async_engine = create_async_engine(
+        os.getenv('ASYNC_DATABASE_URL') or async_database_url(database_url), **_ASYNC_POOL_OPTIONS
+    )
+    async_replica_engines = [
+        create_async_engine(url, **_ASYNC_POOL_OPTIONS)
+        for url in _async_replica_urls or [async_database_url(url) for url in replica_urls]
+    ]
+    instrument(async_engine, 'async-primary', _ASYNC_POOL_OPTIONS['max_overflow'])
+    for number, replica in enumerate(async_replica_engines, 1):
+        instrument(replica, f'async-replica-{number}', _ASYNC_POOL_OPTIONS['max_overflow'])
+    logger.info(f"Async database engine created successfully ({len(async_replica_engines)} read replicas)")
+except Exception as e:
+    logger.error(f"Error creating async database engine: {str(e)}")
+    raise
+
+AsyncSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+
+def _snapshot(bind):
+    # Shares the engine's pool; every transaction is a read-only snapshot
+    return bind.execution_options(isolation_level='REPEATABLE READ', postgresql_readonly=True)
+
+
+async_snapshot_engine = _snapshot(async_engine)
+async_replica_snapshot_engines = [_snapshot(replica) for replica in async_replica_engines]
+
+
+def read_only_session(tags=()):
+    """Open an AsyncSession whose reads all come from one snapshot.
+
+    The snapshot is on a read replica if any, unless the data behind the
+    cache tags was written within the replica lag window; name them so a
+    read right after a write sees it.
+    """
+    if async_replica_snapshot_engines and not shared_cache.recently_written(tags):
+        return AsyncSession(bind=random.choice(async_replica_snapshot_engines))
+    return AsyncSession(bind=async_snapshot_engine)
@@ -0,0 +1,218 @@
+"""Signed session tokens and password hashing off the request thread.
+
+Login issues a token that says who the caller is, so later requests are
+authorized without a database lookup:
+
+    token = issue_token(Principal(user.id, 'user', user.email))
+    principal = verify_token(token, role='user')
+
+Tokens are itsdangerous signatures over the id, role and email with a
+timestamp, valid for AUTH_TOKEN_TTL seconds (default 8 hours). Every
+process that verifies them (Streamlit, the Flask API and the ASGI API) must
+share AUTH_SECRET_KEY; without it each process signs with a random key of
+its own and its tokens work nowhere else.
+
+Password hashes are slow on purpose. hash_password() and verify_password()
+run them on a pool of HASH_WORKERS threads (default 2) that accepts at most
+HASH_QUEUE_SIZE (default 16 per worker) queued or running checks, so a burst
+of logins queues behind the pool, or is turned away with LoginBusy, instead
+of occupying every request thread. hashlib's scrypt and PBKDF2 release the
+GIL, so the pool's threads hash in parallel with request handling.
+"""
+import hmac
+import logging
+import os
+import secrets
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import lru_cache
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash, generate_password_hash
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('user', 'company')
+
+# Seconds a password check may wait for the pool, queueing included
+HASH_TIMEOUT = 10
+
+# Who a token was issued to: a user or company id, its role and its email
+Principal = namedtuple('Principal', ['id', 'role', 'email'])
+
+
+class InvalidToken(ValueError):
+    """Raised for a missing, tampered, expired or wrong-role token"""
+
+
+class Forbidden(Exception):
+    """Raised when a valid token is not allowed the resource it was presented for"""
+
+
+class LoginBusy(RuntimeError):
+    """Raised when the password pool already has as many checks as it accepts"""
+
+
+@lru_cache(maxsize=None)
+def _secret_key():
+    key = os.getenv('AUTH_SECRET_KEY')
+    if not key:
+        logger.warning("AUTH_SECRET_KEY is not set; tokens are only valid in the process that issued them")
+        key = secrets.token_hex(32)
+    return key
+
+
+def token_ttl():
+    return int(os.getenv('AUTH_TOKEN_TTL', 8 * 60 * 60))
+
+
+def _serializer():
+    return URLSafeTimedSerializer(_secret_key(), salt='auth-token')
+
+
+def issue_token(principal):
+    """Sign a Principal into a URL-safe token"""
+    if principal.role not in ROLES:
+        raise ValueError(f"Unknown role: {principal.role}")
+    return _serializer().dumps([principal.id, principal.role, principal.email])
+
+
+def verify_token(token, role=None):
+    """The Principal a token was issued to; raises InvalidToken unless it is genuine,
+    unexpired and, when role is given, issued for that role"""
+    if not token:
+        raise InvalidToken("Missing token")
+    try:
+        principal = Principal(*_serializer().loads(token, max_age=token_ttl()))
+    except SignatureExpired:
+        raise InvalidToken("Token has expired")
+    except (BadSignature, TypeError, ValueError):
+        raise InvalidToken("Invalid token")
+    if role is not None and principal.role != role:
+        raise InvalidToken(f"Token is not for a {role}")
+    return principal
+
+
+def bearer_token(authorization):
+    """The token of an 'Authorization: Bearer <token>' header value, or None"""
+    scheme, _, token = (authorization or '').partition(' ')
+    return token.strip() or None if scheme.lower() == 'bearer' else None
+
+
+def authorize(authorization, role, subject_id=None):
+    """The Principal of an Authorization header's bearer token.
+
+    Raises InvalidToken (401) without a genuine, unexpired token, and
+    Forbidden (403) when it was issued for another role or, if subject_id is
+    given, another user or company.
+    """
+    principal = verify_token(bearer_token(authorization))
+    if principal.role != role:
+        raise Forbidden(f"Requires a {role} token")
+    if subject_id is not None and principal.id != subject_id:
+        raise Forbidden(f"Token is not for {role} {subject_id}")
+    return principal
+
+
+def authorize_operator(authorization):
+    """Check an Authorization header's bearer token against OPERATOR_TOKEN.
+
+    Raises InvalidToken (401) unless it matches; operator endpoints stay
+    closed while OPERATOR_TOKEN is not set.
+    """
+    expected = os.getenv('OPERATOR_TOKEN')
+    token = bearer_token(authorization)
+    if not expected or not token or not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+        raise InvalidToken("Requires the operator token")
+
+
+def current_principal(state, role):
+    """The Principal of the role's token kept in a Streamlit session state, or None if there is no valid one
+
+    Each role keeps its token under its own key (user_token, company_token),
+    so signing in as one role does not sign the other out.
+    """
+    try:
+        return verify_token(state.get(f'{role}_token'), role)
+    except InvalidToken:
+        return None
+
+
+class PasswordHasher:
+    """Thread pool with a bounded number of queued and running password hashes"""
+
+    def __init__(self, workers=None, queue_size=None):
+        self.workers = workers or 2
+        self.queue_size = queue_size or self.workers * 16
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+
+    def submit(self, function, *args):
+        """Run a hash function on the pool and return its Future"""
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy(f"{self.queue_size} password checks are already queued; try again shortly")
+        try:
+            future = self._executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._slots.release())
+        return future
+
+    def hash(self, password):
+        return self.submit(generate_password_hash, password)
+
+    def verify(self, stored_hash, password):
+        """Future of whether password matches stored_hash"""
+        return self.submit(_check_password, stored_hash, password)
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+@lru_cache(maxsize=None)
+def _unknown_account_hash():
+    return generate_password_hash(secrets.token_hex(16))
+
+
+def _check_password(stored_hash, password):
+    # An unknown account is checked against a throwaway hash, so it takes as
+    # long to reject as a wrong password
+    if not stored_hash:
+        check_password_hash(_unknown_account_hash(), password)
+        return False
+    return check_password_hash(stored_hash, password)
+
+
+_password_hasher = None
+_password_hasher_lock = threading.Lock()
+
+
+def get_password_hasher():
+    """Return the process-wide password pool configured from the environment"""
+    global _password_hasher
+    with _password_hasher_lock:
+        if _password_hasher is None:
+            workers = int(os.getenv('HASH_WORKERS', 0)) or None
+            queue_size = int(os.getenv('HASH_QUEUE_SIZE', 0)) or None
+            _password_hasher = PasswordHasher(workers, queue_size)
+        return _password_hasher
+
+
+def _wait(future, timeout):
+    try:
+        return future.result(timeout)
+    except FutureTimeout:
+        future.cancel()
+        raise LoginBusy(f"Password check did not finish within {timeout} seconds")
+
+
+def hash_password(password, timeout=HASH_TIMEOUT):
+    """Hash a password on the pool"""
+    return _wait(get_password_hasher().hash(password), timeout)
+
+
+def verify_password(stored_hash, password, timeout=HASH_TIMEOUT):
+    """Check a password against its stored hash (None for an unknown account) on the pool"""
+    return _wait(get_password_hasher().verify(stored_hash, password), timeout)
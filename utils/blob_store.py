@@ -0,0 +1,116 @@
+"""Content-addressed storage for uploaded files such as application resumes.
+
+Blobs are keyed by the SHA-256 hex digest of their content, so identical
+uploads are stored once and database rows only hold the 64-character key.
+The backend is chosen with BLOB_STORE_BACKEND (default "local", a directory
+tree under BLOB_STORE_PATH); other backends can be added with
+register_blob_store().
+"""
+import hashlib
+import io
+import os
+import re
+import tempfile
+
+# Bytes read at a time while hashing and copying uploads
+CHUNK_SIZE = 1024 * 1024
+
+_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+_DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'blobs')
+
+
+class BlobNotFound(LookupError):
+    """Raised when no blob is stored under a key"""
+
+
+def _validate_key(key):
+    if not isinstance(key, str) or not _KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return key
+
+
+class BlobStore:
+    """Interface for blob backends"""
+
+    def put(self, data):
+        """Store bytes or a binary file object and return its key"""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Open a stored blob for streaming reads"""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def get(self, key):
+        """Read a whole blob into memory"""
+        with self.open(key) as stream:
+            return stream.read()
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs stored as files under root/ab/cd/<key>"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        _validate_key(key)
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data):
+        stream = io.BytesIO(data) if isinstance(data, (bytes, bytearray)) else data
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        # Write to a temporary file while hashing, then move it into place
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.upload-')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+            key = digest.hexdigest()
+            path = self._path(key)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return key
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def open(self, key):
+        try:
+            return open(self._path(key), 'rb')
+        except FileNotFoundError:
+            raise BlobNotFound(key)
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+
+BLOB_STORE_BACKENDS = {
+    'local': lambda: LocalBlobStore(os.getenv('BLOB_STORE_PATH', _DEFAULT_PATH)),
+}
+
+_blob_store = None
+
+
+def register_blob_store(name, factory):
+    """Make a backend available under BLOB_STORE_BACKEND=name"""
+    BLOB_STORE_BACKENDS[name] = factory
+
+
+def get_blob_store():
+    """Return the process-wide blob store configured from the environment"""
+    global _blob_store
+    if _blob_store is None:
+        backend = os.getenv('BLOB_STORE_BACKEND', 'local')
+        if backend not in BLOB_STORE_BACKENDS:
+            raise ValueError(f"Unknown BLOB_STORE_BACKEND: {backend}")
+        _blob_store = BLOB_STORE_BACKENDS[backend]()
+    return _blob_store
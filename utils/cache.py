@@ -0,0 +1,176 @@
+"""In-process read cache for data_manager queries.
+
+Streamlit reruns the whole page script on every widget interaction, so the
+same profile and listing reads repeat many times per minute. Results are
+kept in memory for a short TTL and tagged with the data they depend on;
+write functions call invalidate() with the matching tags so a rerun after a
+write never sees stale data.
+
+Writes in other processes are seen through version_by(): each entry is
+stored with the versions of its tags at the time it was computed, and a
+lookup only returns it while those versions are still current.
+data_manager uses the shared tag versions of utils.shared_cache, which
+every process bumps on invalidation.
+
+Hits return copies of the dicts and lists in a cached value (named tuples
+are rebuilt around them), so callers may change what they get back without
+touching the entry.
+"""
+import threading
+import time
+from contextlib import ExitStack
+from functools import wraps
+
+# Upper bound on cached results; the oldest entries are evicted first
+MAX_ENTRIES = 2048
+
+_lock = threading.RLock()
+_entries = {}  # key -> (expires_at, tags, versions, value)
+_keys_by_tag = {}  # tag -> set of keys
+_invalidation_listeners = []
+_miss_handlers = []
+_read_through_checks = []
+_version_source = None
+
+# Versions of a read that must not be cached: unreadable, or read through
+_UNKNOWN = object()
+
+
+def _freeze(value):
+    """Turn call arguments into a hashable cache key component"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def _copy(value):
+    """Copy the dicts and lists inside a cached value"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, tuple) and hasattr(value, '_make'):
+        return value._make(_copy(item) for item in value)
+    return value
+
+
+def _drop(key):
+    expires_at, tags, versions, value = _entries.pop(key)
+    for tag in tags:
+        keys = _keys_by_tag.get(tag)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del _keys_by_tag[tag]
+
+
+def lookup(key, versions=None):
+    """Return a live cached value stored with the same tag versions, or None on a miss"""
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic() or entry[2] != versions:
+            _drop(key)
+            return None
+        return entry[3]
+
+
+def store(key, value, ttl, tags=(), versions=None):
+    """Store a value for ttl seconds under the given invalidation tags and their versions"""
+    with _lock:
+        if key in _entries:
+            _drop(key)
+        while len(_entries) >= MAX_ENTRIES:
+            _drop(next(iter(_entries)))
+        tags = frozenset(tags)
+        _entries[key] = (time.monotonic() + ttl, tags, versions, value)
+        for tag in tags:
+            _keys_by_tag.setdefault(tag, set()).add(key)
+
+
+def invalidate(*tags):
+    """Evict every cached result tagged with any of the given tags"""
+    with _lock:
+        for tag in tags:
+            for key in list(_keys_by_tag.get(tag, ())):
+                _drop(key)
+    for listener in _invalidation_listeners:
+        try:
+            listener(*tags)
+        except Exception as e:
+            print(f"Error notifying cache invalidation listener: {str(e)}")
+
+
+def on_invalidate(listener):
+    """Call listener(*tags) after every invalidate(), e.g. to reach other processes"""
+    if listener not in _invalidation_listeners:
+        _invalidation_listeners.append(listener)
+
+
+def version_by(source):
+    """Check entries against source(tags), the current versions of their tags, on every lookup"""
+    global _version_source
+    _version_source = source
+
+
+def _versions(tags):
+    if _version_source is None or not tags:
+        return None
+    try:
+        return tuple(_version_source(tags))
+    except Exception as e:
+        print(f"Error reading cache tag versions: {str(e)}")
+        return _UNKNOWN
+
+
+def read_through_when(check):
+    """Bypass the cache, neither reading nor storing, whenever check() is true"""
+    if check not in _read_through_checks:
+        _read_through_checks.append(check)
+
+
+def around_miss(handler):
+    """Compute every cache miss inside handler(tags), a context manager, e.g. to pick where it reads from"""
+    if handler not in _miss_handlers:
+        _miss_handlers.append(handler)
+
+
+def clear():
+    """Evict everything"""
+    with _lock:
+        _entries.clear()
+        _keys_by_tag.clear()
+
+
+def cached(ttl, tags):
+    """Cache a read function's non-None results for ttl seconds.
+
+    tags is called with the function's arguments and returns the tags the
+    result depends on, e.g. lambda email: [f'user:{email}'].
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (func.__module__, func.__qualname__, _freeze(args), _freeze(kwargs))
+            value_tags = tags(*args, **kwargs)
+            cacheable = not any(check() for check in _read_through_checks)
+            # Read before computing, so a write meanwhile orphans the new entry
+            versions = _versions(value_tags) if cacheable else _UNKNOWN
+            value = lookup(key, versions) if cacheable else None
+            if value is not None:
+                return _copy(value)
+            with ExitStack() as stack:
+                for handler in _miss_handlers:
+                    stack.enter_context(handler(value_tags))
+                value = func(*args, **kwargs)
+            # None means "not found" or a swallowed error; always retry those
+            if value is not None and versions is not _UNKNOWN:
+                store(key, value, ttl, value_tags, versions)
+            return _copy(value)
+        return wrapper
+    return decorator
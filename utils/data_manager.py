@@ -1,37 +1,426 @@
-from sqlalchemy.orm import joinedload
-from .models import Company, Job, User, JobApplication, Session
-import json
-from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import REAL, bindparam, cast, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from .models import ApplicationCount, Company, Job, User, JobApplication, Session, JOB_SEARCH_CONFIG, job_search_document
+from .models import read_snapshot_engine, replica_engines, replica_reads
+from .pagination import keyset_filter
+from .read_models import ApplicationSummary, ApplicationNotice, CompanyProfile, JobSummary
+from .blob_store import get_blob_store
+from . import auth, cache, matching, notifications, ranking, shared_cache
+import contextvars
+import os
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Rows fetched per round trip when streaming from a server-side cursor
+STREAM_BATCH_SIZE = 500
+
+# Rows per INSERT round trip in bulk_post_jobs
+BULK_INSERT_BATCH_SIZE = 1000
+
+# Statuses a company can move an application to
+APPLICATION_STATUSES = ["reviewing", "interview", "selected", "rejected"]
+
+# Most application ids accepted by one update_application_statuses call
+MAX_STATUS_UPDATE_BATCH = 1000
+
+# Read cache lifetimes in seconds; write functions invalidate the affected tags
+JOBS_CACHE_TTL = 60
+PROFILE_CACHE_TTL = 300
+APPLICATIONS_CACHE_TTL = 30
+
+# Jobs updated this long before the last match index sync are read again, in
+# case their transaction committed after that sync ran
+MATCH_INDEX_SYNC_OVERLAP = timedelta(minutes=5)
+
+# Seconds after a write during which reads of the data it changed go to the
+# primary rather than a read replica that may not have replayed it yet
+REPLICA_LAG_WINDOW = int(os.getenv('REPLICA_LAG_WINDOW', 5))
+
+_current_unit_of_work = contextvars.ContextVar('unit_of_work', default=None)
+
+# Writes here also invalidate the API response cache and the read cache in every other process
+cache.on_invalidate(shared_cache.invalidate_tags)
+cache.version_by(shared_cache.tag_versions)
+
+
+def _in_uncommitted_writes():
+    uow = _current_unit_of_work.get()
+    return uow is not None and uow.has_pending_writes
+
+
+# Reads after a unit of work wrote see data that may yet roll back
+cache.read_through_when(_in_uncommitted_writes)
+
+
+def _mark_written(*tags):
+    shared_cache.mark_written(tags, REPLICA_LAG_WINDOW)
+
+
+def _replica_reads_unless_written(tags):
+    """Cached reads use a replica, unless a write to their data may not have reached it yet.
+
+    Inside a unit of work the unit's session decides: read-only units are
+    bound to a snapshot already, and writing ones stay on the primary.
+    """
+    return replica_reads(_current_unit_of_work.get() is None and not shared_cache.recently_written(tags))
+
+
+if replica_engines or os.getenv('ASYNC_DATABASE_REPLICA_URLS'):
+    # Read-your-writes across processes: reads of freshly written tags stay on the primary
+    cache.on_invalidate(_mark_written)
+if replica_engines:
+    cache.around_miss(_replica_reads_unless_written)
+
+
+class UnitOfWork:
+    """One session, pooled connection and transaction shared by data_manager calls.
+
+    While a unit of work is active, every data_manager function uses its
+    session instead of opening one of its own. Writes are not committed one
+    by one; they are flushed together and committed by commit(), and read
+    cache invalidations are held back until that commit succeeds. Once the
+    unit has written, cached reads go to its session and are not stored,
+    so they see its own writes and never cache what may roll back.
+
+    Each data_manager call in the unit runs in a savepoint of its own (see
+    get_db_session()), so a call that fails and handles its error rolls
+    back only its own writes and leaves the unit usable.
+    """
+
+    def __init__(self, read_only=False, tags=()):
+        # Read-only units see one consistent snapshot for all their reads, on
+        # a read replica unless the data behind tags was just written
+        if read_only:
+            replica = bool(replica_engines) and not shared_cache.recently_written(tags)
+            self.session = Session(bind=read_snapshot_engine(replica))
+        else:
+            self.session = Session()
+        self.read_only = read_only
+        self._invalidations = set()
+        self._savepoints = []
+        self._token = None
+
+    def begin(self):
+        """Make this the active unit of work for the current thread or task"""
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    @property
+    def has_pending_writes(self):
+        return bool(self._invalidations)
+
+    def defer_invalidation(self, tags):
+        self._invalidations.update(tags)
+
+    def commit(self):
+        self.session.commit()
+        cache.invalidate(*self._invalidations)
+        self._invalidations.clear()
+
+    def rollback(self):
+        self.session.rollback()
+        self._invalidations.clear()
+        self._savepoints.clear()
+
+    def close(self):
+        if self._token is not None:
+            _current_unit_of_work.reset(self._token)
+            self._token = None
+        self.session.close()
+
+
+@contextmanager
+def unit_of_work(read_only=False, tags=()):
+    """Run the enclosed data_manager calls in a single session and transaction.
+
+    Commits when the block exits, including through Streamlit control flow
+    such as st.rerun() or st.stop(), and rolls back if it raises an error.
+    Nested blocks join the outermost unit of work. A read-only block reads
+    from a replica when one is configured; name the cache tags of the data
+    it reads so it stays on the primary right after that data is written.
+    """
+    if _current_unit_of_work.get() is not None:
+        yield _current_unit_of_work.get().session
+        return
+    uow = UnitOfWork(read_only=read_only, tags=tags).begin()
+    try:
+        yield uow.session
+    except (Exception, KeyboardInterrupt):
+        uow.rollback()
+        raise
+    except BaseException:
+        uow.commit()
+        raise
+    else:
+        uow.commit()
+    finally:
+        uow.close()
+
 
 def get_db_session():
-    """Get database session"""
+    """Get the active unit of work's session, or a new database session.
+
+    Inside a unit of work the call also opens a savepoint, which
+    release_session() releases and rollback_session() rolls back.
+    """
+    uow = _current_unit_of_work.get()
+    if uow is not None:
+        uow._savepoints.append(uow.session.begin_nested())
+        return uow.session
     return Session()
 
 
-def _safe_json_loads(value, default):
-    """Safely parse JSON text values stored in the database."""
-    if value is None:
-        return default
-    if isinstance(value, (dict, list)):
-        return value
-    try:
-        return json.loads(value)
-    except (TypeError, json.JSONDecodeError):
-        return default
+def commit_session(session):
+    """Commit a session from get_db_session(); deferred inside a unit of work"""
+    if _current_unit_of_work.get() is None:
+        session.commit()
+    else:
+        # Surface constraint errors to the caller now rather than at commit
+        session.flush()
+
+
+def rollback_session(session):
+    """Roll back a session from get_db_session() after an error.
+
+    Inside a unit of work only the failed call's savepoint is rolled back,
+    so the unit's earlier writes survive and its transaction stays usable.
+    """
+    uow = _current_unit_of_work.get()
+    if uow is None:
+        session.rollback()
+    elif uow._savepoints and uow._savepoints[-1] is not None:
+        # Also clears a savepoint a failed flush has already deactivated
+        uow._savepoints[-1].rollback()
+        uow._savepoints[-1] = None
+
+def release_session(session):
+    """Close a session from get_db_session(), or release its savepoint if a unit of work owns it"""
+    uow = _current_unit_of_work.get()
+    if uow is None:
+        session.close()
+    elif uow._savepoints:
+        savepoint = uow._savepoints.pop()
+        if savepoint is None:
+            return
+        if savepoint.is_active:
+            savepoint.commit()
+        else:
+            savepoint.rollback()
+
 
+def invalidate_cache(*tags):
+    """Evict read cache tags now, or when the active unit of work commits"""
+    uow = _current_unit_of_work.get()
+    if uow is not None:
+        uow.defer_invalidation(tags)
+    else:
+        cache.invalidate(*tags)
+
+
+# Columns projected into JobSummary, in field order
+JOB_SUMMARY_COLUMNS = (
+    Job.id,
+    Job.title,
+    Job.company_id,
+    Company.name.label('company_name'),
+    Job.location,
+    Job.job_type,
+    Job.accommodations,
+    Job.description,
+    Job.posted_date,
+)
+
+def _job_summary_query(session):
+    return session.query(*JOB_SUMMARY_COLUMNS).outerjoin(Company, Job.company_id == Company.id)
+
+@cache.cached(JOBS_CACHE_TTL, tags=lambda: ['jobs'])
 def load_jobs():
-    """Load jobs from database with eager loading for related company"""
+    """Load all jobs with their company name"""
     session = get_db_session()
     try:
-        jobs = session.query(Job).options(joinedload(Job.company)).all()
-        return jobs
+        rows = _job_summary_query(session).all()
+        return [JobSummary(*row) for row in rows]
     except Exception as e:
+        rollback_session(session)
         print(f"Error loading jobs: {str(e)}")
         raise
+    finally:
+        release_session(session)
+
+def _job_search_query(session, query=None, job_types=None, location=None, accommodations=None):
+    """Build the filtered job query used by search_jobs.
+
+    Returns the query together with its descending sort key: relevance rank,
+    posted date and id for keyword searches, posted date and id otherwise.
+    """
+    jobs_query = _job_summary_query(session)
+    sort_key = [Job.posted_date, Job.id]
+
+    search_text = (query or '').strip()
+    if search_text:
+        document = job_search_document()
+        ts_query = func.websearch_to_tsquery(JOB_SEARCH_CONFIG, search_text)
+        rank = func.ts_rank_cd(document, ts_query, type_=REAL)
+        jobs_query = jobs_query.filter(document.bool_op('@@')(ts_query))
+        jobs_query = jobs_query.add_columns(rank.label('search_rank'))
+        sort_key.insert(0, rank)
+    if job_types:
+        jobs_query = jobs_query.filter(Job.job_type.in_(list(job_types)))
+    if location and location.strip():
+        jobs_query = jobs_query.filter(Job.location.icontains(location.strip(), autoescape=True))
+    if accommodations:
+        # Array containment (@>) is answered by the GIN index on accommodations
+        jobs_query = jobs_query.filter(Job.accommodations.contains(list(accommodations)))
+
+    return jobs_query, sort_key
+
+def job_sort_key(job):
+    """Sort key of a JobSummary returned by search_jobs, for building a cursor"""
+    if job.search_rank is not None:
+        return [job.search_rank, job.posted_date, job.id]
+    return [job.posted_date, job.id]
+
+def find_jobs(session, query=None, job_types=None, location=None, accommodations=None, limit=50, offset=0,
+              after=None):
+    """Run the job search on the given session and return JobSummary rows.
+
+    search_jobs() wraps this with the read cache; the async API calls it
+    directly through AsyncSession.run_sync().
+    """
+    jobs_query, sort_key = _job_search_query(session, query, job_types, location, accommodations)
+    if after is not None and len(sort_key) == 3 and len(after) == 3:
+        # Compare ranks as REAL, the type ts_rank_cd returns
+        after = [cast(after[0], REAL)] + list(after[1:])
+    jobs_query = keyset_filter(jobs_query, sort_key, after)
+    rows = jobs_query.order_by(*[column.desc() for column in sort_key]).limit(limit).offset(offset).all()
+    return [JobSummary(*row) for row in rows]
+
+def job_search_statement(session, query=None, job_types=None, location=None, accommodations=None):
+    """Select statement for every matching job, in listing order, for streaming"""
+    jobs_query, sort_key = _job_search_query(session, query, job_types, location, accommodations)
+    return jobs_query.order_by(*[column.desc() for column in sort_key]).statement
+
+def stream_jobs(query=None, job_types=None, location=None, accommodations=None, batch_size=STREAM_BATCH_SIZE):
+    """Yield every matching job as a JobSummary from a server-side cursor.
+
+    Rows arrive batch_size at a time, so memory stays flat however many jobs
+    match. The stream reads from its own snapshot session, which lives as
+    long as the generator rather than the caller's unit of work. Like a
+    read-only unit, it stays on the primary while jobs were recently written.
+    """
+    session = Session(bind=read_snapshot_engine(bool(replica_engines) and not shared_cache.recently_written(['jobs'])))
+    try:
+        statement = job_search_statement(session, query, job_types, location, accommodations)
+        for row in session.execute(statement, execution_options={'yield_per': batch_size}):
+            yield JobSummary(*row)
     finally:
         session.close()
 
+# Read cache tag whose version every committed write to a model's table changes
+TABLE_TAGS = {Job: 'jobs', Company: 'companies'}
+
+def table_version(model):
+    """Version token of a Job or Company table's data, new after every committed write to it.
+
+    Collection validators use it besides max(updated_at): updated_at is
+    taken at flush, so a transaction committing after a poll can add a row
+    older than the latest one and leave the maximum unchanged.
+    """
+    return shared_cache.tag_version(TABLE_TAGS[model])
+
+def find_last_modified(session, model, row_id=None):
+    """Latest updated_at of a Job or Company row, or of the whole table.
+
+    Both are single index lookups, cheap enough to run on every poll.
+    Returns None when the row or table is empty.
+    """
+    if row_id is None:
+        return session.query(func.max(model.updated_at)).scalar()
+    return session.query(model.updated_at).filter(model.id == row_id).scalar()
+
+@cache.cached(JOBS_CACHE_TTL, tags=lambda *args, **kwargs: ['jobs'])
+def search_jobs(query=None, job_types=None, location=None, accommodations=None, limit=50, offset=0, after=None):
+    """Search jobs in the database, ranked by full-text relevance when a query is given.
+
+    Returns JobSummary rows. after is the job_sort_key() of the last job
+    already seen and continues the listing from there (keyset pagination).
+    """
+    session = get_db_session()
+    try:
+        return find_jobs(session, query, job_types, location, accommodations, limit, offset, after)
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error searching jobs: {str(e)}")
+        raise
+    finally:
+        release_session(session)
+
+_job_index = matching.JobIndex()
+_job_index_lock = threading.Lock()
+_job_index_version = None
+
+def sync_job_index(session, index):
+    """Add the jobs written since index was last synced, read in batches"""
+    jobs_query = session.query(
+        Job.id, Job.title, Job.description, Job.requirements, Job.location, Job.job_type, Job.accommodations,
+        Job.updated_at
+    )
+    if index.synced_through is not None:
+        # Served by ix_jobs_updated_at
+        jobs_query = jobs_query.filter(Job.updated_at >= index.synced_through - MATCH_INDEX_SYNC_OVERLAP)
+    index.add_jobs(jobs_query.yield_per(STREAM_BATCH_SIZE))
+
+def get_job_index():
+    """Return the process-wide job match index, synced if jobs changed anywhere.
+
+    The first call indexes every job; later ones only read jobs written
+    since, and only after a write to jobs in some process bumped the shared
+    'jobs' tag version.
+    """
+    global _job_index_version
+    with _job_index_lock:
+        # Read before syncing, so a write during the sync triggers another one
+        version = shared_cache.tag_version('jobs')
+        if version != _job_index_version:
+            session = get_db_session()
+            try:
+                with replica_reads(not shared_cache.recently_written(['jobs'])):
+                    sync_job_index(session, _job_index)
+            except Exception as e:
+                rollback_session(session)
+                print(f"Error syncing job match index: {str(e)}")
+                raise
+            finally:
+                release_session(session)
+            _job_index_version = version
+    return _job_index
+
+def recommend_jobs(profile, keywords=None, limit=20):
+    """Jobs that best match a profile dict, best first, as JobSummary rows with match_score.
+
+    See utils.matching for how desired role, skills, accessibility needs,
+    location and preferred job types are scored.
+    """
+    matches = get_job_index().top(matching.profile_query(profile, keywords), limit)
+    if not matches:
+        return []
+    session = get_db_session()
+    try:
+        rows = _job_summary_query(session).filter(Job.id.in_([match.job_id for match in matches])).all()
+        jobs = {row.id: row for row in rows}
+        return [
+            JobSummary(*jobs[match.job_id], match_score=match.score)
+            for match in matches if match.job_id in jobs
+        ]
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error recommending jobs: {str(e)}")
+        raise
+    finally:
+        release_session(session)
+
 def load_companies():
     """Load companies from database"""
     try:
@@ -39,12 +428,14 @@ def load_companies():
         companies = session.query(Company).all()
         return companies
     except Exception as e:
+        rollback_session(session)
         print(f"Error loading companies: {str(e)}")
         raise
     finally:
-        session.close()
+        release_session(session)
 
 def save_company_verification(verification_data):
+    hashed_password = auth.hash_password(verification_data['password'])
     session = get_db_session()
     try:
         company = Company(
@@ -57,17 +448,21 @@ def save_company_verification(verification_data):
             commitments=verification_data['commitments'],
             documentation=verification_data['documentation'],
             additional_info=verification_data['additional_info'],
-            password=verification_data['password'],
+            password=hashed_password,
             verified=False,
             verification_status='pending'
         )
         session.add(company)
-        session.commit()
+        notifications.enqueue(session, [notifications.verification_received_notification(
+            verification_data['company_name'], verification_data['contact_email']
+        )])
+        commit_session(session)
+        invalidate_cache('companies')
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         raise e
     finally:
-        session.close()
+        release_session(session)
 
 def get_company_by_email(email):
     """Get company by email"""
@@ -76,26 +471,58 @@ def get_company_by_email(email):
         company = session.query(Company).filter_by(contact_email=email).first()
         return company
     except Exception as e:
+        rollback_session(session)
         print(f"Error fetching company by email: {str(e)}")
         return None
     finally:
-        session.close()
+        release_session(session)
 
 def check_password(stored_password, provided_password):
     """Check if the provided password matches the stored password"""
-    return check_password_hash(stored_password, provided_password)
+    return auth.verify_password(stored_password, provided_password)
+
+def find_credentials(session, role, email):
+    """(id, email, password) of the user or company (role) signing in with email, or None"""
+    if role == 'company':
+        return session.query(Company.id, Company.contact_email, Company.password).filter_by(
+            contact_email=email
+        ).first()
+    return session.query(User.id, User.email, User.password).filter_by(email=email).first()
+
+def authenticate_company(email, password):
+    """Check a company's password and return (token, company id), or None.
 
+    The token carries the company id, so pages and the API authorize the
+    company without looking it up again.
+    """
+    session = get_db_session()
+    try:
+        company = find_credentials(session, 'company', email)
+    except Exception:
+        rollback_session(session)
+        raise
+    finally:
+        release_session(session)
+    # Checked after the connection is back in the pool; hashing is slow
+    if not auth.verify_password(company.password if company else None, password):
+        return None
+    return auth.issue_token(auth.Principal(company.id, 'company', email)), company.id
+
+@cache.cached(PROFILE_CACHE_TTL, tags=lambda company_id: [f'company:{company_id}'])
 def get_company_profile(company_id):
-    """Get company profile data"""
+    """Get company profile data as a CompanyProfile, or None"""
     session = get_db_session()
     try:
-        company = session.query(Company).filter_by(id=company_id).first()
-        return company
+        row = session.query(*[getattr(Company, field) for field in CompanyProfile._fields]).filter_by(
+            id=company_id
+        ).first()
+        return CompanyProfile._make(row) if row else None
     except Exception as e:
+        rollback_session(session)
         print(f"Error fetching company profile: {str(e)}")
         return None
     finally:
-        session.close()
+        release_session(session)
 
 def update_company_profile(company_id, profile_data):
     """Update company profile"""
@@ -107,60 +534,130 @@ def update_company_profile(company_id, profile_data):
             company.description = profile_data['description']
             company.accessibility_features = profile_data['accessibility_features']
             company.culture = profile_data['culture']
-            session.commit()
+            commit_session(session)
+            invalidate_cache(f'company:{company_id}', 'companies', 'jobs')
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         raise e
     finally:
-        session.close()
+        release_session(session)
 
+@cache.cached(JOBS_CACHE_TTL, tags=lambda company_id: ['jobs'])
 def get_company_jobs(company_id):
     """Get jobs posted by a company"""
     session = get_db_session()
     try:
-        jobs = session.query(Job).filter_by(company_id=company_id).all()
-        for job in jobs:
-            job.accommodations = _safe_json_loads(job.accommodations, [])
-        return jobs
+        rows = _job_summary_query(session).filter(Job.company_id == company_id).order_by(
+            Job.posted_date.desc(), Job.id.desc()
+        ).all()
+        return [JobSummary(*row) for row in rows]
     except Exception as e:
+        rollback_session(session)
         print(f"Error fetching company jobs: {str(e)}")
         return []
     finally:
-        session.close()
+        release_session(session)
 
+def _company_applications_query(session, company_id):
+    return session.query(
+        JobApplication.id,
+        JobApplication.job_id,
+        Job.title,
+        User.name,
+        User.email,
+        User.resume_data,
+        JobApplication.status,
+        JobApplication.applied_date,
+        JobApplication.resume_key
+    ).join(Job, JobApplication.job_id == Job.id).outerjoin(
+        User, JobApplication.user_id == User.id
+    ).filter(Job.company_id == company_id)
+
+def _application_dict(row):
+    return {
+        "application_id": row.id,
+        "job_id": row.job_id,
+        "job_title": row.title or "Unknown Role",
+        "user_name": row.name or "Unknown",
+        "user_email": row.email or "",
+        "user_resume": row.resume_data or {},
+        "status": row.status,
+        "applied_date": row.applied_date,
+        "resume_key": row.resume_key,
+    }
+
+@cache.cached(APPLICATIONS_CACHE_TTL, tags=lambda company_id: ['applications'])
 def get_applications_for_company(company_id):
     """Get job applications for a company in a UI-friendly format."""
     session = get_db_session()
     try:
-        applications = session.query(JobApplication).options(
-            joinedload(JobApplication.user),
-            joinedload(JobApplication.job).joinedload(Job.company)
-        ).filter(JobApplication.job.has(company_id=company_id)).all()
-
-        results = []
-        for app in applications:
-            resume_payload = _safe_json_loads(app.user.resume_data if app.user else None, {})
-            user_name = app.user.name if app.user and app.user.name else "Unknown"
-            user_email = app.user.email if app.user else ""
-            job_title = app.job.title if app.job else "Unknown Role"
-
-            results.append({
-                "application_id": app.id,
-                "job_id": app.job_id,
-                "job_title": job_title,
-                "user_name": user_name,
-                "user_email": user_email,
-                "user_resume": resume_payload,
-                "status": app.status,
-                "applied_date": app.applied_date,
-            })
-
-        return results
+        rows = _company_applications_query(session, company_id).order_by(JobApplication.applied_date.desc()).all()
+        return [_application_dict(row) for row in rows]
     except Exception as e:
+        rollback_session(session)
         print(f"Error fetching applications for company: {str(e)}")
         return []
     finally:
-        session.close()
+        release_session(session)
+
+# Orders of find_ranked_applications, as sort keys of its application dicts
+RANKED_APPLICATION_SORT_KEYS = {
+    'score': lambda application: [application['score'], application['applied_date'], application['application_id']],
+    'applied_date': lambda application: [application['applied_date'], application['application_id']],
+}
+
+def find_ranked_applications(session, company_id, job_id=None, sort='score', skills=()):
+    """Every application to a company's jobs, or to one of them, with its ranking score.
+
+    Each is a get_applications_for_company dict with score, skills_score,
+    experience_score and education_score added (see utils.ranking), ordered
+    by RANKED_APPLICATION_SORT_KEYS[sort] descending: best match or newest
+    first. With skills, only applicants whose profile lists all of them
+    are kept; the filter runs in SQL on the profile index. Also runs on the
+    async API through AsyncSession.run_sync.
+    """
+    if sort not in RANKED_APPLICATION_SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(RANKED_APPLICATION_SORT_KEYS)}")
+    applications_query = _company_applications_query(session, company_id).add_columns(Job.requirements)
+    if job_id is not None:
+        applications_query = applications_query.filter(JobApplication.job_id == job_id)
+    if skills:
+        applications_query = applications_query.filter(User.resume_data.contains({'skills': list(skills)}))
+
+    by_job = {}
+    for row in applications_query.all():
+        by_job.setdefault(row.job_id, []).append(row)
+
+    applications = []
+    for job_id, rows in by_job.items():
+        found = [_application_dict(row) for row in rows]
+        # One batch per job, so its requirements are parsed once
+        scores = ranking.rank_job_applicants(
+            job_id, rows[0].title, rows[0].requirements,
+            [(application['application_id'], application['user_resume']) for application in found]
+        )
+        for application in found:
+            score = scores[application['application_id']]
+            application.update(
+                score=score.score, skills_score=score.skills, experience_score=score.experience,
+                education_score=score.education
+            )
+        applications.extend(found)
+    applications.sort(key=RANKED_APPLICATION_SORT_KEYS[sort], reverse=True)
+    return applications
+
+@cache.cached(APPLICATIONS_CACHE_TTL, tags=lambda company_id, job_id=None, sort='score', skills=(): ['applications'])
+def rank_applications(company_id, job_id=None, sort='score', skills=()):
+    """Applications to a company's jobs, or to one of them, best match (or newest) first"""
+    session = get_db_session()
+    try:
+        return find_ranked_applications(session, company_id, job_id, sort, skills)
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error ranking applications: {str(e)}")
+        raise
+    finally:
+        release_session(session)
 
 def post_new_job(job_data, company_id=None):
     """Post a new job for a company."""
@@ -175,67 +672,257 @@ def post_new_job(job_data, company_id=None):
             title=job_data['title'],
             location=job_data['location'],
             job_type=job_data['job_type'],
-            accommodations=json.dumps(job_data.get('accommodations', [])),
+            accommodations=list(job_data.get('accommodations', [])),
             description=job_data.get('description', ''),
             requirements=job_data.get('requirements', ''),
             posted_date=datetime.utcnow()
         )
         session.add(job)
-        session.commit()
+        commit_session(session)
+        invalidate_cache('jobs')
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         print(f"Error posting new job: {str(e)}")
         raise
     finally:
-        session.close()
+        release_session(session)
+
+def insert_jobs(session, company_id, jobs, batch_size=BULK_INSERT_BATCH_SIZE):
+    """Insert many validated jobs for a company with session and return their ids.
+
+    Rows go out batch_size at a time as multi-row INSERTs in the session's
+    transaction; the caller commits. Also runs on the async API through
+    AsyncSession.run_sync.
+    """
+    if session.get(Company, company_id) is None:
+        raise ValueError(f"Company {company_id} does not exist")
+    posted_date = datetime.utcnow()
+    job_ids = []
+    for start in range(0, len(jobs), batch_size):
+        rows = [{
+            'company_id': company_id,
+            'title': job['title'],
+            'location': job['location'],
+            'job_type': job['job_type'],
+            'accommodations': list(job.get('accommodations', [])),
+            'description': job.get('description', ''),
+            'requirements': job.get('requirements', ''),
+            'posted_date': posted_date
+        } for job in jobs[start:start + batch_size]]
+        job_ids.extend(session.execute(insert(Job).returning(Job.id), rows).scalars().all())
+    return job_ids
+
+def bulk_post_jobs(company_id, jobs):
+    """Post many validated jobs for a company in one transaction.
+
+    jobs are dicts with the post_new_job fields (see utils.job_import for
+    parsing and validation); either all of them are stored or none.
+    """
+    session = get_db_session()
+    try:
+        job_ids = insert_jobs(session, company_id, jobs)
+        commit_session(session)
+        invalidate_cache('jobs')
+        return job_ids
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error importing jobs: {str(e)}")
+        raise
+    finally:
+        release_session(session)
+
+def count_applications(session, changes):
+    """Apply {(job_id, status): change} to the per-job application counters.
+
+    One upsert in the caller's transaction covers every counter, so the
+    counts commit or roll back together with the applications they count.
+    Rows are written in key order, so concurrent callers cannot deadlock.
+    """
+    rows = [
+        {'job_id': job_id, 'status': status, 'count': change}
+        for (job_id, status), change in sorted(changes.items()) if change and job_id is not None
+    ]
+    if not rows:
+        return
+    statement = pg_insert(ApplicationCount).values(rows)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[ApplicationCount.job_id, ApplicationCount.status],
+        set_={'count': ApplicationCount.count + statement.excluded['count']}
+    ))
+
+def find_application_counts(session, company_id):
+    """Application counts of a company's jobs as {job_id: {status: count}}, from the counters table"""
+    rows = session.query(ApplicationCount.job_id, ApplicationCount.status, ApplicationCount.count).join(
+        Job, ApplicationCount.job_id == Job.id
+    ).filter(Job.company_id == company_id, ApplicationCount.count > 0).all()
+    counts = {}
+    for row in rows:
+        counts.setdefault(row.job_id, {})[row.status] = row.count
+    return counts
+
+@cache.cached(APPLICATIONS_CACHE_TTL, tags=lambda company_id: ['applications'])
+def get_application_counts(company_id):
+    """Application counts of a company's jobs by status, without loading any application"""
+    session = get_db_session()
+    try:
+        return find_application_counts(session, company_id)
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error fetching application counts: {str(e)}")
+        raise
+    finally:
+        release_session(session)
 
 def send_email_to_applicant(application_id, email_data):
-    """Placeholder notification flow that also updates application status."""
+    """Update an application's status and queue the email to its applicant.
+
+    The email goes to the notification outbox in the same transaction as the
+    status change and is delivered by the background workers.
+    """
     session = get_db_session()
     try:
-        application = session.query(JobApplication).filter_by(id=application_id).first()
-        if not application:
+        row = session.query(JobApplication, Job.title, User.name, User.email).join(
+            Job, JobApplication.job_id == Job.id
+        ).outerjoin(User, JobApplication.user_id == User.id).filter(
+            JobApplication.id == application_id
+        ).with_for_update(of=JobApplication).first()
+        if not row:
             return False
 
-        if isinstance(email_data, dict) and email_data.get("status"):
+        application = row.JobApplication
+        email_data = email_data if isinstance(email_data, dict) else {}
+        if email_data.get("status") and email_data["status"] != application.status:
+            count_applications(session, {
+                (application.job_id, application.status or 'applied'): -1, (application.job_id, email_data["status"]): 1
+            })
             application.status = email_data["status"]
-            session.commit()
+        notice = ApplicationNotice(application.id, application.job_id, row.title, row.name, row.email, application.status)
+        notifications.enqueue(session, [notifications.application_status_notification(
+            notice, email_data.get('subject'), email_data.get('message')
+        )])
+        commit_session(session)
+        invalidate_cache('applications')
 
         return True
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         print(f"Error sending email: {str(e)}")
         return False
     finally:
-        session.close()
+        release_session(session)
 
-def get_user_profile(email, password):
-    """Get user profile by email and verify password"""
+def set_application_statuses(session, company_id, application_ids, status, email_data=None):
+    """Move many of a company's applications to status with one UPDATE.
+
+    Ids that do not exist or belong to another company's jobs are left
+    alone. The applicants, read back by the same statement, are notified
+    through the outbox with one INSERT in the same transaction; email_data
+    may override the default 'subject' and 'message'. Returns one
+    ApplicationNotice per updated application. The caller commits; also
+    runs on the async API through AsyncSession.run_sync.
+    """
+    if status not in APPLICATION_STATUSES:
+        raise ValueError(f"Unknown application status: {status}")
+    application_ids = sorted(set(application_ids))
+    if len(application_ids) > MAX_STATUS_UPDATE_BATCH:
+        raise ValueError(f"At most {MAX_STATUS_UPDATE_BATCH} applications can be updated at once")
+    if not application_ids:
+        return []
+
+    # Locks the rows in id order and keeps their status before the update, for the counters
+    previous = select(JobApplication.id, JobApplication.status).where(
+        JobApplication.id.in_(application_ids)
+    ).order_by(JobApplication.id).with_for_update().cte('previous')
+    applicant = select(User.name).where(User.id == JobApplication.user_id)
+    statement = update(JobApplication).where(
+        JobApplication.id.in_(application_ids),
+        JobApplication.id == previous.c.id,
+        JobApplication.job_id == Job.id,
+        Job.company_id == company_id
+    ).values(status=status).returning(
+        JobApplication.id,
+        JobApplication.job_id,
+        Job.title,
+        applicant.scalar_subquery(),
+        applicant.with_only_columns(User.email).scalar_subquery(),
+        JobApplication.status,
+        previous.c.status
+    ).execution_options(synchronize_session=False)
+    notices = []
+    changes = Counter()
+    for row in session.execute(statement):
+        notices.append(ApplicationNotice(*row[:-1]))
+        changes[(row.job_id, row[-1] or 'applied')] -= 1
+        changes[(row.job_id, status)] += 1
+    count_applications(session, changes)
+    email_data = email_data or {}
+    notifications.enqueue(session, [
+        notifications.application_status_notification(notice, email_data.get('subject'), email_data.get('message'))
+        for notice in notices
+    ])
+    return notices
+
+def update_application_statuses(company_id, application_ids, status, email_data=None):
+    """Change the status of many applications in one transaction; see set_application_statuses"""
     session = get_db_session()
     try:
-        user = session.query(User).filter_by(email=email).first()
-        if user and check_password_hash(user.password, password):
-            return json.loads(user.resume_data)
+        notices = set_application_statuses(session, company_id, application_ids, status, email_data)
+        commit_session(session)
+        if notices:
+            invalidate_cache('applications')
+        return notices
+    except Exception as e:
+        rollback_session(session)
+        print(f"Error updating application statuses: {str(e)}")
+        raise
+    finally:
+        release_session(session)
+
+def authenticate_user(email, password):
+    """Check a user's password and return (token, profile), or None.
+
+    The token carries the user id and email, so pages and the API
+    authorize the user without looking them up again.
+    """
+    session = get_db_session()
+    try:
+        user = session.query(User.id, User.email, User.password, User.resume_data).filter_by(email=email).first()
+    except Exception:
+        rollback_session(session)
+        raise
+    finally:
+        release_session(session)
+    # Checked after the connection is back in the pool; hashing is slow
+    if not auth.verify_password(user.password if user else None, password):
         return None
+    return auth.issue_token(auth.Principal(user.id, 'user', user.email)), user.resume_data or {}
+
+def get_user_profile(email, password):
+    """Get user profile by email and verify password"""
+    try:
+        authenticated = authenticate_user(email, password)
+        return authenticated[1] if authenticated else None
+    except auth.LoginBusy:
+        raise
     except Exception as e:
         print(f"Error fetching user profile: {str(e)}")
         return None
-    finally:
-        session.close()
 
+@cache.cached(PROFILE_CACHE_TTL, tags=lambda email: [f'user:{email}'])
 def get_user_profile_by_email(email):
     """Get user profile by email without verifying password"""
     session = get_db_session()
     try:
-        user = session.query(User).filter_by(email=email).first()
+        user = session.query(User.resume_data).filter_by(email=email).first()
         if user:
-            return json.loads(user.resume_data)
+            return user.resume_data or {}
         return None
     except Exception as e:
+        rollback_session(session)
         print(f"Error fetching user profile: {str(e)}")
         return None
     finally:
-        session.close()
+        release_session(session)
 
 def create_user_if_not_exists(username, email, password, profile_data):
     session = get_db_session()
@@ -243,38 +930,49 @@ def create_user_if_not_exists(username, email, password, profile_data):
         user = session.query(User).filter_by(email=email).first()
         if user:
             return False
-        hashed_password = generate_password_hash(password)
+        hashed_password = auth.hash_password(password)
         new_user = User(
             username=username,
             email=email,
             name=f"{profile_data.get('first_name', '')} {profile_data.get('last_name', '')}".strip(),
             password=hashed_password,
-            resume_data=json.dumps(profile_data),
+            resume_data=profile_data,
             created_at=datetime.utcnow()
         )
         session.add(new_user)
-        session.commit()
+        commit_session(session)
+        invalidate_cache(f'user:{email}')
         return True
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         raise e
     finally:
-        session.close()
+        release_session(session)
 
 def update_user_profile(email, profile_data):
-    """Update user profile"""
+    """Update the given fields of a user's profile and keep the others.
+
+    The fields are merged into the stored JSONB profile by a single
+    UPDATE, so nothing is read first and only the changed keys are sent.
+    """
     session = get_db_session()
     try:
-        user = session.query(User).filter_by(email=email).first()
-        if user:
-            user.name = f"{profile_data['first_name']} {profile_data['last_name']}"
-            user.resume_data = json.dumps(profile_data)
-            session.commit()
+        profile = func.coalesce(User.resume_data, literal({}, JSONB)).op('||', return_type=JSONB)(
+            bindparam('profile_data', profile_data, type_=JSONB)
+        )
+        values = {User.resume_data: profile}
+        if 'first_name' in profile_data or 'last_name' in profile_data:
+            values[User.name] = func.trim(func.concat(profile['first_name'].astext, ' ', profile['last_name'].astext))
+        updated = session.execute(update(User).where(User.email == email).values(values)).rowcount
+        if updated:
+            commit_session(session)
+            # Company application views embed the applicant's profile
+            invalidate_cache(f'user:{email}', 'applications')
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         raise e
     finally:
-        session.close()
+        release_session(session)
 
 def save_job_application(application_data, job_id):
     """Save job application"""
@@ -285,38 +983,61 @@ def save_job_application(application_data, job_id):
         if not user:
             raise ValueError("User account not found. Please register and log in before applying.")
 
+        # Store the resume file once by content; the row keeps only its key
+        resume = application_data.get('resume')
+        resume_key = get_blob_store().put(resume) if resume else None
+
         # Create application
         application = JobApplication(
             user_id=user.id,
             job_id=job_id,
             status='applied',
             applied_date=datetime.utcnow(),
-            resume=application_data.get('resume'),  # Save the resume file content
+            resume_key=resume_key,
             cover_letter=application_data.get('cover_letter'),  # Save the cover letter
             additional_notes=application_data.get('additional_notes')  # Save additional notes
         )
 
         session.add(application)
-        session.commit()
+        count_applications(session, {(job_id, 'applied'): 1})
+        commit_session(session)
+        invalidate_cache('applications')
     except Exception as e:
-        session.rollback()
+        rollback_session(session)
         raise e
     finally:
-        session.close()
+        release_session(session)
+
+def read_resume(resume_key):
+    """Read an uploaded resume file from the blob store"""
+    return get_blob_store().get(resume_key)
 
+@cache.cached(APPLICATIONS_CACHE_TTL, tags=lambda user_email: ['applications', f'user:{user_email}'])
 def get_job_applications(user_email):
-    """Get job applications for a user"""
+    """Get a user's job applications as ApplicationSummary rows"""
     session = get_db_session()
     try:
-        user = session.query(User).filter_by(email=user_email).first()
-        if user:
-            applications = session.query(JobApplication).options(
-                joinedload(JobApplication.job).joinedload(Job.company)
-            ).filter_by(user_id=user.id).all()
-            return applications
-        return []
+        rows = session.query(
+            JobApplication.id,
+            JobApplication.job_id,
+            Job.title,
+            Company.name,
+            Job.location,
+            Job.job_type,
+            JobApplication.status,
+            JobApplication.applied_date,
+            JobApplication.resume_key,
+            JobApplication.cover_letter,
+            JobApplication.additional_notes
+        ).join(User, JobApplication.user_id == User.id).outerjoin(
+            Job, JobApplication.job_id == Job.id
+        ).outerjoin(Company, Job.company_id == Company.id).filter(
+            User.email == user_email
+        ).order_by(JobApplication.applied_date.desc(), JobApplication.id.desc()).all()
+        return [ApplicationSummary._make(row) for row in rows]
     except Exception as e:
+        rollback_session(session)
         print(f"Error loading job applications: {str(e)}")
         raise
     finally:
-        session.close()
+        release_session(session)
@@ -0,0 +1,246 @@
+"""Bulk job import from CSV or JSON Lines feeds.
+
+Every row is parsed and validated first; the valid ones are then stored by
+data_manager.bulk_post_jobs in batched INSERTs inside a single transaction.
+Rows that fail validation are reported with their line number and field and
+are skipped, so a feed with a few bad rows still imports the rest.
+
+CSV feeds have a header row with the columns title, location, job_type,
+description, requirements and accommodations (separated by ';'). JSON Lines
+feeds have one object per line with the same keys; accommodations may be a
+list or a ';'-separated string.
+
+Also usable from the command line:
+
+    python -m utils.job_import --company-id 3 jobs.csv [--dry-run]
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from collections import namedtuple
+
+# Choices offered by the Post New Job form
+JOB_TYPES = ["Full-time", "Part-time", "Contract", "Internship", "Remote"]
+ACCOMMODATIONS = [
+    "Visual Impairment",
+    "Hearing Impairment",
+    "Mobility Support",
+    "Cognitive Support",
+    "Remote Work",
+    "Flexible Hours",
+    "Assistive Technology",
+    "Sign Language"
+]
+
+JOB_FIELDS = ('title', 'location', 'job_type', 'description', 'requirements', 'accommodations')
+REQUIRED_FIELDS = ('title', 'description', 'requirements')
+
+# Column lengths of the jobs table
+MAX_LENGTHS = {'title': 200, 'location': 100}
+
+FEED_FORMATS = ('csv', 'jsonl')
+
+RowError = namedtuple('RowError', ['row', 'field', 'message'])
+ImportReport = namedtuple('ImportReport', ['inserted', 'errors'])
+
+
+class InvalidFeed(ValueError):
+    """Raised when a feed cannot be read at all, as opposed to a bad row"""
+
+
+def feed_format(filename=None, content_type=None):
+    """Guess a feed's format from its file name or media type"""
+    if filename:
+        extension = os.path.splitext(filename)[1].lower().lstrip('.')
+        if extension in ('jsonl', 'ndjson'):
+            return 'jsonl'
+        if extension == 'csv':
+            return 'csv'
+    if content_type and 'csv' in content_type:
+        return 'csv'
+    if content_type and 'ndjson' in content_type:
+        return 'jsonl'
+    return None
+
+
+def parse_csv(text):
+    """Yield (line number, row dict) for each data row of a CSV feed"""
+    reader = csv.DictReader(io.StringIO(text))
+    if reader.fieldnames is None:
+        return
+    missing = [field for field in REQUIRED_FIELDS if field not in reader.fieldnames]
+    if missing:
+        raise InvalidFeed(f"CSV header is missing columns: {', '.join(missing)}")
+    for record in reader:
+        # line_num is the last physical line read, so quoted newlines keep numbering right
+        yield reader.line_num, record
+
+
+def parse_jsonl(text):
+    """Yield (line number, row) for each non-blank line of a JSON Lines feed"""
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, RowError(line_number, None, f"Invalid JSON: {e.msg}")
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'jsonl': parse_jsonl,
+}
+
+
+def _accommodation_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return [item.strip() for item in value if item.strip()]
+    raise TypeError("must be a list of strings or a ';'-separated string")
+
+
+def validate_row(row_number, record):
+    """Return (job dict, errors) for one parsed feed row"""
+    if not isinstance(record, dict):
+        return None, [RowError(row_number, None, "Row must be an object")]
+
+    errors = []
+    job = {}
+    for field in JOB_FIELDS[:-1]:
+        value = record.get(field)
+        if value is None:
+            value = ''
+        if not isinstance(value, str):
+            errors.append(RowError(row_number, field, "Must be a string"))
+            continue
+        job[field] = value.strip()
+
+    for field in REQUIRED_FIELDS:
+        if field in job and not job[field]:
+            errors.append(RowError(row_number, field, "Required"))
+    for field, max_length in MAX_LENGTHS.items():
+        if len(job.get(field, '')) > max_length:
+            errors.append(RowError(row_number, field, f"Longer than {max_length} characters"))
+    if 'job_type' in job:
+        job['job_type'] = job['job_type'] or JOB_TYPES[0]
+        if job['job_type'] not in JOB_TYPES:
+            errors.append(RowError(row_number, 'job_type', f"Must be one of: {', '.join(JOB_TYPES)}"))
+
+    try:
+        job['accommodations'] = _accommodation_list(record.get('accommodations'))
+    except TypeError as e:
+        errors.append(RowError(row_number, 'accommodations', f"Accommodations {e}"))
+    else:
+        unknown = [item for item in job['accommodations'] if item not in ACCOMMODATIONS]
+        if unknown:
+            errors.append(RowError(row_number, 'accommodations', f"Unknown accommodations: {', '.join(unknown)}"))
+
+    return (None, errors) if errors else (job, [])
+
+
+def validate_feed(text, fmt):
+    """Parse and validate a whole feed; return (valid jobs, row errors)"""
+    if fmt not in PARSERS:
+        raise InvalidFeed(f"Unsupported feed format: {fmt}")
+    jobs = []
+    errors = []
+    for row_number, record in PARSERS[fmt](text):
+        if isinstance(record, RowError):
+            errors.append(record)
+            continue
+        job, row_errors = validate_row(row_number, record)
+        if job is not None:
+            jobs.append(job)
+        errors.extend(row_errors)
+    return jobs, errors
+
+
+def validate_records(records):
+    """Validate already decoded rows, such as a JSON request body; rows count from 1"""
+    jobs = []
+    errors = []
+    for row_number, record in enumerate(records, start=1):
+        job, row_errors = validate_row(row_number, record)
+        if job is not None:
+            jobs.append(job)
+        errors.extend(row_errors)
+    return jobs, errors
+
+
+def validate_body(data, content_type=None):
+    """Validate an API request body: CSV, JSON Lines, a JSON list or {"jobs": [...]}"""
+    text = decode_feed(data)
+    fmt = feed_format(content_type=content_type)
+    if fmt is not None:
+        return validate_feed(text, fmt)
+    try:
+        body = json.loads(text)
+    except json.JSONDecodeError:
+        raise InvalidFeed("Body must be JSON, JSON Lines or CSV")
+    if isinstance(body, dict):
+        body = body.get('jobs')
+    if not isinstance(body, list):
+        raise InvalidFeed('Body must be a list of jobs or {"jobs": [...]}')
+    return validate_records(body)
+
+
+def import_jobs(company_id, jobs, errors, dry_run=False):
+    """Store validated jobs for a company and return an ImportReport"""
+    if dry_run or not jobs:
+        return ImportReport(0, errors)
+    from .data_manager import bulk_post_jobs
+
+    return ImportReport(len(bulk_post_jobs(company_id, jobs)), errors)
+
+
+def import_feed(company_id, text, fmt, dry_run=False):
+    """Validate a CSV or JSON Lines feed and store its valid rows"""
+    jobs, errors = validate_feed(text, fmt)
+    return import_jobs(company_id, jobs, errors, dry_run)
+
+
+def decode_feed(data):
+    """Decode an uploaded feed, accepting a UTF-8 byte order mark"""
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise InvalidFeed("Feed must be UTF-8 encoded")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import jobs for a company from a CSV or JSON Lines file")
+    parser.add_argument('path', help="feed file (.csv or .jsonl)")
+    parser.add_argument('--company-id', type=int, required=True)
+    parser.add_argument('--format', choices=FEED_FORMATS, help="defaults to the file extension")
+    parser.add_argument('--dry-run', action='store_true', help="validate only, store nothing")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or feed_format(args.path)
+    if fmt is None:
+        parser.error("cannot tell the feed format from the file name; pass --format")
+    try:
+        with open(args.path, 'rb') as feed:
+            jobs, errors = validate_feed(decode_feed(feed.read()), fmt)
+        report = import_jobs(args.company_id, jobs, errors, args.dry_run)
+    except ValueError as e:
+        print(f"Error importing jobs: {str(e)}", file=sys.stderr)
+        return 2
+
+    for error in report.errors:
+        print(f"row {error.row}: {error.field or 'row'}: {error.message}", file=sys.stderr)
+    if args.dry_run:
+        print(f"{len(jobs)} valid jobs, {len(report.errors)} errors (dry run, nothing stored)")
+    else:
+        print(f"Imported {report.inserted} jobs, {len(report.errors)} errors")
+    return 1 if report.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Match jobs against a job seeker's profile with vectorized NumPy scoring.
+
+Every job is scored on four features, each between 0 and 1:
+
+- text: cosine similarity between the IDF-weighted terms of the profile's
+  desired role and skills and the length-normalized terms of the job's
+  title, description and requirements
+- accommodations: the share of the profile's accessibility needs the job
+  offers an accommodation for
+- location: 1 for the same place or a remote job, 0.5 for the same region
+  (the last comma-separated part, e.g. the state)
+- job_type: 1 when the job type is one of the preferred ones
+
+The match score is their MATCH_WEIGHTS average over the features the
+profile fills in. JobIndex keeps the term postings and per-job feature
+columns in NumPy arrays, so a query touches only the postings of its own
+terms plus a few whole-column operations, and picks the top K with
+argpartition instead of sorting the catalog.
+
+Term weights are length-normalized term frequencies and IDF is applied to
+the query, counting only live rows, so adding jobs never rewrites the
+vectors of jobs already in the index. data_manager.recommend_jobs() keeps
+the process-wide index in step with the jobs table.
+"""
+import math
+import re
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from .job_import import ACCOMMODATIONS
+
+# Relative importance of each feature in the match score
+MATCH_WEIGHTS = {'text': 0.55, 'accommodations': 0.25, 'location': 0.1, 'job_type': 0.1}
+
+# Title words count this many times over words in the description or requirements
+TITLE_WEIGHT = 2
+
+# Profile accessibility needs and the job accommodations that serve them; a
+# need named like an accommodation is served by that accommodation
+NEED_ACCOMMODATIONS = {
+    'Screen Reader Support': ['Visual Impairment', 'Assistive Technology'],
+    'High Contrast': ['Visual Impairment'],
+    'Large Text': ['Visual Impairment'],
+    'Color Blind Support': ['Visual Impairment'],
+    'Voice Navigation': ['Mobility Support', 'Assistive Technology'],
+    'Keyboard Navigation': ['Mobility Support', 'Assistive Technology'],
+}
+
+STOP_WORDS = frozenset(
+    'an and are as at be by for from has have in is it its of on or our that the their this to we will with '
+    'you your'.split()
+)
+
+_TOKEN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+_ACCOMMODATION_BITS = {name: 1 << bit for bit, name in enumerate(ACCOMMODATIONS)}
+
+MatchQuery = namedtuple('MatchQuery', ['terms', 'needs', 'location', 'job_types'])
+JobMatch = namedtuple('JobMatch', ['job_id', 'score'])
+
+
+def tokenize(text):
+    """Lower-cased words of text, without stop words and single characters"""
+    return [token for token in _TOKEN.findall((text or '').lower()) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def accommodation_mask(accommodations):
+    """Bit mask of the known accommodations in a list"""
+    mask = 0
+    for name in accommodations or ():
+        mask |= _ACCOMMODATION_BITS.get(name, 0)
+    return mask
+
+
+def _place(location):
+    """Normalized location and its region, e.g. ('austin, tx', 'tx')"""
+    place = ', '.join(part.strip() for part in (location or '').lower().split(',') if part.strip())
+    return place, place.rsplit(', ', 1)[-1]
+
+
+def _is_remote(location, job_type, accommodations):
+    return 'remote' in (location or '').lower() or job_type == 'Remote' or 'Remote Work' in (accommodations or ())
+
+
+def profile_query(profile, keywords=None):
+    """Build a MatchQuery from a profile dict as stored in User.resume_data.
+
+    The desired role counts twice as much as any single skill; keywords,
+    e.g. from a search box, are added to the text.
+    """
+    terms = Counter(tokenize(profile.get('desired_role')) * 2)
+    skills = profile.get('skills') or []
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    for skill in skills:
+        terms.update(tokenize(skill))
+    terms.update(tokenize(keywords))
+
+    needs = 0
+    for need in profile.get('accessibility_needs') or []:
+        needs |= accommodation_mask(NEED_ACCOMMODATIONS.get(need, [need]))
+    return MatchQuery(dict(terms), needs, profile.get('location') or '', list(profile.get('preferred_job_types') or []))
+
+
+class JobIndex:
+    """Jobs as term postings and feature columns, ready to score against a MatchQuery"""
+
+    _COLUMNS = {
+        '_job_ids': np.int64,
+        '_alive': np.bool_,
+        '_accommodations': np.uint32,
+        '_locations': np.int32,
+        '_regions': np.int32,
+        '_remote': np.bool_,
+        '_job_types': np.int32,
+    }
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._size = 0
+        for name, dtype in self._COLUMNS.items():
+            setattr(self, name, np.zeros(0, dtype))
+        self._postings = {}  # term -> (rows, weights)
+        self._rows = {}  # job id -> (row, updated_at)
+        self._places = {}  # normalized location or region -> id, from 1
+        self._types = {}  # job type -> id, from 1
+        self.synced_through = None  # Latest updated_at added
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._job_ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        for name in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _place_id(self, name):
+        if not name:
+            return 0
+        return self._places.setdefault(name, len(self._places) + 1)
+
+    def add_jobs(self, jobs):
+        """Add or replace jobs; each has id, title, description, requirements,
+        location, job_type, accommodations and updated_at attributes.
+
+        A job already indexed with the same updated_at is skipped, and an
+        updated one replaces its earlier version.
+        """
+        with self._lock:
+            new_postings = {}
+            for job in jobs:
+                known = self._rows.get(job.id)
+                if known is not None:
+                    if known[1] == job.updated_at:
+                        continue
+                    self._alive[known[0]] = False
+
+                self._reserve(1)
+                row = self._size
+                self._size += 1
+                place, region = _place(job.location)
+                self._job_ids[row] = job.id
+                self._alive[row] = True
+                self._accommodations[row] = accommodation_mask(job.accommodations)
+                self._locations[row] = self._place_id(place)
+                self._regions[row] = self._place_id(region)
+                self._remote[row] = _is_remote(job.location, job.job_type, job.accommodations)
+                self._job_types[row] = self._types.setdefault(job.job_type, len(self._types) + 1)
+                self._rows[job.id] = (row, job.updated_at)
+                if job.updated_at is not None and (self.synced_through is None or job.updated_at > self.synced_through):
+                    self.synced_through = job.updated_at
+
+                counts = Counter(tokenize(job.title) * TITLE_WEIGHT)
+                counts.update(tokenize(job.description))
+                counts.update(tokenize(job.requirements))
+                weights = {term: 1 + math.log(count) for term, count in counts.items()}
+                norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+                for term, weight in weights.items():
+                    postings = new_postings.setdefault(term, ([], []))
+                    postings[0].append(row)
+                    postings[1].append(weight / norm)
+
+            # One concatenation per term for the whole batch
+            for term, (rows, weights) in new_postings.items():
+                rows = np.array(rows, np.int32)
+                weights = np.array(weights, np.float32)
+                if term in self._postings:
+                    old_rows, old_weights = self._postings[term]
+                    rows = np.concatenate([old_rows, rows])
+                    weights = np.concatenate([old_weights, weights])
+                self._postings[term] = (rows, weights)
+
+    def _text_scores(self, terms):
+        scores = np.zeros(self._size, np.float64)
+        jobs = len(self._rows)
+        weights_by_term = {}
+        for term, count in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            rows, weights = postings
+            # Replaced versions of jobs stay in the postings but not in the IDF
+            live = np.count_nonzero(self._alive[rows])
+            if live:
+                idf = math.log((1 + jobs) / (1 + live)) + 1
+                weights_by_term[term] = (1 + math.log(count)) * idf
+        if not weights_by_term:
+            return None
+        norm = math.sqrt(sum(weight * weight for weight in weights_by_term.values()))
+        for term, weight in weights_by_term.items():
+            rows, weights = self._postings[term]
+            # A term appears at most once per job, so rows has no duplicates
+            scores[rows] += weight / norm * weights
+        return scores
+
+    def scores(self, query):
+        """Match score of every row, 0 for replaced versions of jobs"""
+        size = self._size
+        features = []
+        text = self._text_scores(query.terms) if query.terms else None
+        if text is not None:
+            features.append(('text', text))
+        if query.needs:
+            offered = np.bitwise_count(self._accommodations[:size] & np.uint32(query.needs))
+            features.append(('accommodations', offered.astype(np.float32) / int(query.needs).bit_count()))
+        place, region = _place(query.location)
+        if place:
+            # Location score per place id, gathered for every job at once
+            place_scores = np.zeros(len(self._places) + 1, np.float32)
+            if region in self._places:
+                place_scores[self._places[region]] = 0.5
+            region_scores = place_scores[self._regions[:size]]
+            place_scores[:] = 0
+            if place in self._places:
+                place_scores[self._places[place]] = 1
+            location = np.maximum(region_scores, place_scores[self._locations[:size]])
+            location[self._remote[:size]] = 1
+            features.append(('location', location))
+        if query.job_types:
+            preferred = np.zeros(len(self._types) + 1, np.float32)
+            preferred[[self._types[job_type] for job_type in query.job_types if job_type in self._types]] = 1
+            features.append(('job_type', preferred[self._job_types[:size]]))
+
+        total = np.zeros(size, np.float64)
+        if not features:
+            return total
+        for name, values in features:
+            total += MATCH_WEIGHTS[name] * values
+        total /= sum(MATCH_WEIGHTS[name] for name, values in features)
+        # Float rounding can take a perfect match a hair over 1
+        np.clip(total, 0, 1, out=total)
+        total[~self._alive[:size]] = 0
+        return total
+
+    def top(self, query, limit=20):
+        """The limit best matching jobs, best first, as JobMatch rows"""
+        if limit <= 0:
+            return []
+        with self._lock:
+            scores = self.scores(query)
+            rows = np.flatnonzero(scores > 0)
+            if len(rows) > limit:
+                rows = rows[np.argpartition(scores[rows], -limit)[-limit:]]
+            # Best score first, newer job first among equal scores
+            rows = rows[np.lexsort((-self._job_ids[rows], -scores[rows]))]
+            return [JobMatch(int(job_id), float(score)) for job_id, score in zip(self._job_ids[rows], scores[rows])]
@@ -0,0 +1,403 @@
+"""Online schema migrations for existing databases.
+
+init_db() only creates missing tables, so indexes and columns added to the
+models after a database was created are applied here. Applied migrations
+are recorded in the schema_migrations table and skipped on later runs.
+Every migration is still idempotent and safe to re-run against a live
+database, by name:
+
+    python -m utils.migrations
+    python -m utils.migrations 0007_application_counts
+"""
+import json
+import logging
+import re
+import sys
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.schema import CreateIndex
+from werkzeug.security import generate_password_hash
+
+from .blob_store import BlobNotFound, get_blob_store
+from .models import ApplicationCount, Company, Job, JobApplication, User, engine
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction when backfilling existing data
+BACKFILL_BATCH_SIZE = 1000
+
+# Prefixes of werkzeug password hashes; any other stored password is plaintext
+PASSWORD_HASH_PREFIXES = ('scrypt:', 'pbkdf2:')
+
+# Key of the advisory lock that keeps two runs from applying migrations at once
+MIGRATION_LOCK_KEY = 7310420513
+
+
+def _model_index(model, name):
+    """Look up an index declared on a model's table by name"""
+    for index in model.__table__.indexes:
+        if index.name == name:
+            return index
+    raise KeyError(f"Index {name} is not declared on {model.__tablename__}")
+
+
+def _drop_invalid_index(conn, name):
+    """Drop an index left INVALID by an interrupted concurrent build"""
+    invalid = conn.execute(text("""
+        SELECT 1 FROM pg_class c
+        JOIN pg_index i ON i.indexrelid = c.oid
+        WHERE c.relname = :name AND NOT i.indisvalid
+    """), {"name": name}).first()
+    if invalid:
+        logger.warning(f"Dropping invalid index {name}")
+        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def create_index_concurrently(conn, index):
+    """Build a model index without blocking writes on its table"""
+    _drop_invalid_index(conn, index.name)
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=conn.dialect))
+    ddl = re.sub(r'^CREATE (UNIQUE )?INDEX', r'CREATE \1INDEX CONCURRENTLY', ddl)
+    conn.exec_driver_sql(ddl)
+
+
+def _jobs_search_document_index(conn):
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_search_document'))
+
+
+def _keyset_pagination_indexes(conn):
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_posted_date_id'))
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_company_id_posted_date_id'))
+    create_index_concurrently(
+        conn, _model_index(JobApplication, 'ix_job_applications_user_id_applied_date_id')
+    )
+
+
+def _column_exists(conn, table, column):
+    return conn.execute(text("""
+        SELECT 1 FROM information_schema.columns
+        WHERE table_name = :table AND column_name = :column
+    """), {"table": table, "column": column}).first() is not None
+
+
+def _parse_legacy_accommodations(value):
+    """Decode the JSON text accommodations used to be stored as"""
+    try:
+        parsed = json.loads(value)
+    except (TypeError, json.JSONDecodeError):
+        return []
+    if not isinstance(parsed, list):
+        return []
+    return [str(item) for item in parsed]
+
+
+def _backfill_accommodation_tags(conn):
+    """Copy legacy JSON accommodations into accommodation_tags in id-ordered batches.
+
+    Each batch commits on its own, so row locks stay short and an interrupted
+    backfill resumes where it stopped on the next run.
+    """
+    if not _column_exists(conn, 'jobs', 'accommodations'):
+        return
+    last_id = 0
+    while True:
+        with conn.engine.begin() as batch:
+            rows = batch.execute(text("""
+                SELECT id, accommodations FROM jobs
+                WHERE id > :last_id
+                  AND accommodation_tags IS NULL
+                  AND accommodations IS NOT NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            batch.execute(
+                text("UPDATE jobs SET accommodation_tags = :tags WHERE id = :id AND accommodation_tags IS NULL"),
+                [{"id": row.id, "tags": _parse_legacy_accommodations(row.accommodations)} for row in rows]
+            )
+        last_id = rows[-1].id
+        logger.info(f"Backfilled accommodation_tags up to job {last_id}")
+
+
+def _accommodation_tags(conn):
+    conn.execute(text("ALTER TABLE jobs ADD COLUMN IF NOT EXISTS accommodation_tags TEXT[]"))
+    _backfill_accommodation_tags(conn)
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_accommodation_tags'))
+
+
+def _filter_and_foreign_key_indexes(conn):
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_job_type_posted_date'))
+    create_index_concurrently(conn, _model_index(Job, 'ix_jobs_location_trgm'))
+    create_index_concurrently(conn, _model_index(JobApplication, 'ix_job_applications_job_id_status'))
+
+
+def _stored_blob_key(blob_store, data):
+    """Put data in the blob store and return its key, or None unless it reads back intact"""
+    key = blob_store.put(data)
+    try:
+        if blob_store.get(key) == data:
+            return key
+    except BlobNotFound:
+        pass
+    logger.error(f"Blob {key} does not read back from the blob store")
+    return None
+
+
+def _move_resumes_to_blob_store(conn):
+    """Copy inline resume blobs into the blob store and keep only their keys.
+
+    A resume is cleared from its row only after it reads back intact
+    through the configured blob store; the others keep their inline copy,
+    and the migration returns False so it is retried on the next run. Run
+    this where BLOB_STORE_BACKEND and BLOB_STORE_PATH name the same store
+    as the app hosts.
+    """
+    conn.execute(text("ALTER TABLE job_applications ADD COLUMN IF NOT EXISTS resume_key VARCHAR(64)"))
+    blob_store = get_blob_store()
+    last_id = 0
+    complete = True
+    while True:
+        with conn.engine.begin() as batch:
+            rows = batch.execute(text("""
+                SELECT id, resume FROM job_applications
+                WHERE id > :last_id AND resume IS NOT NULL AND resume_key IS NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            moved = []
+            for row in rows:
+                key = _stored_blob_key(blob_store, bytes(row.resume))
+                if key is not None:
+                    moved.append({"id": row.id, "key": key})
+                else:
+                    complete = False
+            if moved:
+                batch.execute(
+                    text("UPDATE job_applications SET resume_key = :key, resume = NULL WHERE id = :id"), moved
+                )
+        last_id = rows[-1].id
+        logger.info(f"Moved resumes to the blob store up to application {last_id}")
+    return complete
+
+
+def _updated_at_columns(conn):
+    """Add updated_at to companies and jobs; existing rows start at migration time.
+
+    The default is stable, so PostgreSQL records it without rewriting the table.
+    """
+    for model in (Company, Job):
+        table = model.__tablename__
+        conn.execute(text(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP NOT NULL "
+            "DEFAULT timezone('utc', now())"
+        ))
+        create_index_concurrently(conn, _model_index(model, f'ix_{table}_updated_at'))
+
+
+def _application_counts(conn):
+    """Create the per-job application counters and recount them from job_applications.
+
+    Application writes are blocked only while the counts are recomputed, so
+    no insert or status change can slip between the recount and the code
+    that keeps the counters current from then on.
+    """
+    ApplicationCount.__table__.create(conn, checkfirst=True)
+    with conn.engine.begin() as recount:
+        recount.execute(text("LOCK TABLE job_applications IN SHARE MODE"))
+        recount.execute(text("DELETE FROM job_application_counts"))
+        recount.execute(text("""
+            INSERT INTO job_application_counts (job_id, status, count)
+            SELECT job_id, COALESCE(status, 'applied'), COUNT(*) FROM job_applications
+            WHERE job_id IS NOT NULL
+            GROUP BY job_id, COALESCE(status, 'applied')
+        """))
+
+
+def _is_password_hash(value):
+    return value.startswith(PASSWORD_HASH_PREFIXES)
+
+
+def _hash_company_passwords(conn):
+    """Replace plaintext company passwords, stored before they were hashed, with their hashes"""
+    last_id = 0
+    while True:
+        with conn.engine.begin() as batch:
+            rows = batch.execute(text("""
+                SELECT id, password FROM companies
+                WHERE id > :last_id
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            plaintext = [row for row in rows if not _is_password_hash(row.password)]
+            if plaintext:
+                # Matching the old value skips a password changed since it was read
+                batch.execute(
+                    text("UPDATE companies SET password = :hash WHERE id = :id AND password = :password"),
+                    [{"id": row.id, "password": row.password, "hash": generate_password_hash(row.password)}
+                     for row in plaintext]
+                )
+        last_id = rows[-1].id
+        logger.info(f"Hashed company passwords up to company {last_id}")
+
+
+def _parse_legacy_profile(value):
+    """Profile dict from the legacy resume_data JSON text; malformed text gives an empty profile"""
+    try:
+        profile = json.loads(value)
+    except (TypeError, ValueError):
+        return {}
+    return profile if isinstance(profile, dict) else {}
+
+
+def _backfill_user_profiles(conn):
+    """Copy legacy resume_data JSON text into the JSONB profile column in id-ordered batches"""
+    if not _column_exists(conn, 'users', 'resume_data'):
+        return
+    last_id = 0
+    while True:
+        with conn.engine.begin() as batch:
+            rows = batch.execute(text("""
+                SELECT id, resume_data FROM users
+                WHERE id > :last_id
+                  AND profile IS NULL
+                  AND resume_data IS NOT NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+            if not rows:
+                break
+            batch.execute(
+                text("UPDATE users SET profile = :profile WHERE id = :id AND profile IS NULL").bindparams(
+                    bindparam('profile', type_=JSONB)
+                ),
+                [{"id": row.id, "profile": _parse_legacy_profile(row.resume_data)} for row in rows]
+            )
+        last_id = rows[-1].id
+        logger.info(f"Backfilled user profiles up to user {last_id}")
+
+
+def _user_profile_jsonb(conn):
+    """Move user profiles from JSON text (resume_data) to a JSONB column with a containment index.
+
+    resume_data is left in place, unread, like the legacy jobs.accommodations.
+    """
+    conn.execute(text("ALTER TABLE users ADD COLUMN IF NOT EXISTS profile JSONB"))
+    _backfill_user_profiles(conn)
+    create_index_concurrently(conn, _model_index(User, 'ix_users_profile'))
+
+
+def _set_not_null(conn, table, column):
+    """SET NOT NULL without holding an exclusive lock for a full table scan.
+
+    The NOT VALID check is validated under a lock that lets writes through,
+    and PostgreSQL then trusts it instead of scanning again.
+    """
+    check = f"{table}_{column}_not_null"
+    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check}"))
+    conn.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID"))
+    conn.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}"))
+    conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL"))
+    conn.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {check}"))
+
+
+def _backfill_null_dates(conn, table, column, fallback):
+    """Set NULL column values to the fallback SQL expression in id-ordered batches"""
+    last_id = 0
+    while True:
+        with conn.engine.begin() as batch:
+            ids = batch.execute(text(f"""
+                SELECT id FROM {table}
+                WHERE id > :last_id AND {column} IS NULL
+                ORDER BY id
+                LIMIT :batch_size
+            """), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).scalars().all()
+            if not ids:
+                break
+            batch.execute(
+                text(
+                    f"UPDATE {table} SET {column} = {fallback} WHERE id IN :ids AND {column} IS NULL"
+                ).bindparams(bindparam('ids', expanding=True)),
+                {"ids": ids}
+            )
+        last_id = ids[-1]
+        logger.info(f"Backfilled {table}.{column} up to id {last_id}")
+
+
+def _keyset_dates_not_null(conn):
+    """Backfill and forbid NULL posted_date and applied_date.
+
+    A NULL in a keyset (date, id) tuple compares as unknown, so such rows
+    were skipped by cursors and a cursor holding one ended the listing. New
+    rows, including raw inserts, get the current UTC time by default.
+    """
+    for table, column, fallback in (
+        ('jobs', 'posted_date', "updated_at"),
+        ('job_applications', 'applied_date', "timezone('utc', now())"),
+    ):
+        conn.execute(text(f"ALTER TABLE {table} ALTER COLUMN {column} SET DEFAULT timezone('utc', now())"))
+        _backfill_null_dates(conn, table, column, fallback)
+        _set_not_null(conn, table, column)
+
+
+# Applied in order; each entry must be idempotent. One that returns False
+# is not recorded as applied, so it runs again next time.
+MIGRATIONS = [
+    ('0001_jobs_search_document_index', _jobs_search_document_index),
+    ('0002_keyset_pagination_indexes', _keyset_pagination_indexes),
+    ('0003_accommodation_tags', _accommodation_tags),
+    ('0004_filter_and_foreign_key_indexes', _filter_and_foreign_key_indexes),
+    ('0005_resume_blob_store', _move_resumes_to_blob_store),
+    ('0006_updated_at_columns', _updated_at_columns),
+    ('0007_application_counts', _application_counts),
+    ('0008_hash_company_passwords', _hash_company_passwords),
+    ('0009_user_profile_jsonb', _user_profile_jsonb),
+    ('0010_keyset_dates_not_null', _keyset_dates_not_null),
+]
+
+
+def applied_migrations(conn):
+    """Names of the migrations recorded in schema_migrations, created if missing"""
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name VARCHAR(255) PRIMARY KEY,
+            applied_at TIMESTAMP NOT NULL DEFAULT timezone('utc', now())
+        )
+    """))
+    return set(conn.execute(text("SELECT name FROM schema_migrations")).scalars())
+
+
+def run_migrations(bind=None, rerun=()):
+    """Apply pending migrations, and those named in rerun, outside of a transaction block"""
+    bind = bind if bind is not None else engine
+    unknown = set(rerun) - {name for name, migration in MIGRATIONS}
+    if unknown:
+        raise ValueError(f"Unknown migrations: {', '.join(sorted(unknown))}")
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            applied = applied_migrations(conn)
+            for name, migration in MIGRATIONS:
+                if name in applied and name not in rerun:
+                    continue
+                logger.info(f"Applying migration {name}")
+                if migration(conn) is False:
+                    logger.warning(f"Migration {name} is incomplete and will run again")
+                    continue
+                conn.execute(text("""
+                    INSERT INTO schema_migrations (name) VALUES (:name)
+                    ON CONFLICT (name) DO UPDATE SET applied_at = EXCLUDED.applied_at
+                """), {"name": name})
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    logger.info("Migrations applied successfully")
+
+
+if __name__ == "__main__":
+    run_migrations(rerun=sys.argv[1:])
@@ -1,13 +1,19 @@
 from dotenv import load_dotenv
+import contextvars
 import os
+import random
+from contextlib import contextmanager
 from sqlalchemy import (
     create_engine, Column, Integer, String, Boolean,
-    ForeignKey, Text, DateTime, text, LargeBinary, ARRAY
+    ForeignKey, Text, DateTime, text, LargeBinary,
+    Index, func, literal_column
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import Session as OrmSession, declarative_base, sessionmaker, relationship, deferred
 from datetime import datetime
 import logging
-from sqlalchemy.pool import QueuePool
+
+from .pool_stats import InstrumentedQueuePool, instrument
 
 
 # Load environment variables from .env file
@@ -25,25 +31,127 @@ database_url = os.getenv('DATABASE_URL')
 if not database_url:
     raise ValueError("DATABASE_URL environment variable is not set")
 
+# Read replicas of the same database, comma-separated; reads stay on the primary without any
+replica_urls = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+# Per engine and per process; size them from GET /api/v1/pools (see utils.pool_stats)
+POOL_OPTIONS = dict(
+    pool_size=int(os.getenv('DB_POOL_SIZE', 5)),
+    max_overflow=int(os.getenv('DB_MAX_OVERFLOW', 10)),
+    pool_timeout=float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    pool_recycle=int(os.getenv('DB_POOL_RECYCLE', 1800)),
+    pool_pre_ping=os.getenv('DB_POOL_PRE_PING', 'true').lower() not in ('0', 'false', 'no'),
+    poolclass=InstrumentedQueuePool
+)
+
 try:
-    engine = create_engine(
-        database_url,
-        pool_size=5,
-        max_overflow=10,
-        pool_timeout=30,
-        pool_recycle=1800,
-        pool_pre_ping=True,
-        poolclass=QueuePool
-    )
-    logger.info("Database engine created successfully")
+    engine = create_engine(database_url, **POOL_OPTIONS)
+    replica_engines = [create_engine(url, **POOL_OPTIONS) for url in replica_urls]
+    instrument(engine, 'primary', POOL_OPTIONS['max_overflow'])
+    for number, replica in enumerate(replica_engines, 1):
+        instrument(replica, f'replica-{number}', POOL_OPTIONS['max_overflow'])
+    logger.info(f"Database engine created successfully ({len(replica_engines)} read replicas)")
 except Exception as e:
     logger.error(f"Error creating database engine: {str(e)}")
     raise
 
-Session = sessionmaker(bind=engine)
 
+def _snapshot(bind):
+    # Shares the engine's pool; every transaction is a read-only snapshot
+    return bind.execution_options(isolation_level='REPEATABLE READ', postgresql_readonly=True)
+
+
+snapshot_engine = _snapshot(engine)
+replica_snapshot_engines = [_snapshot(replica) for replica in replica_engines]
+
+_replica_reads = contextvars.ContextVar('replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Let plain SELECTs of RoutingSessions in this block go to a read replica.
+
+    Pass enabled=False to keep a block on the primary, e.g. to read data
+    written moments ago.
+    """
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def read_snapshot_engine(replica=True):
+    """A read-only snapshot engine: a random replica's, or the primary's without replicas or replica"""
+    if replica and replica_snapshot_engines:
+        return random.choice(replica_snapshot_engines)
+    return snapshot_engine
+
+
+class RoutingSession(OrmSession):
+    """Session that sends reads to a read replica and everything else to the primary.
+
+    A SELECT goes to a replica only inside replica_reads() and only until
+    the session first writes. Flushes, INSERT/UPDATE/DELETE, SELECT ... FOR
+    UPDATE and raw SQL go to the primary, and so does every later
+    statement, so a flow reads its own writes. Each session sticks to one
+    replica, picked at random. A session given an explicit bind uses only
+    that bind.
+    """
+
+    def __init__(self, *args, primary=None, replicas=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self._replica = None
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.bind is not None or self.primary is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        is_read = (
+            not self._flushing and clause is not None and clause.is_select
+            and getattr(clause, '_for_update_arg', None) is None
+        )
+        if not is_read and (self._flushing or clause is not None):
+            self._wrote = True
+        if is_read and not self._wrote and self.replicas and _replica_reads.get():
+            if self._replica is None:
+                self._replica = random.choice(self.replicas)
+            return self._replica
+        return self.primary
+
+
+Session = sessionmaker(class_=RoutingSession, primary=engine, replicas=replica_engines)
+
+# Database-side UTC timestamp, so rows written outside the ORM get one too
+UTC_NOW = text("timezone('utc', now())")
+
+# Text search configuration used for job full-text search
+JOB_SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+# Constants of the search document are rendered inline rather than bound, so
+# every driver sends the same expression the index was built on
+_EMPTY_TEXT = literal_column("''")
+_SEARCH_WEIGHTS = {weight: literal_column(f"'{weight}'") for weight in 'ABC'}
 
 
+def _search_document(title, description, requirements):
+    """Weighted tsvector over job title, description and requirements.
+
+    The GIN index on jobs is built on exactly this expression, so queries must
+    go through job_search_document() for Postgres to use it.
+    """
+    return (
+        func.setweight(func.to_tsvector(JOB_SEARCH_CONFIG, func.coalesce(title, _EMPTY_TEXT)), _SEARCH_WEIGHTS['A'])
+        .op('||')(func.setweight(
+            func.to_tsvector(JOB_SEARCH_CONFIG, func.coalesce(description, _EMPTY_TEXT)), _SEARCH_WEIGHTS['B']
+        ))
+        .op('||')(func.setweight(
+            func.to_tsvector(JOB_SEARCH_CONFIG, func.coalesce(requirements, _EMPTY_TEXT)), _SEARCH_WEIGHTS['C']
+        ))
+    )
+
 
 class Company(Base):
     __tablename__ = 'companies'
@@ -64,8 +172,16 @@ class Company(Base):
     password = Column(String, nullable=False)
     verified = Column(Boolean, default=False)
     verification_status = Column(String, nullable=False)
+    # Bumped on every write; drives ETag/Last-Modified on the API
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        server_default=UTC_NOW)
     jobs = relationship("Job", back_populates="company")
 
+    __table_args__ = (
+        # Latest change across all companies, for conditional GETs
+        Index('ix_companies_updated_at', updated_at),
+    )
+
 class Job(Base):
     __tablename__ = 'jobs'
 
@@ -74,12 +190,47 @@ class Job(Base):
     company_id = Column(Integer, ForeignKey('companies.id'))
     location = Column(String(100))
     job_type = Column(String(50))
-    accommodations = Column(Text)  # Store as JSON string
+    # Stored as a native text[] so containment filters can use the GIN index
+    accommodations = Column('accommodation_tags', ARRAY(Text))
     description = Column(Text)
     requirements = Column(Text)
-    posted_date = Column(DateTime, default=datetime.utcnow)
+    # Never NULL: keyset pages compare (posted_date, id) tuples
+    posted_date = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=UTC_NOW)
+    # Bumped on every write; drives ETag/Last-Modified on the API
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow,
+                        server_default=UTC_NOW)
     company = relationship("Company", back_populates="jobs")
     applications = relationship("JobApplication", back_populates="job")
+
+    __table_args__ = (
+        Index(
+            'ix_jobs_search_document',
+            _search_document(title, description, requirements),
+            postgresql_using='gin'
+        ),
+        Index('ix_jobs_accommodation_tags', accommodations, postgresql_using='gin'),
+        # Job type filter with newest-first ordering
+        Index('ix_jobs_job_type_posted_date', job_type, posted_date),
+        # Trigram index for case-insensitive substring location filters (ILIKE '%...%')
+        Index(
+            'ix_jobs_location_trgm',
+            location,
+            postgresql_using='gin',
+            postgresql_ops={'location': 'gin_trgm_ops'}
+        ),
+        # Keyset pagination over (posted_date, id), overall and per company
+        Index('ix_jobs_posted_date_id', posted_date, id),
+        Index('ix_jobs_company_id_posted_date_id', company_id, posted_date, id),
+        # Latest change across all jobs, for conditional GETs
+        Index('ix_jobs_updated_at', updated_at),
+    )
+
+
+def job_search_document():
+    """Full-text search document for jobs, matching ix_jobs_search_document"""
+    return _search_document(Job.title, Job.description, Job.requirements)
+
+
 class User(Base):
     __tablename__ = 'users'
 
@@ -88,10 +239,18 @@ class User(Base):
     email = Column(String(100), unique=True, nullable=False)
     name = Column(String(100))
     password = Column(String(255), nullable=False)
-    resume_data = Column(Text)  # JSON string containing all profile data
+    # All profile data as a dict, stored as JSONB so single fields can be
+    # updated and filtered in SQL (skills, location, preferred_job_types,
+    # accessibility_needs, ...)
+    resume_data = Column('profile', JSONB)
     created_at = Column(DateTime, default=datetime.utcnow)
     applications = relationship("JobApplication", back_populates="user")
 
+    __table_args__ = (
+        # Containment filters on profile fields, e.g. resume_data.contains({'skills': ['SQL']})
+        Index('ix_users_profile', resume_data, postgresql_using='gin', postgresql_ops={'profile': 'jsonb_path_ops'}),
+    )
+
 class JobApplication(Base):
     __tablename__ = 'job_applications'
 
@@ -99,16 +258,65 @@ class JobApplication(Base):
     user_id = Column(Integer, ForeignKey('users.id'))
     job_id = Column(Integer, ForeignKey('jobs.id'))
     status = Column(String(50), default='applied')
-    applied_date = Column(DateTime, default=datetime.utcnow)
-    resume = Column(LargeBinary)  # Field to store the resume file content
+    # Never NULL: keyset pages compare (applied_date, id) tuples
+    applied_date = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=UTC_NOW)
+    resume_key = Column(String(64))  # Blob store key of the uploaded resume file
+    resume = deferred(Column(LargeBinary))  # Legacy inline resume content, moved to the blob store
     cover_letter = Column(Text)  # Field to store the cover letter
     additional_notes = Column(Text)  # Field to store additional notes
     user = relationship("User", back_populates="applications")
     job = relationship("Job", back_populates="applications")
 
+    __table_args__ = (
+        # Keyset pagination over a user's applications
+        Index('ix_job_applications_user_id_applied_date_id', user_id, applied_date, id),
+        # Applications per job, optionally narrowed by status
+        Index('ix_job_applications_job_id_status', job_id, status),
+    )
+
+class ApplicationCount(Base):
+    """Number of a job's applications in one status.
+
+    Kept in step by data_manager.count_applications() in the same
+    transaction as every application insert and status change, so
+    dashboards read totals without loading applications.
+    """
+    __tablename__ = 'job_application_counts'
+
+    job_id = Column(Integer, ForeignKey('jobs.id'), primary_key=True)
+    status = Column(String(50), primary_key=True)
+    count = Column(Integer, nullable=False, default=0, server_default='0')
+
+class OutboxMessage(Base):
+    """Email waiting to be sent, written in the transaction that caused it.
+
+    utils.notifications workers deliver pending rows once available_at has
+    passed and push available_at back after each failed attempt.
+    """
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default='pending', server_default='pending')  # pending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=UTC_NOW)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow, server_default=UTC_NOW)
+    sent_at = Column(DateTime)
+
+    __table_args__ = (
+        # Due messages in delivery order; sent and failed rows are not indexed
+        Index('ix_notification_outbox_due', available_at, id, postgresql_where=(status == 'pending')),
+    )
+
 def init_db():
     """Initialize database tables"""
     try:
+        # Extensions required by the model indexes
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
         Base.metadata.create_all(engine)  # Create missing tables
         logger.info("Database tables created successfully")
 
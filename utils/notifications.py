@@ -0,0 +1,360 @@
+"""Email notifications through a transactional outbox.
+
+Pages and API views never talk to a mail server. They call enqueue() with
+the session that is already writing the change the email is about, so the
+message is stored if and only if that transaction commits. Background
+workers then drain the notification_outbox table in batches:
+
+- each batch is claimed with FOR UPDATE SKIP LOCKED and leased to its
+  worker for CLAIM_LEASE by pushing its available_at forward, in a short
+  transaction of its own. Any number of workers, threads or processes, can
+  run side by side, and no connection or row lock is held while a batch is
+  sent; the outcome is recorded in a second short transaction. A worker
+  that dies mid-send leaves its batch to be claimed again once the lease
+  runs out, so a message may then be sent twice, but is never lost;
+- a failed message is retried with exponential backoff (with jitter) until
+  MAX_ATTEMPTS, then marked failed;
+- delivery goes through a transport chosen with NOTIFICATION_TRANSPORT:
+  "console" (default, logs messages, for development), "smtp" (SMTP_HOST,
+  SMTP_PORT, SMTP_USERNAME, SMTP_PASSWORD, SMTP_STARTTLS) or "memory" (keeps
+  messages in a list, for tests). More can be added with register_transport().
+
+Run a standalone worker pool with
+
+    python -m utils.notifications --workers 4
+
+or start one inside a process with start_worker_pool().
+"""
+import argparse
+import logging
+import os
+import random
+import smtplib
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+from sqlalchemy import insert, update
+
+from .models import OutboxMessage, Session
+
+logger = logging.getLogger(__name__)
+
+# Messages claimed and sent per worker transaction
+NOTIFICATION_BATCH_SIZE = 50
+
+# Delivery attempts before a message is marked failed
+MAX_ATTEMPTS = 8
+
+# Retry delays grow from BACKOFF_BASE, doubling per attempt, up to BACKOFF_MAX
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+
+# Seconds an idle worker waits before looking for due messages again
+POLL_INTERVAL = 5
+
+# How long a claimed batch is reserved for its worker; well beyond the time a batch takes to send
+CLAIM_LEASE = timedelta(minutes=10)
+
+Notification = namedtuple('Notification', ['recipient', 'subject', 'body'])
+
+# An outbox message leased to a worker, as read when it was claimed
+ClaimedMessage = namedtuple('ClaimedMessage', ['id', 'recipient', 'subject', 'body', 'attempts', 'leased_until'])
+
+
+def application_status_notification(notice, subject=None, message=None):
+    """Notification telling an applicant their application moved to a new status"""
+    subject = subject or f"Update on your application for {notice.job_title}"
+    body = message or (
+        f"Dear {notice.user_name or 'applicant'},\n\n"
+        f"The status of your application for {notice.job_title} is now: {notice.status}.\n\n"
+        "Best regards,\nThe Able Connect Team\n"
+    )
+    return Notification(notice.user_email, subject, body)
+
+
+def verification_received_notification(company_name, contact_email):
+    """Confirmation sent to a company after it submits a verification request"""
+    return Notification(
+        contact_email,
+        "Company Verification Request Received",
+        f"Dear {company_name},\n\n"
+        "Thank you for submitting your company verification request. Our team will review your "
+        "application and contact you within 5 business days.\n\n"
+        "Best regards,\nThe Able Connect Team\n"
+    )
+
+
+def enqueue(session, notifications):
+    """Add notifications to the outbox in session's transaction; the caller commits"""
+    rows = [notification._asdict() for notification in notifications if notification.recipient]
+    if rows:
+        session.execute(insert(OutboxMessage), rows)
+    return len(rows)
+
+
+# Transports
+
+class Transport:
+    """Interface for delivery backends"""
+
+    def send_batch(self, messages):
+        """Send outbox messages; return an error string or None for each, in order"""
+        raise NotImplementedError
+
+
+class ConsoleTransport(Transport):
+    """Logs every message instead of sending it"""
+
+    def send_batch(self, messages):
+        for message in messages:
+            logger.info(f"Email to {message.recipient}: {message.subject}\n{message.body}")
+        return [None] * len(messages)
+
+
+class MemoryTransport(Transport):
+    """Keeps sent messages in a list; for tests"""
+
+    def __init__(self):
+        self.sent = []
+
+    def send_batch(self, messages):
+        self.sent.extend(Notification(message.recipient, message.subject, message.body) for message in messages)
+        return [None] * len(messages)
+
+
+class SmtpTransport(Transport):
+    """Sends each batch over one SMTP connection"""
+
+    def __init__(self, host, port=25, username=None, password=None, starttls=False, sender=None, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.sender = sender
+        self.timeout = timeout
+
+    def _email(self, message):
+        email = EmailMessage()
+        email['From'] = self.sender
+        email['To'] = message.recipient
+        email['Subject'] = message.subject
+        email.set_content(message.body)
+        return email
+
+    def send_batch(self, messages):
+        try:
+            smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        except (OSError, smtplib.SMTPException) as e:
+            return [f"Cannot connect to {self.host}:{self.port}: {e}"] * len(messages)
+        errors = []
+        with smtp:
+            try:
+                if self.starttls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+            except (OSError, smtplib.SMTPException) as e:
+                return [f"SMTP session failed: {e}"] * len(messages)
+            for message in messages:
+                try:
+                    smtp.send_message(self._email(message))
+                    errors.append(None)
+                except smtplib.SMTPServerDisconnected as e:
+                    # The rest of the batch cannot go out on this connection
+                    errors.extend([str(e)] * (len(messages) - len(errors)))
+                    break
+                except (OSError, smtplib.SMTPException) as e:
+                    errors.append(str(e))
+        return errors
+
+
+def _smtp_transport():
+    return SmtpTransport(
+        os.getenv('SMTP_HOST', 'localhost'),
+        int(os.getenv('SMTP_PORT', 25)),
+        username=os.getenv('SMTP_USERNAME'),
+        password=os.getenv('SMTP_PASSWORD'),
+        starttls=os.getenv('SMTP_STARTTLS', '').lower() in ('1', 'true', 'yes'),
+        sender=os.getenv('NOTIFICATION_SENDER', 'no-reply@ableconnect.local')
+    )
+
+
+NOTIFICATION_TRANSPORTS = {
+    'console': ConsoleTransport,
+    'smtp': _smtp_transport,
+    'memory': MemoryTransport,
+}
+
+_transport = None
+
+
+def register_transport(name, factory):
+    """Make a transport available under NOTIFICATION_TRANSPORT=name"""
+    NOTIFICATION_TRANSPORTS[name] = factory
+
+
+def get_transport():
+    """Return the process-wide transport configured from the environment"""
+    global _transport
+    if _transport is None:
+        backend = os.getenv('NOTIFICATION_TRANSPORT', 'console')
+        if backend not in NOTIFICATION_TRANSPORTS:
+            raise ValueError(f"Unknown NOTIFICATION_TRANSPORT: {backend}")
+        _transport = NOTIFICATION_TRANSPORTS[backend]()
+    return _transport
+
+
+# Delivery
+
+def retry_delay(attempts, rng=random):
+    """Delay before the next try after attempts failures, with jitter against retry storms"""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * rng.uniform(0.5, 1.0)
+
+
+def claim_due(session, limit=NOTIFICATION_BATCH_SIZE, now=None):
+    """Lock up to limit due messages that no other worker holds"""
+    now = now or datetime.utcnow()
+    return session.query(OutboxMessage).filter(
+        OutboxMessage.status == 'pending',
+        OutboxMessage.available_at <= now
+    ).order_by(OutboxMessage.available_at, OutboxMessage.id).limit(limit).with_for_update(skip_locked=True).all()
+
+
+def lease_due(limit=NOTIFICATION_BATCH_SIZE, lease=CLAIM_LEASE):
+    """Claim up to limit due messages for lease and commit; return them as ClaimedMessages"""
+    session = Session()
+    try:
+        messages = claim_due(session, limit)
+        leased_until = datetime.utcnow() + lease
+        claimed = []
+        for message in messages:
+            claimed.append(ClaimedMessage(
+                message.id, message.recipient, message.subject, message.body, message.attempts, leased_until
+            ))
+            message.available_at = leased_until
+        session.commit()
+        return claimed
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def record_outcomes(claimed, errors):
+    """Mark claimed messages sent, due for a retry or failed, in one transaction.
+
+    A message whose lease ran out and was claimed again meanwhile is left
+    to the worker that holds it now.
+    """
+    now = datetime.utcnow()
+    session = Session()
+    try:
+        for message, error in zip(claimed, errors):
+            attempts = message.attempts + 1
+            values = {'attempts': attempts, 'last_error': error}
+            if error is None:
+                values.update(status='sent', sent_at=now)
+            elif attempts >= MAX_ATTEMPTS:
+                values['status'] = 'failed'
+                logger.error(f"Giving up on notification {message.id} to {message.recipient}: {error}")
+            else:
+                values['available_at'] = now + retry_delay(attempts)
+            session.execute(update(OutboxMessage).where(
+                OutboxMessage.id == message.id,
+                OutboxMessage.status == 'pending',
+                OutboxMessage.available_at == message.leased_until
+            ).values(values))
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def deliver_due(batch_size=NOTIFICATION_BATCH_SIZE, transport=None):
+    """Send one batch of due messages and record the outcome; return the batch size"""
+    transport = transport or get_transport()
+    claimed = lease_due(batch_size)
+    if not claimed:
+        return 0
+    # Sent outside any transaction: a slow mail server holds no connection or lock
+    record_outcomes(claimed, transport.send_batch(claimed))
+    return len(claimed)
+
+
+class WorkerPool:
+    """Threads that keep draining the outbox until stopped"""
+
+    def __init__(self, workers=2, batch_size=NOTIFICATION_BATCH_SIZE, poll_interval=POLL_INTERVAL, transport=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.transport = transport
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = deliver_due(self.batch_size, self.transport)
+            except Exception as e:
+                logger.error(f"Error delivering notifications: {str(e)}")
+                delivered = 0
+            # A full batch means more may be due; otherwise sleep until the next poll
+            if delivered < self.batch_size:
+                self._stopping.wait(self.poll_interval)
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"notification-worker-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+
+_worker_pool = None
+_worker_pool_lock = threading.Lock()
+
+
+def start_worker_pool():
+    """Start the process-wide worker pool once; NOTIFICATION_WORKERS=0 leaves delivery to other processes"""
+    global _worker_pool
+    if _worker_pool is not None:
+        return _worker_pool or None
+    with _worker_pool_lock:
+        if _worker_pool is None:
+            workers = int(os.getenv('NOTIFICATION_WORKERS', 2))
+            _worker_pool = WorkerPool(workers).start() if workers > 0 else False
+    return _worker_pool or None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Deliver queued email notifications")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('NOTIFICATION_WORKERS', 2)) or 1)
+    parser.add_argument('--batch-size', type=int, default=NOTIFICATION_BATCH_SIZE)
+    parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL)
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(args.workers, args.batch_size, args.poll_interval).start()
+    logger.info(f"Delivering notifications with {args.workers} workers")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        logger.info("Stopping notification workers")
+        pool.stop()
+
+
+if __name__ == '__main__':
+    main()
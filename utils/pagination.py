@@ -0,0 +1,79 @@
+"""Keyset (cursor) pagination helpers.
+
+A cursor is an opaque token holding the sort key of the last row a client
+has seen. The next page is every row strictly after that key, which the
+database answers from an index no matter how deep the page is, and rows
+inserted meanwhile cannot shift rows between pages.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(sort_key):
+    """Encode a row's sort key values as an opaque URL-safe token"""
+    payload = json.dumps([_encode_value(value) for value in sort_key], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a token produced by encode_cursor back into sort key values"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list):
+            raise InvalidCursor("Cursor must encode a list of values")
+        return [_decode_value(value) for value in values]
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursor(f"Invalid cursor: {str(e)}")
+
+
+def keyset_filter(query, sort_key, after):
+    """Restrict a query to rows after the given sort key, in descending order"""
+    if after is None:
+        return query
+    if len(after) != len(sort_key):
+        raise InvalidCursor("Cursor does not match this listing")
+    return query.filter(tuple_(*sort_key) < tuple_(*after))
+
+
+def keyset_page(query, sort_key, after, limit):
+    """Order a query by sort_key descending and fetch one row past the page.
+
+    The extra row tells the caller whether a next page exists without a
+    separate COUNT query.
+    """
+    query = keyset_filter(query, sort_key, after)
+    return query.order_by(*[column.desc() for column in sort_key]).limit(limit + 1)
+
+
+def keyset_slice(rows, sort_key, after, limit):
+    """keyset_page() for rows already in memory, sorted by sort_key descending"""
+    if after is None or not rows:
+        return rows[:limit + 1]
+    if len(after) != len(sort_key(rows[0])):
+        raise InvalidCursor("Cursor does not match this listing")
+    try:
+        return [row for row in rows if sort_key(row) < after][:limit + 1]
+    except TypeError:
+        raise InvalidCursor("Cursor does not match this listing")
@@ -1,14 +1,50 @@
+"""Resume PDF rendering.
+
+Paragraph styles and table styles are built once per process and shared by
+every render. Templates are looked up by name in TEMPLATES, and
+render_resume() keeps finished PDFs in the shared cache keyed by the
+template and a hash of the normalized resume data, so downloading an
+unchanged resume again costs one cache lookup.
+"""
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from io import BytesIO
 from reportlab.lib.units import inch
+from datetime import date
+from functools import lru_cache
+import hashlib
+import json
 
-def generate_resume_pdf(resume_data, template_function):
-    """Generate a PDF resume using the provided data and template"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
+from .photo import PHOTO_SIZE_INCHES, normalize_photo
+from .shared_cache import get_shared_cache
+
+# Seconds a rendered PDF stays in the shared cache
+RENDER_CACHE_TTL = 24 * 60 * 60
+
+# Bump when a template's layout changes so earlier renders are not served
+RENDER_CACHE_VERSION = 2
+
+# Side-by-side layout of templates 1 and 2: contact details and education
+# on the left, summary, experience and skills on the right
+TWO_COLUMN_WIDTHS = [2.5 * inch, 4.5 * inch]
+TWO_COLUMN_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 10),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+    ('BACKGROUND', (1, 0), (1, -1), colors.whitesmoke),
+])
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Sample stylesheet plus the resume styles, built once per process.
+
+    The stylesheet is shared by all renders and must not be modified.
+    """
     styles = getSampleStyleSheet()
     
     # Add custom styles
@@ -32,9 +68,15 @@ def generate_resume_pdf(resume_data, template_function):
         fontSize=12,
         spaceAfter=10
     ))
+    return styles
+
+def generate_resume_pdf(resume_data, template_function):
+    """Generate a PDF resume using the provided data and template"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
     
     # Generate content using template
-    story = template_function(resume_data, styles)
+    story = template_function(resume_data, get_styles())
     
     # Build PDF
     doc.build(story)
@@ -45,8 +87,8 @@ def generate_resume_pdf(resume_data, template_function):
     
     return pdf
 
-def get_template_1(resume_data, styles):
-    """Generate resume content for template 1"""
+def _two_column_story(resume_data, styles):
+    """Story of the two-column layout shared by templates 1 and 2"""
     story = []
     
     # Personal Information and Education on the left side
@@ -55,7 +97,9 @@ def get_template_1(resume_data, styles):
     
     # Add picture if available
     if 'picture' in personal_info and personal_info['picture']:
-        image = Image(BytesIO(personal_info['picture']), width=1.5*inch, height=1.5*inch)
+        # Downsampled, metadata-free copy instead of the raw upload
+        photo = normalize_photo(personal_info['picture'])
+        image = Image(BytesIO(photo), width=PHOTO_SIZE_INCHES*inch, height=PHOTO_SIZE_INCHES*inch)
         left_side.append(image)
         left_side.append(Spacer(1, 12))
     
@@ -94,79 +138,78 @@ def get_template_1(resume_data, styles):
     table_data = [
         [left_side, right_side]
     ]
-    table = Table(table_data, colWidths=[2.5 * inch, 4.5 * inch])
-    table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('BACKGROUND', (1, 0), (1, -1), colors.whitesmoke),
-    ]))
+    table = Table(table_data, colWidths=TWO_COLUMN_WIDTHS)
+    table.setStyle(TWO_COLUMN_STYLE)
     
     story.append(table)
     
     return story
 
+def get_template_1(resume_data, styles):
+    """Generate resume content for template 1"""
+    return _two_column_story(resume_data, styles)
+
 def get_template_2(resume_data, styles):
     """Generate resume content for template 2"""
-    story = []
-    
-    # Personal Information and Education on the left side
-    left_side = []
-    personal_info = resume_data['personal_info']
-    
-    # Add picture if available
-    if 'picture' in personal_info and personal_info['picture']:
-        image = Image(BytesIO(personal_info['picture']), width=1.5*inch, height=1.5*inch)
-        left_side.append(image)
-        left_side.append(Spacer(1, 12))
-    
-    left_side.append(Paragraph(f"{personal_info['first_name']} {personal_info['last_name']}", styles['CustomHeading']))
-    left_side.append(Paragraph(f"Email: {personal_info['email']}", styles['CustomBody']))
-    left_side.append(Paragraph(f"Phone: {personal_info['phone']}", styles['CustomBody']))
-    left_side.append(Paragraph(f"Location: {personal_info['location']}", styles['CustomBody']))
-    if personal_info['linkedin']:
-        left_side.append(Paragraph(f"LinkedIn: {personal_info['linkedin']}", styles['CustomBody']))
-    left_side.append(Spacer(1, 12))
-    
-    left_side.append(Paragraph("Education", styles['CustomSubHeading']))
-    for edu in resume_data['education']:
-        left_side.append(Paragraph(f"{edu['degree']} from {edu['institution']}", styles['CustomBody']))
-        left_side.append(Paragraph(f"Graduation Date: {edu['graduation_date']}", styles['CustomBody']))
-        left_side.append(Spacer(1, 12))
-    
-    # Professional Summary, Work Experience, and Skills on the right side
-    right_side = []
-    right_side.append(Paragraph("Professional Summary", styles['CustomSubHeading']))
-    right_side.append(Paragraph(resume_data['summary'], styles['CustomBody']))
-    right_side.append(Spacer(1, 12))
-    
-    right_side.append(Paragraph("Work Experience", styles['CustomSubHeading']))
-    for exp in resume_data['experiences']:
-        right_side.append(Paragraph(f"{exp['position']} at {exp['company']}", styles['CustomBody']))
-        right_side.append(Paragraph(f"{exp['start_date']} - {exp['end_date']}", styles['CustomBody']))
-        right_side.append(Paragraph(exp['description'], styles['CustomBody']))
-        right_side.append(Spacer(1, 12))
-    
-    right_side.append(Paragraph("Skills", styles['CustomSubHeading']))
-    skills = ', '.join(resume_data['skills'])
-    right_side.append(Paragraph(skills, styles['CustomBody']))
-    
-    # Create a table with two columns
-    table_data = [
-        [left_side, right_side]
-    ]
-    table = Table(table_data, colWidths=[2.5 * inch, 4.5 * inch])
-    table.setStyle(TableStyle([
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 10),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-        ('BOX', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('BACKGROUND', (1, 0), (1, -1), colors.whitesmoke),
-    ]))
-    
-    story.append(table)
-    
-    return story
\ No newline at end of file
+    return _two_column_story(resume_data, styles)
+
+# Templates offered by the resume builder, by display name
+TEMPLATES = {
+    'Professional': get_template_1,
+    'Modern': get_template_2,
+}
+
+def register_template(name, template_function):
+    """Offer a template function(resume_data, styles) -> story under name"""
+    TEMPLATES[name] = template_function
+
+def _normalize(value):
+    """JSON-ready copy of resume data with a canonical form for every value"""
+    if isinstance(value, dict):
+        return {str(key): _normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, (bytes, bytearray)):
+        return {'sha256': hashlib.sha256(value).hexdigest()}
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        # Paragraphs collapse surrounding whitespace, so it never changes the PDF
+        return value.strip()
+    return value
+
+def resume_fingerprint(resume_data, template_name):
+    """Hash identifying the PDF that template_name renders for resume_data"""
+    payload = json.dumps(
+        [RENDER_CACHE_VERSION, template_name, _normalize(resume_data)], sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_cache_key(resume_data, template_name):
+    """Shared cache key of the PDF that template_name renders for resume_data"""
+    return f"resume-pdf:{resume_fingerprint(resume_data, template_name)}"
+
+def cached_render(key):
+    """A rendered PDF from the shared cache, or None"""
+    try:
+        return get_shared_cache().get(key)
+    except Exception as e:
+        print(f"Error reading resume render cache: {str(e)}")
+        return None
+
+def store_render(key, pdf):
+    try:
+        get_shared_cache().set(key, pdf, timeout=RENDER_CACHE_TTL)
+    except Exception as e:
+        print(f"Error writing resume render cache: {str(e)}")
+
+def render_resume(resume_data, template_name):
+    """Render resume_data with a registered template, reusing an earlier identical render"""
+    if template_name not in TEMPLATES:
+        raise ValueError(f"Unknown resume template: {template_name}")
+    key = render_cache_key(resume_data, template_name)
+    pdf = cached_render(key)
+    if pdf is None:
+        pdf = generate_resume_pdf(resume_data, TEMPLATES[template_name])
+        store_render(key, pdf)
+    return pdf
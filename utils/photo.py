@@ -0,0 +1,83 @@
+"""Resume photo normalization before PDF embedding.
+
+Uploaded photos are often multi-megapixel phone pictures, while a resume
+shows them in a PHOTO_SIZE_INCHES square. normalize_photo() decodes the
+upload at reduced scale where the format allows it, applies the EXIF
+orientation, crops and downsamples it to the square at PHOTO_DPI and
+re-encodes it as a JPEG without any metadata (EXIF, GPS, ICC). Results are
+kept in the shared cache by the SHA-256 of the upload, so each photo is
+processed once however many times its resume is rendered.
+"""
+import hashlib
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .shared_cache import get_shared_cache
+
+# Printed size of the photo frame on the resume, and the resolution it is rendered at
+PHOTO_SIZE_INCHES = 1.5
+PHOTO_DPI = 200
+PHOTO_PIXELS = int(PHOTO_SIZE_INCHES * PHOTO_DPI)
+
+JPEG_QUALITY = 85
+
+# Largest upload accepted, in bytes and in decoded pixels
+MAX_PHOTO_BYTES = 15 * 1024 * 1024
+MAX_PHOTO_PIXELS = 50_000_000
+
+# Seconds a normalized photo stays in the shared cache
+PHOTO_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Bump when the processing changes so earlier results are not served
+PHOTO_CACHE_VERSION = 1
+
+
+class InvalidPhoto(ValueError):
+    """Raised when an upload is not an image that can be embedded"""
+
+
+def _process(data):
+    try:
+        image = Image.open(BytesIO(data))
+        if image.width * image.height > MAX_PHOTO_PIXELS:
+            raise InvalidPhoto(f"Photo is larger than {MAX_PHOTO_PIXELS} pixels")
+        # JPEG can decode straight at a fraction of full size, skipping most of the work
+        image.draft('RGB', (PHOTO_PIXELS, PHOTO_PIXELS))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image = image.convert('RGBA')
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        else:
+            image = image.convert('RGB')
+        image = ImageOps.fit(image, (PHOTO_PIXELS, PHOTO_PIXELS), Image.LANCZOS)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise InvalidPhoto(f"Photo cannot be read: {e}")
+
+    output = BytesIO()
+    # No exif/icc_profile arguments: the re-encoded file carries no metadata
+    image.save(output, 'JPEG', quality=JPEG_QUALITY, optimize=True, dpi=(PHOTO_DPI, PHOTO_DPI))
+    return output.getvalue()
+
+
+def normalize_photo(data):
+    """Return a small, metadata-free JPEG of an uploaded photo, cached by content hash"""
+    if len(data) > MAX_PHOTO_BYTES:
+        raise InvalidPhoto(f"Photo is larger than {MAX_PHOTO_BYTES // (1024 * 1024)} MB")
+    key = f"photo:{PHOTO_CACHE_VERSION}:{hashlib.sha256(data).hexdigest()}"
+    try:
+        photo = get_shared_cache().get(key)
+    except Exception as e:
+        print(f"Error reading photo cache: {str(e)}")
+        photo = None
+    if photo is not None:
+        return photo
+
+    photo = _process(data)
+    try:
+        get_shared_cache().set(key, photo, timeout=PHOTO_CACHE_TTL)
+    except Exception as e:
+        print(f"Error writing photo cache: {str(e)}")
+    return photo
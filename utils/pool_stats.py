@@ -0,0 +1,258 @@
+"""Connection pool instrumentation, for sizing pools from data.
+
+Every engine created by utils.models and utils.async_db uses an
+instrumented QueuePool and is registered here under a name ("primary",
+"replica-1", "async-primary", ...). For each pool we keep:
+
+- how long checkouts waited for a connection (median, p95 and max over
+  the last CHECKOUT_SAMPLES checkouts),
+- connections in use now and at the peak, and how far into overflow the
+  pool went,
+- checkouts that gave up after pool_timeout, and connections opened and
+  invalidated.
+
+In-use and overflow counts come from the pool's checkout, checkin,
+connect and invalidate events. SQLAlchemy has no event for the start of a
+checkout, so the wait is timed around QueuePool._do_get(), which is also
+where pool timeouts are raised.
+
+pool_report() returns the numbers for GET /api/v1/pools, which answers
+only callers presenting OPERATOR_TOKEN. Checkouts slower
+than DB_POOL_SLOW_CHECKOUT_MS (default 100) and timeouts are logged as
+they happen, at most once per SLOW_LOG_INTERVAL seconds per pool, and
+start_reporter() logs a summary of every pool each DB_POOL_STATS_INTERVAL
+seconds (default 60, 0 disables it).
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Most recent checkout waits kept for percentiles
+CHECKOUT_SAMPLES = 1000
+
+# Seconds between warnings about slow checkouts or timeouts of one pool
+SLOW_LOG_INTERVAL = 10
+
+
+class PoolStats:
+    """Checkout counters of one named pool, fed by its events"""
+
+    def __init__(self, name, slow_checkout=None, max_overflow=None):
+        self.name = name
+        self.max_overflow = max_overflow
+        self.slow_checkout = (
+            slow_checkout if slow_checkout is not None
+            else float(os.getenv('DB_POOL_SLOW_CHECKOUT_MS', 100)) / 1000
+        )
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.peak_overflow = 0
+        self._waits = deque(maxlen=CHECKOUT_SAMPLES)
+        self._lock = threading.Lock()
+        self._slow_since_log = 0
+        self._last_log = 0.0
+
+    def listen(self, pool):
+        """Subscribe to pool's events; they carry over when the engine recreates the pool"""
+        pool.stats = self
+        event.listen(pool, 'checkout', self._on_checkout)
+        event.listen(pool, 'checkin', self._on_checkin)
+        event.listen(pool, 'connect', self._on_connect)
+        event.listen(pool, 'invalidate', self._on_invalidate)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.in_use = max(self.in_use - 1, 0)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds, pool):
+        """Record a checkout that got a connection after waiting seconds"""
+        with self._lock:
+            self._waits.append(seconds)
+            self.peak_overflow = max(self.peak_overflow, pool.overflow())
+            if seconds < self.slow_checkout:
+                return
+            self._slow_since_log += 1
+            if not self._should_log():
+                return
+            slow, self._slow_since_log = self._slow_since_log, 0
+        logger.warning(
+            f"Pool {self.name}: {slow} checkouts waited over {self.slow_checkout * 1000:.0f} ms "
+            f"(last {seconds * 1000:.0f} ms, {pool.checkedout()} in use, {max(pool.overflow(), 0)} overflow)"
+        )
+
+    def record_timeout(self, seconds, pool):
+        """Record a checkout that gave up after seconds"""
+        with self._lock:
+            self._waits.append(seconds)
+            self.timeouts += 1
+            if not self._should_log():
+                return
+            timeouts = self.timeouts
+        logger.error(
+            f"Pool {self.name}: checkout timed out after {seconds:.1f} s "
+            f"({pool.checkedout()} in use, {timeouts} timeouts so far)"
+        )
+
+    def _should_log(self):
+        now = time.monotonic()
+        if now - self._last_log < SLOW_LOG_INTERVAL:
+            return False
+        self._last_log = now
+        return True
+
+    def snapshot(self, pool):
+        """Current counters of pool as a JSON-ready dict"""
+        with self._lock:
+            waits = sorted(self._waits)
+            counters = dict(
+                checkouts=self.checkouts,
+                timeouts=self.timeouts,
+                connects=self.connects,
+                invalidations=self.invalidations,
+                peak_in_use=self.peak_in_use,
+                peak_overflow=self.peak_overflow,
+            )
+        return dict(
+            name=self.name,
+            size=pool.size(),
+            max_overflow=self.max_overflow,
+            timeout=pool.timeout(),
+            in_use=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            **counters,
+            checkout_wait_ms=dict(
+                samples=len(waits),
+                p50=_percentile_ms(waits, 0.5),
+                p95=_percentile_ms(waits, 0.95),
+                max=_percentile_ms(waits, 1.0),
+            ),
+        )
+
+
+def _percentile_ms(ordered, fraction):
+    if not ordered:
+        return None
+    return round(ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] * 1000, 3)
+
+
+class _TimedCheckout:
+    """Times QueuePool._do_get(), the wait for a free or new connection"""
+
+    stats = None
+
+    def _do_get(self):
+        stats = self.stats
+        if stats is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            stats.record_timeout(time.perf_counter() - start, self)
+            raise
+        stats.record_wait(time.perf_counter() - start, self)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool whose checkouts are timed once instrument() has named it"""
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool whose checkouts are timed once instrument() has named it"""
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def instrument(engine, name, max_overflow=None):
+    """Collect pool statistics of engine (sync or asyncio) under name.
+
+    max_overflow is the value the pool was configured with, reported as is.
+    """
+    engine = getattr(engine, 'sync_engine', engine)
+    stats = PoolStats(name, max_overflow=max_overflow)
+    stats.listen(engine.pool)
+    with _engines_lock:
+        _engines[name] = (engine, stats)
+    return stats
+
+
+def pool_report():
+    """Statistics of every instrumented pool in this process, by name"""
+    with _engines_lock:
+        engines = list(_engines.values())
+    return [stats.snapshot(engine.pool) for engine, stats in engines]
+
+
+def log_pool_report():
+    for pool in pool_report():
+        wait = pool['checkout_wait_ms']
+        logger.info(
+            f"Pool {pool['name']}: {pool['in_use']}/{pool['size']} in use (peak {pool['peak_in_use']}), "
+            f"overflow {pool['overflow']}/{pool['max_overflow']} (peak {pool['peak_overflow']}), "
+            f"{pool['checkouts']} checkouts, wait p50 {wait['p50']} ms p95 {wait['p95']} ms max {wait['max']} ms, "
+            f"{pool['timeouts']} timeouts"
+        )
+
+
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def start_reporter():
+    """Log pool_report() every DB_POOL_STATS_INTERVAL seconds from a daemon thread, once per process"""
+    global _reporter
+    with _reporter_lock:
+        if _reporter is None:
+            interval = float(os.getenv('DB_POOL_STATS_INTERVAL', 60))
+            if interval > 0:
+                _reporter = threading.Thread(
+                    target=_report_every, args=(interval,), name='pool-stats', daemon=True
+                )
+                _reporter.start()
+            else:
+                _reporter = False
+    return _reporter or None
+
+
+def _report_every(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            log_pool_report()
+        except Exception as e:
+            logger.error(f"Error reporting pool statistics: {str(e)}")
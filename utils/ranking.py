@@ -0,0 +1,228 @@
+"""Rank a job's applicants by how well their profile meets its requirements.
+
+Each applicant's resume_data is scored on three features between 0 and 1:
+
+- skills: the weighted share of the terms in the job's title and
+  requirements that the profile covers. A term in the listed skills or the
+  desired role counts fully; one found only in the summary, experience or
+  education text counts half.
+- experience: years of listed experience over the years the requirements
+  ask for ("3+ years", DEFAULT_YEARS_REQUIRED when they name none)
+- education: the highest degree level against the highest one the
+  requirements mention, or whether there is any education if they mention
+  none
+
+The score is their RANKING_WEIGHTS average. A job's applicants are scored
+together: requirements are parsed once and skills coverage is a single
+matrix product. Skills and education scores are kept in the shared cache
+per (job id, application id), keyed with a digest of the job and profile
+text, so an edited profile or job is simply scored again. Experience
+depends on today's date and is recomputed on every ranking.
+"""
+import hashlib
+import json
+import re
+from collections import namedtuple
+from datetime import date, datetime
+
+import numpy as np
+
+from .matching import TITLE_WEIGHT, tokenize
+from .shared_cache import get_shared_cache
+
+# Relative importance of each feature in the ranking score
+RANKING_WEIGHTS = {'skills': 0.6, 'experience': 0.25, 'education': 0.15}
+
+# Years of experience expected when the requirements do not say
+DEFAULT_YEARS_REQUIRED = 3
+
+# Words naming a degree and its level
+DEGREE_LEVELS = {
+    'associate': 1, 'diploma': 1,
+    'bachelor': 2, 'bachelors': 2, 'bsc': 2, 'ba': 2, 'bs': 2,
+    'master': 3, 'masters': 3, 'msc': 3, 'mba': 3,
+    'phd': 4, 'doctorate': 4,
+}
+
+# Words of requirements that describe rather than name a skill
+REQUIREMENT_STOP_WORDS = frozenset(
+    'ability able degree equivalent excellent experience good knowledge must plus preferred proven '
+    'related required skills strong understanding year years'.split()
+)
+
+# Seconds a score stays in the shared cache
+SCORE_CACHE_TTL = 7 * 24 * 60 * 60
+
+# Bump when the scoring changes so earlier scores are not served
+RANKING_VERSION = 2
+
+_YEARS = re.compile(r"(\d{1,2})\s*\+?\s*(?:or more\s+)?years?")
+
+ApplicantScore = namedtuple('ApplicantScore', ['score', 'skills', 'experience', 'education'])
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _experiences(resume):
+    # Resume Builder stores "experiences" with a position; older profiles "experience" with a title
+    entries = resume.get('experiences') or resume.get('experience') or []
+    return [entry for entry in entries if isinstance(entry, dict)]
+
+
+def experience_years(resume, today=None):
+    """Total years across a profile's experience entries with a readable start date"""
+    today = today or date.today()
+    days = 0
+    for entry in _experiences(resume):
+        start = _date(entry.get('start_date'))
+        end = _date(entry.get('end_date')) or today
+        if start is not None and end > start:
+            days += (end - start).days
+    return days / 365.25
+
+
+def degree_level(text):
+    """Highest degree level named in text, 0 for none"""
+    return max((DEGREE_LEVELS.get(token, 0) for token in tokenize(text)), default=0)
+
+
+def years_required(requirements):
+    """Years of experience the requirements ask for"""
+    years = [int(match) for match in _YEARS.findall((requirements or '').lower())]
+    return max(years) if years else DEFAULT_YEARS_REQUIRED
+
+
+def _profile_terms(resume):
+    """Terms of a profile: (listed skills and desired role, everything else)"""
+    skills = resume.get('skills') or []
+    if isinstance(skills, str):
+        skills = skills.split(',')
+    primary = set(tokenize(' '.join(str(skill) for skill in skills)))
+    primary.update(tokenize(resume.get('desired_role')))
+
+    text = [resume.get('summary')]
+    for entry in _experiences(resume):
+        text += [entry.get('position'), entry.get('title'), entry.get('description')]
+    for entry in resume.get('education') or []:
+        if isinstance(entry, dict):
+            text.append(entry.get('degree'))
+    secondary = set(tokenize(' '.join(str(part) for part in text if part)))
+    return primary, secondary
+
+
+def _skill_and_education_scores(title, requirements, resumes):
+    """Skills and education feature arrays of profile dicts; neither depends on the date"""
+    weights = {}
+    for term in tokenize(requirements):
+        if term not in REQUIREMENT_STOP_WORDS and term not in DEGREE_LEVELS and not term.isdigit():
+            weights[term] = 1
+    for term in tokenize(title):
+        weights[term] = TITLE_WEIGHT
+    terms = list(weights)
+    term_weights = np.array([weights[term] for term in terms], np.float32)
+
+    coverage = np.zeros((len(resumes), len(terms)), np.float32)
+    levels = np.zeros(len(resumes), np.float32)
+    for row, resume in enumerate(resumes):
+        if not isinstance(resume, dict):
+            resume = {}
+        primary, secondary = _profile_terms(resume)
+        coverage[row] = [
+            1.0 if term in primary else 0.5 if term in secondary else 0.0 for term in terms
+        ]
+        degrees = [entry for entry in resume.get('education') or [] if isinstance(entry, dict)]
+        levels[row] = max((degree_level(entry.get('degree')) or 1 for entry in degrees), default=0)
+
+    if terms:
+        skills = coverage @ term_weights / term_weights.sum()
+    else:
+        skills = np.zeros(len(resumes), np.float32)
+    level_required = degree_level(requirements)
+    if level_required:
+        education = np.minimum(levels / level_required, 1)
+    else:
+        education = (levels > 0).astype(np.float32)
+    return skills, education
+
+
+def _experience_scores(requirements, resumes, today=None):
+    """Experience feature array of profile dicts as of today"""
+    years = np.array(
+        [experience_years(resume if isinstance(resume, dict) else {}, today) for resume in resumes],
+        np.float32,
+    )
+    return np.minimum(years / max(years_required(requirements), 1), 1)
+
+
+def _combine(skills, experience, education):
+    total = (
+        RANKING_WEIGHTS['skills'] * skills
+        + RANKING_WEIGHTS['experience'] * experience
+        + RANKING_WEIGHTS['education'] * education
+    ) / sum(RANKING_WEIGHTS.values())
+    return [
+        ApplicantScore(*map(float, values))
+        for values in zip(total, skills, experience, education)
+    ]
+
+
+def score_applicants(title, requirements, resumes, today=None):
+    """Score profile dicts against one job's title and requirements, in order"""
+    if not resumes:
+        return []
+    skills, education = _skill_and_education_scores(title, requirements, resumes)
+    return _combine(skills, _experience_scores(requirements, resumes, today), education)
+
+
+def _digest(title, requirements, resume):
+    payload = json.dumps([title, requirements, resume], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def rank_job_applicants(job_id, title, requirements, applicants, today=None):
+    """ApplicantScore by application id for one job's (application id, profile dict) pairs.
+
+    Skills and education scores already in the shared cache are reused;
+    the rest are computed in one batch and stored. Experience grows with
+    the date, so it is scored again on every call.
+    """
+    if not applicants:
+        return {}
+    resumes = [resume for application_id, resume in applicants]
+    keys = [
+        f"applicant-score:{RANKING_VERSION}:{job_id}:{application_id}:"
+        f"{_digest(title, requirements, resume)}"
+        for application_id, resume in applicants
+    ]
+    cache = get_shared_cache()
+    try:
+        cached = cache.get_many(*keys)
+    except Exception as e:
+        print(f"Error reading applicant score cache: {str(e)}")
+        cached = [None] * len(keys)
+
+    missing = [index for index, value in enumerate(cached) if value is None]
+    if missing:
+        scores = score_applicants(title, requirements, [resumes[index] for index in missing], today)
+        computed = {index: (score.skills, score.education) for index, score in zip(missing, scores)}
+        try:
+            cache.set_many(
+                {keys[index]: value for index, value in computed.items()}, timeout=SCORE_CACHE_TTL
+            )
+        except Exception as e:
+            print(f"Error writing applicant score cache: {str(e)}")
+        for index, value in computed.items():
+            cached[index] = value
+
+    skills, education = np.array(cached, np.float32).reshape(-1, 2).T
+    scores = _combine(skills, _experience_scores(requirements, resumes, today), education)
+    return {application_id: score for (application_id, resume), score in zip(applicants, scores)}
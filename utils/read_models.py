@@ -0,0 +1,62 @@
+"""Compact, immutable rows for listing pages.
+
+Listing queries select only the columns a page shows and build these named
+tuples straight from the result rows, instead of hydrating full ORM objects
+that outlive their session. They are cheap to allocate, safe to share from
+the read cache and safe to keep in st.session_state.
+"""
+from collections import namedtuple
+
+JobSummary = namedtuple('JobSummary', [
+    'id',
+    'title',
+    'company_id',
+    'company_name',
+    'location',
+    'job_type',
+    'accommodations',
+    'description',
+    'posted_date',
+    'search_rank',  # Full-text relevance, set only for keyword searches
+    'match_score',  # Profile match between 0 and 1, set only for recommendations
+], defaults=(None, None))
+
+# A company's profile as shown on its dashboard, without its password
+CompanyProfile = namedtuple('CompanyProfile', [
+    'id',
+    'name',
+    'website',
+    'contact_name',
+    'contact_email',
+    'contact_position',
+    'contact_phone',
+    'description',
+    'accessibility_features',
+    'culture',
+    'verified',
+    'verification_status',
+])
+
+ApplicationSummary = namedtuple('ApplicationSummary', [
+    'id',
+    'job_id',
+    'job_title',
+    'company_name',
+    'job_location',
+    'job_type',
+    'status',
+    'applied_date',
+    'resume_key',
+    'cover_letter',
+    'additional_notes',
+])
+
+# An application whose status a company just changed, with what the applicant needs to hear about it
+ApplicationNotice = namedtuple('ApplicationNotice', [
+    'application_id',
+    'job_id',
+    'job_title',
+    'user_name',
+    'user_email',
+    'status',
+])
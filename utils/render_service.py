@@ -0,0 +1,198 @@
+"""Resume rendering in a pool of worker processes.
+
+ReportLab lays out pages in pure Python, so a render holds the GIL for its
+whole duration; run in a page script or API thread it stalls every other
+user of that server. Renders are instead submitted to a process pool:
+
+    job_id = submit_render(resume_data, "Professional")
+    pdf = get_result(job_id, timeout=30)
+
+At most RENDER_QUEUE_SIZE renders may be queued or running at once. Beyond
+that submit_render() raises RenderQueueFull straight away, so callers can
+ask users to retry instead of piling up work the pool cannot absorb.
+Results already in the render cache (see pdf_generator.render_resume) are
+returned without touching the pool.
+
+RENDER_WORKERS (default: the number of CPU cores) sets the pool size.
+Workers are started with the spawn method, so they never inherit database
+connections or threads. Like any spawn-based pool this needs the entry
+script to guard its startup code with if __name__ == '__main__', and the
+workers only know templates registered when utils.pdf_generator is imported.
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, InvalidStateError, ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from . import pdf_generator
+
+# Seconds get_result() waits by default
+RENDER_TIMEOUT = 30
+
+# Seconds an uncollected result is kept before it is dropped
+RESULT_TTL = 300
+
+
+class RenderQueueFull(RuntimeError):
+    """Raised when the pool already has as many renders as it accepts"""
+
+
+class RenderTimeout(TimeoutError):
+    """Raised when a render is not finished within the timeout"""
+
+
+class UnknownRender(KeyError):
+    """Raised for a job id that was never submitted, or already collected"""
+
+
+def _render(resume_data, template_name):
+    """Render in a worker process"""
+    return pdf_generator.generate_resume_pdf(resume_data, pdf_generator.TEMPLATES[template_name])
+
+
+class RenderService:
+    """Process pool with a bounded number of queued and running renders"""
+
+    def __init__(self, workers=None, queue_size=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.workers * 4
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(self.queue_size)
+        self._lock = threading.Lock()
+        self._jobs = {}  # job id -> (submitted at, future)
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def _add(self, future):
+        job_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (submitted, job) in self._jobs.items()
+                       if job.done() and now - submitted > RESULT_TTL]
+            for key in expired:
+                del self._jobs[key]
+            self._jobs[job_id] = (now, future)
+        return job_id
+
+    def submit(self, resume_data, template_name, use_cache=True):
+        """Queue a render and return its job id"""
+        if template_name not in pdf_generator.TEMPLATES:
+            raise ValueError(f"Unknown resume template: {template_name}")
+        key = pdf_generator.render_cache_key(resume_data, template_name)
+        pdf = pdf_generator.cached_render(key) if use_cache else None
+        if pdf is not None:
+            future = Future()
+            future.set_result(pdf)
+            return self._add(future)
+
+        if not self._slots.acquire(blocking=False):
+            raise RenderQueueFull(f"{self.queue_size} renders are already queued; try again shortly")
+        try:
+            try:
+                render = self._pool().submit(_render, resume_data, template_name)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); start a fresh pool once
+                self.shutdown(wait=False)
+                render = self._pool().submit(_render, resume_data, template_name)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        # Callers wait on this future, which completes only after the slot is
+        # free and the PDF is cached, so a finished render is always a cache hit
+        future = Future()
+        future.add_done_callback(lambda done: done.cancelled() and render.cancel())
+
+        def finished(done):
+            self._slots.release()
+            try:
+                if done.cancelled():
+                    future.cancel()
+                elif done.exception() is not None:
+                    future.set_exception(done.exception())
+                else:
+                    if use_cache:
+                        pdf_generator.store_render(key, done.result())
+                    future.set_result(done.result())
+            except InvalidStateError:
+                pass  # Cancelled by the caller meanwhile
+
+        render.add_done_callback(finished)
+        return self._add(future)
+
+    def future(self, job_id):
+        """The concurrent.futures.Future of a job, e.g. to await it with asyncio.wrap_future"""
+        with self._lock:
+            if job_id not in self._jobs:
+                raise UnknownRender(job_id)
+            return self._jobs[job_id][1]
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def get_result(self, job_id, timeout=RENDER_TIMEOUT):
+        """Wait up to timeout seconds for a job's PDF; the result can be collected once"""
+        future = self.future(job_id)
+        try:
+            pdf = future.result(timeout)
+        except FutureTimeout:
+            raise RenderTimeout(f"Render {job_id} did not finish within {timeout} seconds")
+        except BaseException:
+            self.forget(job_id)
+            raise
+        self.forget(job_id)
+        return pdf
+
+    def cancel(self, job_id):
+        """Drop a job, and its render too if it has not started yet"""
+        try:
+            self.future(job_id).cancel()
+        except UnknownRender:
+            pass
+        self.forget(job_id)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_render_service = None
+_render_service_lock = threading.Lock()
+
+
+def get_render_service():
+    """Return the process-wide render service configured from the environment"""
+    global _render_service
+    with _render_service_lock:
+        if _render_service is None:
+            workers = int(os.getenv('RENDER_WORKERS', 0)) or None
+            queue_size = int(os.getenv('RENDER_QUEUE_SIZE', 0)) or None
+            _render_service = RenderService(workers, queue_size)
+        return _render_service
+
+
+def submit_render(resume_data, template_name):
+    """Queue a resume render on the process-wide service and return its job id"""
+    return get_render_service().submit(resume_data, template_name)
+
+
+def get_result(job_id, timeout=RENDER_TIMEOUT):
+    """Wait for a render submitted with submit_render() and return the PDF bytes"""
+    return get_render_service().get_result(job_id, timeout)
+
+
+def cancel_render(job_id):
+    """Drop a render submitted with submit_render(), e.g. after get_result() timed out"""
+    get_render_service().cancel(job_id)
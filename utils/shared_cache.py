@@ -0,0 +1,114 @@
+"""Cache shared between processes: the Streamlit app, API workers and tools.
+
+The backend is chosen with SHARED_CACHE_BACKEND: "filesystem" (default, a
+directory under SHARED_CACHE_DIR that every process on the host can read),
+"redis" (any Redis-compatible server at SHARED_CACHE_REDIS_URL; needs the
+redis package) or "simple" (in-process only, for tests).
+
+Entries derived from database rows are keyed by the versions of the tags
+they depend on. invalidate_tags() gives those tags fresh versions, so older
+entries are never read again and simply expire, whichever process wrote
+them. data_manager registers it with utils.cache.on_invalidate() and
+checks the in-process read cache against tag_versions(), so every read
+cache invalidation reaches all processes: the API response cache and the
+in-process caches of the Streamlit app and the API workers alike.
+"""
+import os
+import uuid
+
+from cachelib import FileSystemCache, RedisCache, SimpleCache
+
+_DEFAULT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'cache')
+
+# Most entries kept by the filesystem backend before it prunes
+FILESYSTEM_THRESHOLD = 5000
+
+_VERSION_PREFIX = 'tag-version:'
+_WRITTEN_PREFIX = 'tag-written:'
+
+
+def _redis_cache():
+    import redis
+
+    url = os.getenv('SHARED_CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    return RedisCache(host=redis.Redis.from_url(url), key_prefix='jobs-platform:')
+
+
+SHARED_CACHE_BACKENDS = {
+    'filesystem': lambda: FileSystemCache(
+        os.getenv('SHARED_CACHE_DIR', _DEFAULT_DIR), threshold=FILESYSTEM_THRESHOLD
+    ),
+    'redis': _redis_cache,
+    'simple': lambda: SimpleCache(),
+}
+
+_shared_cache = None
+
+
+def get_shared_cache():
+    """Return the process-wide shared cache configured from the environment"""
+    global _shared_cache
+    if _shared_cache is None:
+        backend = os.getenv('SHARED_CACHE_BACKEND', 'filesystem')
+        if backend not in SHARED_CACHE_BACKENDS:
+            raise ValueError(f"Unknown SHARED_CACHE_BACKEND: {backend}")
+        _shared_cache = SHARED_CACHE_BACKENDS[backend]()
+    return _shared_cache
+
+
+def tag_version(tag):
+    """Current version token of a tag.
+
+    Versions are random tokens rather than counters, so a version that is
+    evicted from the backend comes back as a new token and can never match
+    an entry written under an earlier one.
+    """
+    cache = get_shared_cache()
+    key = _VERSION_PREFIX + tag
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=0)
+        version = cache.get(key)
+    # An unreachable backend yields a one-off version: always a miss, never stale
+    return version if version is not None else uuid.uuid4().hex
+
+
+def tag_versions(tags):
+    """Current version tokens of several tags, in order"""
+    tags = list(tags)
+    versions = list(get_shared_cache().get_many(*(_VERSION_PREFIX + tag for tag in tags)))
+    for position, version in enumerate(versions):
+        if version is None:
+            versions[position] = tag_version(tags[position])
+    return versions
+
+
+def invalidate_tags(*tags):
+    """Give each tag a new version, orphaning every entry keyed by the old one"""
+    cache = get_shared_cache()
+    for tag in tags:
+        cache.set(_VERSION_PREFIX + tag, uuid.uuid4().hex, timeout=0)
+
+
+def mark_written(tags, timeout):
+    """Record that the data behind tags changed, for timeout seconds"""
+    if tags:
+        get_shared_cache().set_many({_WRITTEN_PREFIX + tag: 1 for tag in tags}, timeout=timeout)
+
+
+def recently_written(tags):
+    """Whether any of tags was passed to mark_written() within its timeout"""
+    if not tags:
+        return False
+    try:
+        values = get_shared_cache().get_many(*(_WRITTEN_PREFIX + tag for tag in tags))
+        return any(value is not None for value in values)
+    except Exception as e:
+        # Unknown is treated as written, so reads err towards fresh data
+        print(f"Error reading recently written tags: {str(e)}")
+        return True
+
+
+def flask_cache_backend(app, config, args, kwargs):
+    """Flask-Caching CACHE_TYPE factory returning the shared cache"""
+    return get_shared_cache()